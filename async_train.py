@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+# Entrenamiento SAC asíncrono: procesos actor que recogen experiencia y un learner que entrena
+# sin esperar a la recogida (y viceversa).
+#
+#   actor 0..N-1 (procesos) --transiciones--> anillo en memoria compartida --lotes--> learner
+#        ^                                                                               |
+#        +------------------------ pesos del actor (seqlock, cada --sync_every) ---------+
+#
+# Cada actor ejecuta un RouletteVecEnv de --envs_per_actor mesas y una copia NumPy del actor de
+# SAC (muestreo estocástico, sin torch) y escribe en su propia partición del anillo, con la
+# codificación de compact_buffer.py. El learner (este proceso) llama a model.train() con un
+# buffer que muestrea del anillo, publica los pesos cada --sync_every pasos de gradiente y se
+# limita a --replay_ratio pasos de gradiente por transición recogida. Con --min_replay_ratio los
+# actores esperan si el learner se queda por debajo de esa proporción (p. ej. con pocos núcleos).
+#   python train_sac.py --async_actors 6 --envs_per_actor 16 --torch_threads 2
+from __future__ import annotations
+import argparse
+import multiprocessing as mp
+import os
+import time
+from dataclasses import replace
+from pathlib import Path
+import numpy as np
+from stable_baselines3.common.buffers import BaseBuffer
+from stable_baselines3.common.logger import configure
+from stable_baselines3.common.type_aliases import ReplayBufferSamples
+
+from compact_buffer import decode_obs, encode_onehots
+from numpy_policy import ACTIVATIONS
+from roulette_config import RouletteConfig
+from roulette_vec_env import RouletteVecEnv
+from train_sac import BLAS_THREAD_VARS, build_model, finish_training, make_config, set_num_threads
+
+LOG_STD_MIN, LOG_STD_MAX = -20.0, 2.0  # mismos límites que el actor de SB3
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+class SharedRing:
+    # Un bloque de memoria compartida con una partición de `rows` filas por actor. Cada actor es el
+    # único escritor de su partición (sin locks): escribe las filas y después avanza su contador.
+    # Al dar la vuelta, una muestra puede leer una fila a medio sobrescribir; en SAC es despreciable.
+    def __init__(self, n_actors: int, rows: int, action_dim: int, ctx=mp):
+        self.n_actors = int(n_actors)
+        self.rows = int(rows)
+        self.action_dim = int(action_dim)
+        self.raw = ctx.RawArray("b", self._layout()[1])
+        self.counts = ctx.RawArray("q", self.n_actors)
+        self._views()
+
+    def _layout(self):
+        fields = (("bankroll", np.float32, ()), ("last_code", np.uint8, ()),
+                  ("next_bankroll", np.float32, ()), ("next_code", np.uint8, ()),
+                  ("actions", np.float32, (self.action_dim,)), ("rewards", np.float32, ()),
+                  ("dones", np.bool_, ()))
+        layout, offset = [], 0
+        for name, dtype, shape in fields:
+            shape = (self.n_actors * self.rows,) + shape
+            layout.append((name, dtype, shape, offset))
+            offset = _aligned(offset + int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        return layout, offset
+
+    def _views(self) -> None:
+        for name, dtype, shape, offset in self._layout()[0]:
+            setattr(self, name, np.frombuffer(self.raw, dtype=dtype, count=int(np.prod(shape)),
+                                              offset=offset).reshape(shape))
+        self.count = np.frombuffer(self.counts, dtype=np.int64)
+
+    def __getstate__(self):
+        # Sólo se serializa al lanzar los procesos (spawn); los arrays se reconstruyen como vistas
+        return {"n_actors": self.n_actors, "rows": self.rows, "action_dim": self.action_dim,
+                "raw": self.raw, "counts": self.counts}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._views()
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.raw)
+
+    def total(self) -> int:
+        return int(self.count.sum())
+
+    def filled(self) -> np.ndarray:
+        return np.minimum(self.count, self.rows)
+
+    def write(self, actor: int, obs, next_obs, actions, rewards, dones) -> None:
+        start = int(self.count[actor])
+        idx = actor * self.rows + (start + np.arange(len(rewards))) % self.rows
+        self.bankroll[idx] = obs[:, 0]
+        self.last_code[idx] = encode_onehots(obs[:, 1:])
+        self.next_bankroll[idx] = next_obs[:, 0]
+        self.next_code[idx] = encode_onehots(next_obs[:, 1:])
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.dones[idx] = dones
+        self.count[actor] = start + len(rewards)
+
+    def sample_indices(self, batch_size: int) -> np.ndarray:
+        # Uniforme sobre todas las filas escritas de todas las particiones
+        filled = self.filled()
+        cum = np.cumsum(filled)
+        u = np.random.randint(0, cum[-1], size=batch_size)
+        actor = np.searchsorted(cum, u, side="right")
+        return actor * self.rows + u - (cum[actor] - filled[actor])
+
+class RingReplayBuffer(BaseBuffer):
+    # Vista de sólo lectura del anillo con la interfaz que usa SAC.train(). Cada partición tiene
+    # un único escritor (su actor), así que el learner no puede añadir transiciones.
+    def __init__(self, ring: SharedRing, observation_space, action_space, device="auto"):
+        super().__init__(ring.n_actors * ring.rows, observation_space, action_space, device)
+        self.ring = ring
+
+    def size(self) -> int:
+        return int(self.ring.filled().sum())
+
+    def add(self, obs, next_obs, action, reward, done, infos) -> None:
+        raise RuntimeError("RingReplayBuffer es de sólo lectura: en modo asíncrono sólo escriben los "
+                           "actores, cada uno en su partición (SharedRing.write)")
+
+    def sample(self, batch_size: int, env=None) -> ReplayBufferSamples:
+        return self._get_samples(self.ring.sample_indices(batch_size), env=env)
+
+    def _get_samples(self, batch_inds: np.ndarray, env=None) -> ReplayBufferSamples:
+        r = self.ring
+        data = (
+            self._normalize_obs(decode_obs(r.bankroll[batch_inds], r.last_code[batch_inds]), env),
+            r.actions[batch_inds],
+            self._normalize_obs(decode_obs(r.next_bankroll[batch_inds], r.next_code[batch_inds]), env),
+            r.dones[batch_inds].astype(np.float32).reshape(-1, 1),
+            self._normalize_reward(r.rewards[batch_inds].reshape(-1, 1), env),
+        )
+        return ReplayBufferSamples(*tuple(map(self.to_torch, data)))
+
+def actor_layout(model) -> list[tuple[str, tuple]]:
+    # Pesos del actor que necesita NumpyActor, en orden fijo
+    state = model.actor.state_dict()
+    return [(k, tuple(v.shape)) for k, v in state.items()
+            if k.startswith(("latent_pi.", "mu.", "log_std."))]
+
+class WeightBoard:
+    # Pesos del actor en memoria compartida con un seqlock: versión impar = escritura en curso
+    def __init__(self, layout: list[tuple[str, tuple]], ctx=mp):
+        self.layout = layout
+        self.size = sum(int(np.prod(shape)) for _, shape in layout)
+        self.raw = ctx.RawArray("f", self.size)
+        self.raw_version = ctx.RawArray("q", 1)
+        self._views()
+
+    def _views(self) -> None:
+        self.flat = np.frombuffer(self.raw, dtype=np.float32)
+        self.version = np.frombuffer(self.raw_version, dtype=np.int64)
+
+    def __getstate__(self):
+        return {"layout": self.layout, "size": self.size, "raw": self.raw, "raw_version": self.raw_version}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._views()
+
+    def publish(self, model) -> int:
+        state = model.actor.state_dict()
+        self.version[0] += 1
+        offset = 0
+        for name, shape in self.layout:
+            n = int(np.prod(shape))
+            self.flat[offset:offset + n] = state[name].detach().cpu().numpy().ravel()
+            offset += n
+        self.version[0] += 1
+        return int(self.version[0])
+
+    def fetch(self, out: np.ndarray, known: int) -> int:
+        # Copia los pesos si hay una versión nueva y completa; devuelve la versión que queda en `out`
+        v = int(self.version[0])
+        if v == known or v % 2:
+            return known
+        out[:] = self.flat
+        return v if int(self.version[0]) == v else known
+
+class NumpyActor:
+    # Actor estocástico de SAC: a = tanh(mu + std · eps), reescalado al action_space
+    def __init__(self, layout: list[tuple[str, tuple]], activation: str, low: np.ndarray, high: np.ndarray):
+        self.flat = np.zeros(sum(int(np.prod(s)) for _, s in layout), dtype=np.float32)
+        params, offset = {}, 0
+        for name, shape in layout:
+            n = int(np.prod(shape))
+            params[name] = self.flat[offset:offset + n].reshape(shape)
+            offset += n
+        idx = sorted({int(k.split(".")[1]) for k in params if k.startswith("latent_pi.")})
+        self.layers = [(params[f"latent_pi.{i}.weight"], params[f"latent_pi.{i}.bias"]) for i in idx]
+        self.mu = (params["mu.weight"], params["mu.bias"])
+        self.log_std = (params["log_std.weight"], params["log_std.bias"])
+        self._act = ACTIVATIONS[activation]
+        self.low, self.high = low, high
+
+    def sample(self, obs: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        x = obs
+        for w, b in self.layers:
+            x = self._act(x @ w.T + b)
+        mean = x @ self.mu[0].T + self.mu[1]
+        log_std = np.clip(x @ self.log_std[0].T + self.log_std[1], LOG_STD_MIN, LOG_STD_MAX)
+        a = np.tanh(mean + np.exp(log_std) * rng.standard_normal(mean.shape, dtype=np.float32))
+        return self.low + 0.5 * (a + 1.0) * (self.high - self.low)
+
+def _run_actor(rank: int, cfg: RouletteConfig, n_envs: int, ring: SharedRing, board: WeightBoard,
+               activation: str, stats, stop, warmup: int, sync_every: int, limit: int,
+               grad_counter, min_ratio: float, learning_starts: int) -> None:
+    # Mesa global rank·n_envs + i con semilla random_seed + rank·n_envs + i (como make_env)
+    seed = 0 if cfg.random_seed is None else cfg.random_seed
+    venv = RouletteVecEnv(replace(cfg, random_seed=seed + rank * n_envs), n_envs=n_envs)
+    low, high = venv.action_space.low, venv.action_space.high
+    policy = NumpyActor(board.layout, activation, low, high)
+    rng = np.random.default_rng([seed, rank])
+    grads = np.frombuffer(grad_counter, dtype=np.int64)
+    version = -1
+    obs = venv.reset()
+    steps = 0
+    while not stop.is_set():
+        total = ring.total()
+        if total >= limit:
+            break
+        if min_ratio > 0 and grads[0] < min_ratio * (total - learning_starts):
+            time.sleep(0.0005)  # el learner va demasiado por detrás
+            continue
+        if steps % sync_every == 0:
+            version = board.fetch(policy.flat, version)
+        if version < 0 or ring.count[rank] < warmup:
+            actions = rng.uniform(low, high, size=(n_envs, low.size)).astype(np.float32)
+        else:
+            actions = policy.sample(obs, rng).astype(np.float32)
+        next_obs, rewards, dones, infos = venv.step(actions)
+        real_next = next_obs
+        done_idx = np.flatnonzero(dones)
+        if done_idx.size:
+            real_next = next_obs.copy()
+            for i in done_idx:
+                real_next[i] = infos[i]["terminal_observation"]
+                stats[2 * rank] += 1
+                stats[2 * rank + 1] += infos[i]["episode"]["r"]
+        ring.write(rank, obs, real_next, actions, rewards, dones)
+        obs = next_obs
+        steps += 1
+
+def train_async(args) -> dict:
+    n_actors = int(args.async_actors)
+    n_envs = int(args.envs_per_actor)
+    # Hilos del learner: los núcleos que no usan los actores
+    set_num_threads(args.torch_threads or max((os.cpu_count() or 1) - n_actors, 1))
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cfg = make_config(args)
+    ctx = mp.get_context("spawn")
+
+    # Modelo con un buffer mínimo de SB3 que se sustituye por la vista del anillo
+    probe = RouletteVecEnv(cfg, n_envs=1)
+    model = build_model(argparse.Namespace(**{**vars(args), "buffer_size": 1, "replay_buffer": "default"}), probe)
+    model.set_logger(configure(str(out_dir / "async_logs"), ["csv"]))
+    ring = SharedRing(n_actors, max(args.buffer_size // n_actors, n_envs), probe.action_space.shape[0], ctx)
+    model.replay_buffer = RingReplayBuffer(ring, probe.observation_space, probe.action_space, model.device)
+    board = WeightBoard(actor_layout(model), ctx)
+    board.publish(model)
+    stats = ctx.RawArray("d", 2 * n_actors)  # por actor: episodios terminados, suma de returns
+    grad_counter = ctx.RawArray("q", 1)      # pasos de gradiente hechos (para --min_replay_ratio)
+    grads = np.frombuffer(grad_counter, dtype=np.int64)
+    stop = ctx.Event()
+    learning_starts = max(int(model.learning_starts), args.batch_size)
+    print(f"[async] {n_actors} actores × {n_envs} mesas, anillo {ring.n_actors * ring.rows:,} filas "
+          f"({ring.nbytes / 2**20:.1f} MiB)")
+
+    activation = model.actor.activation_fn.__name__
+    procs = [ctx.Process(target=_run_actor, name=f"actor-{rank}", daemon=True,
+                         args=(rank, cfg, n_envs, ring, board, activation, stats, stop,
+                               learning_starts // n_actors + 1, args.actor_sync_every, args.timesteps,
+                               grad_counter, args.min_replay_ratio, learning_starts))
+             for rank in range(n_actors)]
+    # Un hilo por actor (los hijos heredan el entorno al arrancar); el learner conserva los suyos
+    saved = {var: os.environ.get(var) for var in BLAS_THREAD_VARS}
+    os.environ.update({var: "1" for var in BLAS_THREAD_VARS})
+    try:
+        for p in procs:
+            p.start()
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+    stats_view = np.frombuffer(stats, dtype=np.float64).reshape(n_actors, 2)
+    grad_steps = 0
+    idle = 0.0
+    t0 = time.perf_counter()
+    last = {"t": t0, "env": 0, "grad": 0, "idle": 0.0, "episodes": 0.0, "returns": 0.0}
+    last_sync = 0
+    rates = {"actor_steps_per_s": 0.0, "learner_grad_steps_per_s": 0.0}
+    try:
+        while True:
+            env_steps = ring.total()
+            if env_steps >= args.timesteps:
+                break
+            if any(p.exitcode not in (None, 0) for p in procs):
+                raise RuntimeError("Un proceso actor terminó con error")
+            # El learner no se adelanta más de replay_ratio pasos de gradiente por transición
+            if env_steps < learning_starts or grad_steps + args.gradient_steps > args.replay_ratio * env_steps:
+                t_wait = time.perf_counter()
+                time.sleep(0.001)
+                idle += time.perf_counter() - t_wait
+            else:
+                model.num_timesteps = env_steps
+                model._current_progress_remaining = 1.0 - env_steps / args.timesteps
+                model.train(gradient_steps=args.gradient_steps, batch_size=args.batch_size)
+                grad_steps += args.gradient_steps
+                grads[0] = grad_steps
+                if grad_steps - last_sync >= args.sync_every:
+                    board.publish(model)
+                    last_sync = grad_steps
+
+            now = time.perf_counter()
+            if now - last["t"] >= args.report_every:
+                dt = now - last["t"]
+                episodes, returns = stats_view.sum(axis=0)
+                new_eps = episodes - last["episodes"]
+                mean_ret = (returns - last["returns"]) / new_eps if new_eps else float("nan")
+                rates = {"actor_steps_per_s": (env_steps - last["env"]) / dt,
+                         "learner_grad_steps_per_s": (grad_steps - last["grad"]) / dt}
+                busy = 1.0 - (idle - last["idle"]) / dt
+                print(f"[async] {env_steps:,} pasos | actores {rates['actor_steps_per_s']:,.0f} pasos/s | "
+                      f"learner {rates['learner_grad_steps_per_s']:,.0f} grad/s "
+                      f"({rates['learner_grad_steps_per_s'] * args.batch_size:,.0f} muestras/s, ocupado {busy:.0%}) | "
+                      f"pesos v{int(board.version[0]) // 2} | return medio {mean_ret:.2f}")
+                for key, value in {**rates, "learner_busy": busy, "ep_return_mean": mean_ret,
+                                   "grad_steps": grad_steps}.items():
+                    model.logger.record(f"async/{key}", value)
+                model.logger.dump(step=env_steps)
+                last = {"t": now, "env": env_steps, "grad": grad_steps, "idle": idle,
+                        "episodes": episodes, "returns": returns}
+    finally:
+        stop.set()
+        for p in procs:
+            p.join(timeout=5.0)
+            if p.is_alive():
+                p.terminate()
+    elapsed = time.perf_counter() - t0
+    env_steps = ring.total()
+    model.num_timesteps = env_steps
+    print(f"[async] total: actores {env_steps / elapsed:,.0f} pasos/s, learner {grad_steps / elapsed:,.0f} grad/s "
+          f"({grad_steps:,} pasos de gradiente, ocupado {1.0 - idle / elapsed:.0%})")
+
+    result = finish_training(model, cfg, args, elapsed, env_steps,
+                             f"async: {n_actors} actores × {n_envs} mesas")
+    result.update({
+        "grad_steps": grad_steps,
+        "actor_steps_per_s": round(env_steps / elapsed, 3),
+        "learner_grad_steps_per_s": round(grad_steps / elapsed, 3),
+    })
+    return result
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+# Banco de pruebas de rendimiento: entorno, VecEnv, evaluación, frame del GUI, física y mesas.
+#
+# Cada prueba devuelve una métrica (mayor = mejor salvo las de tiempo por frame) y el
+# resultado se guarda en JSON. Con --baseline se compara contra un fichero guardado y el
+# proceso termina con código 1 si alguna métrica empeora más que --tolerance.
+#   python benchmark.py --out bench.json
+#   python benchmark.py --baseline benchmark_baseline.json --tolerance 0.25
+#   python benchmark.py --only env,physics --save_baseline benchmark_baseline.json
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+import numpy as np
+
+from roulette_env_sb3 import RouletteEnv, RouletteConfig
+
+SUITES = ("env", "vec", "eval", "gui", "physics", "tables")
+VEC_SIZES = (1, 16, 256, 4096)
+
+def _best_of(fn, repeat: int) -> float:
+    # Mejor de `repeat` ejecuciones (segundos): menos sensible al ruido del sistema
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def _metric(value: float, unit: str, higher_is_better: bool = True) -> dict:
+    return {"value": round(float(value), 3), "unit": unit, "higher_is_better": higher_is_better}
+
+def bench_env(repeat: int, steps: int = 20_000) -> dict:
+    cfg = RouletteConfig(random_seed=0, max_steps=200)
+    actions = np.random.default_rng(0).normal(size=(steps, 10)).astype(np.float32)
+    out = {}
+    for lean in (False, True):
+        env = RouletteEnv(replace(cfg, lean=lean))
+        def run():
+            env.reset(seed=0)
+            for a in actions:
+                _, _, term, _, _ = env.step(a)
+                if term:
+                    env.reset()
+        name = "env_lean_steps_per_sec" if lean else "env_steps_per_sec"
+        out[name] = _metric(steps / _best_of(run, repeat), "steps/s")
+
+    env = RouletteEnv(cfg)
+    def resets():
+        for _ in range(steps):
+            env.reset()
+    out["env_resets_per_sec"] = _metric(steps / _best_of(resets, repeat), "resets/s")
+    return out
+
+def bench_vec(repeat: int, total_steps: int = 200_000) -> dict:
+    from roulette_vec_env import RouletteVecEnv
+    out = {}
+    for n in VEC_SIZES:
+        venv = RouletteVecEnv(RouletteConfig(random_seed=0, max_steps=200), n_envs=n)
+        iters = min(max(total_steps // n, 50), 10_000)
+        actions = np.random.default_rng(0).normal(size=(n, 10)).astype(np.float32)
+        def run():
+            venv.reset()
+            for _ in range(iters):
+                venv.step(actions)
+        out[f"vec_env_steps_per_sec_n{n}"] = _metric(iters * n / _best_of(run, repeat), "steps/s")
+    return out
+
+def bench_eval(repeat: int, episodes: int = 64) -> dict:
+    from stable_baselines3 import SAC
+    from evaluate_policy import run_episodes_batched
+    cfg = RouletteConfig(random_seed=0, max_steps=200, lean=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Modelo SAC pequeño sin entrenar: sólo interesa el coste de predict + step
+        path = Path(tmp) / "bench_sac.zip"
+        SAC("MlpPolicy", RouletteEnv(cfg), policy_kwargs={"net_arch": [64, 64]}, seed=0,
+            device="cpu").save(str(path))
+        model = SAC.load(str(path), device="cpu")
+
+    env = RouletteEnv(cfg)
+    def sequential():
+        env.reset(seed=0)
+        for _ in range(episodes // 8):
+            obs, _ = env.reset()
+            done = False
+            while not done:
+                action, _ = model.predict(obs, deterministic=True)
+                obs, _, done, _, _ = env.step(action)
+
+    def batched():
+        run_episodes_batched(model, cfg, episodes)
+
+    return {
+        "eval_episodes_per_sec": _metric(episodes // 8 / _best_of(sequential, repeat), "episodes/s"),
+        "eval_batched_episodes_per_sec": _metric(episodes / _best_of(batched, repeat), "episodes/s"),
+    }
+
+def bench_gui(repeat: int, frames: int = 600) -> dict:
+    # Frame sin ventana: física + rueda cacheada + panel, y la rueda sin caché como referencia
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import main as gui
+    surface = gui.init_display()
+    cache = gui.WheelCache()
+    gui.add_bet(("RED", None), 10)
+    gui.launch_spin()
+
+    def frame_loop():
+        for _ in range(frames):
+            gui.update_physics(gui.SIM_DT)
+            cache.draw(surface, gui.table.wheel_angle, gui.table.ball_angle)
+            gui.draw_panel(surface)
+            if not gui.table.spinning:
+                gui.add_bet(("RED", None), 10)
+                gui.launch_spin()
+
+    def legacy_loop():
+        for i in range(frames // 4):
+            gui.table.state.wheel_angle[0] = i * 0.01
+            gui.draw_wheel(surface)
+
+    return {
+        "gui_frame_ms": _metric(_best_of(frame_loop, repeat) / frames * 1e3, "ms/frame", False),
+        "gui_legacy_wheel_ms": _metric(_best_of(legacy_loop, repeat) / (frames // 4) * 1e3, "ms/frame", False),
+    }
+
+def bench_physics(repeat: int, spins: int = 100_000) -> dict:
+    import wheel_physics as physics
+    rng = np.random.default_rng(0)
+    frame_spins = 1_000
+    return {
+        "physics_resolve_spins_per_sec": _metric(
+            spins / _best_of(lambda: physics.sample_pockets(spins, rng), repeat), "spins/s"),
+        "physics_frame_spins_per_sec": _metric(
+            frame_spins / _best_of(lambda: physics.run(physics.launch(frame_spins, rng)), repeat), "spins/s"),
+    }
+
+def bench_tables(repeat: int, tables: int = 2_000, frames: int = 120) -> dict:
+    # Tick del servidor de mesas: un TableGroup con todas las mesas girando; las que se asientan
+    # se liquidan y se relanzan en el mismo frame
+    import wheel_physics as physics
+    from table import TableGroup
+    group = TableGroup(tables, seed=0)
+    for _ in range(tables):
+        table = group.add_table()
+        table.sit("bot")
+        table.place_bet("bot", ("RED", None), 1)
+        table.launch_spin()
+
+    def tick_loop():
+        for _ in range(frames):
+            for table, _ in group.step(physics.FRAME_DT):
+                table.place_bet("bot", ("RED", None), 1)
+                table.launch_spin()
+
+    return {
+        "tables_steps_per_sec": _metric(tables * frames / _best_of(tick_loop, repeat), "mesas·frame/s"),
+    }
+
+BENCHES = {
+    "env": bench_env,
+    "vec": bench_vec,
+    "eval": bench_eval,
+    "gui": bench_gui,
+    "physics": bench_physics,
+    "tables": bench_tables,
+}
+
+def run_suite(suites=SUITES, repeat: int = 3, verbose: bool = True) -> dict:
+    results = {}
+    for name in suites:
+        t0 = time.perf_counter()
+        res = BENCHES[name](repeat)
+        results.update(res)
+        if verbose:
+            for k, m in res.items():
+                print(f"{k:>36}: {m['value']:>14,.3f} {m['unit']}")
+            print(f"{'':>36}  ({name}: {time.perf_counter() - t0:.1f}s)")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[dict]:
+    # Cambio relativo por métrica (positivo = mejor); regresión si empeora más que `tolerance`
+    rows = []
+    for name, base in baseline["results"].items():
+        cur = current["results"].get(name)
+        if cur is None:
+            continue
+        ratio = cur["value"] / max(base["value"], 1e-12)
+        change = ratio - 1.0 if base["higher_is_better"] else 1.0 / max(ratio, 1e-12) - 1.0
+        rows.append({"name": name, "baseline": base["value"], "current": cur["value"],
+                     "change": round(change, 4), "regression": change < -tolerance})
+    return rows
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser()
+    p.add_argument("--only", type=str, default=",".join(SUITES),
+                   help=f"suites separadas por comas ({', '.join(SUITES)})")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--out", type=str, default=None, help="resultados en JSON")
+    p.add_argument("--baseline", type=str, default=None, help="JSON de referencia con el que comparar")
+    p.add_argument("--tolerance", type=float, default=0.20, help="empeoramiento relativo admitido")
+    p.add_argument("--save_baseline", type=str, default=None, help="guarda estos resultados como referencia")
+    return p
+
+def main(argv=None):
+    p = build_parser()
+    args = p.parse_args(argv)
+
+    suites = [s.strip() for s in args.only.split(",") if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        p.error(f"suites desconocidas: {', '.join(sorted(unknown))}")
+
+    current = run_suite(suites, repeat=args.repeat)
+    for path in (args.out, args.save_baseline):
+        if path:
+            Path(path).write_text(json.dumps(current, indent=2), encoding="utf-8")
+            print(f"[OK] Resultados -> {path}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        rows = compare(current, baseline, args.tolerance)
+        for r in rows:
+            flag = "REGRESIÓN" if r["regression"] else "ok"
+            print(f"{r['name']:>36}: {r['baseline']:>14,.3f} -> {r['current']:>14,.3f}  "
+                  f"({r['change']*100:+.1f}%)  {flag}")
+        if any(r["regression"] for r in rows):
+            print(f"[ERROR] Regresiones por encima del {args.tolerance*100:.0f}%")
+            sys.exit(1)
+        print("[OK] Sin regresiones frente a la referencia")
+
+if __name__ == "__main__":
+    main()
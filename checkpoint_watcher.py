@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+# Evaluación continua de checkpoints mientras se entrena, sin parar el entrenamiento.
+#
+# Vigila <out_dir>/checkpoints (checkpointing.py): cada ckpt_* nuevo se evalúa en un proceso
+# aparte (spawn, uno por checkpoint, con prioridad baja) sobre las mismas tiradas fijas -- streams
+# Philox (seed, episodio) con una semilla distinta de la de entrenamiento --, así que la diferencia
+# entre dos filas se debe sólo a la política. Resultados:
+#   leaderboard.csv                 una fila por checkpoint (se añade, nunca se reescribe)
+#   sac_roulette_best.zip           mejor modelo según --metric
+#   sac_roulette_best_actor.npz     su actor NumPy
+#   best.json                       checkpoint, pasos y métricas del mejor
+# El model.zip se enlaza (hard link) a un directorio temporal al descubrirlo: el checkpointer puede
+# borrar el checkpoint (--keep_checkpoints) antes de que llegue su turno. Termina cuando el
+# entrenamiento escribe checkpoints/done.json y todo está evaluado, o si muere --parent_pid.
+#   python checkpoint_watcher.py --ckpt_dir models/checkpoints --episodes 2000
+#   python train_sac.py --timesteps 500000 --checkpoint_every 50000 --watch_eval 2000 [--watch_wait]
+from __future__ import annotations
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from roulette_config import BLAS_THREAD_VARS, RouletteConfig
+
+DONE = "done.json"
+LEADERBOARD = "leaderboard.csv"
+BEST_MODEL = "sac_roulette_best.zip"
+BEST_ACTOR = "sac_roulette_best_actor.npz"
+BEST_JSON = "best.json"
+STAGING = ".watch"
+FIELDS = ("steps", "checkpoint", "evaluated_at", "episodes", "seed", "mean_return", "return_ci_lo",
+          "return_ci_hi", "mean_final_bankroll", "median_final_bankroll", "ruin_rate", "target_rate",
+          "eval_s", "best")
+# métrica de --metric -> su valor en EvalStats.summary(); siempre mayor = mejor
+METRICS = {
+    "mean_return": lambda s: s["return"]["mean"],
+    "mean_final_bankroll": lambda s: s["final_bankroll"]["mean"],
+    "median_final_bankroll": lambda s: s["final_bankroll_quantiles"]["q0.5"],
+    "target_rate": lambda s: s.get("target_rate", 0.0),
+}
+
+# --------- marca de fin de entrenamiento (la escribe train_sac.py) ----------
+def mark_done(ckpt_root: str | Path, steps: int) -> None:
+    root = Path(ckpt_root)
+    tmp = root / f".{DONE}.tmp"
+    tmp.write_text(json.dumps({"steps": int(steps)}), encoding="utf-8")
+    os.replace(tmp, root / DONE)
+
+def clear_done(ckpt_root: str | Path) -> None:
+    (Path(ckpt_root) / DONE).unlink(missing_ok=True)
+
+def launch_watcher(ckpt_root: str | Path, out_dir: str | Path, cfg: RouletteConfig, episodes: int,
+                   seed: int, workers: int = 1) -> subprocess.Popen:
+    # Proceso vigilante en segundo plano para train_sac.py (--watch_eval)
+    cmd = [sys.executable, str(Path(__file__).resolve()),
+           "--ckpt_dir", str(ckpt_root), "--out_dir", str(out_dir),
+           "--episodes", str(episodes), "--seed", str(seed), "--workers", str(workers),
+           "--initial_bankroll", repr(float(cfg.initial_bankroll)),
+           "--bet_fraction", repr(float(cfg.bet_fraction)), "--max_steps", str(cfg.max_steps),
+           "--target_bankroll", repr(float(cfg.target_bankroll)), "--parent_pid", str(os.getpid())]
+    return subprocess.Popen(cmd)
+
+# --------- proceso evaluador (uno por checkpoint) ----------
+def _init_eval_worker(nice: int) -> None:
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)
+
+def evaluate_checkpoint(model_zip: str, actor_out: str, cfg: RouletteConfig, episodes: int,
+                        chunk: int, stats_kwargs: dict) -> dict:
+    # Actor NumPy exportado del model.zip + episodios en lote por bloques de `chunk` (memoria acotada)
+    from eval_stats import EvalStats
+    from evaluate_policy import run_episodes_batched
+    from numpy_policy import NumpyPolicy, export_actor
+    t0 = time.perf_counter()
+    policy = NumpyPolicy(export_actor(model_zip, actor_out))
+    stats = EvalStats(**stats_kwargs)
+    for start in range(0, episodes, chunk):
+        stats.update(*run_episodes_batched(policy, cfg, min(chunk, episodes - start), first_episode=start))
+    return {"summary": stats.summary(), "eval_s": time.perf_counter() - t0}
+
+# --------- vigilante ----------
+def _parent_alive(pid: int | None) -> bool:
+    if not pid or os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _stage(src: Path, dst: Path) -> None:
+    # Hard link (instantáneo, mismo disco); si no se puede, copia
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+class CheckpointWatcher:
+    def __init__(self, ckpt_root: str | Path, out_dir: str | Path, cfg: RouletteConfig, episodes: int,
+                 metric: str = "mean_return", workers: int = 1, chunk: int = 4096, nice: int = 10,
+                 ruin_fraction: float = 0.01):
+        self.ckpt_root = Path(ckpt_root)
+        self.out_dir = Path(out_dir)
+        self.staging = self.out_dir / STAGING
+        self.staging.mkdir(parents=True, exist_ok=True)
+        self.leaderboard = self.out_dir / LEADERBOARD
+        self.cfg = cfg
+        self.episodes = int(episodes)
+        self.metric = metric
+        self.chunk = int(chunk)
+        self.stats_kwargs = {"initial_bankroll": cfg.initial_bankroll,
+                             "ruin_bankroll": ruin_fraction * cfg.initial_bankroll,
+                             "target_bankroll": cfg.target_bankroll}
+        # Checkpoints ya evaluados (también en una ejecución anterior) y el mejor hasta ahora
+        self.seen: set[str] = set()
+        if self.leaderboard.exists():
+            with self.leaderboard.open(newline="", encoding="utf-8") as f:
+                self.seen.update(row["checkpoint"] for row in csv.DictReader(f))
+        self.best: dict | None = None
+        best_json = self.out_dir / BEST_JSON
+        if best_json.exists():
+            best = json.loads(best_json.read_text(encoding="utf-8"))
+            if best.get("metric") == metric:
+                self.best = best
+        self.pending: list[tuple[str, int, Path, Path, object]] = []
+        self.evaluated = 0
+        # Un proceso nuevo por checkpoint: torch y la memoria del anterior no se acumulan
+        for var in BLAS_THREAD_VARS:
+            os.environ[var] = "1"
+        self.pool = mp.get_context("spawn").Pool(max(int(workers), 1), initializer=_init_eval_worker,
+                                                 initargs=(nice,), maxtasksperchild=1)
+
+    def discover(self) -> int:
+        # Encola los checkpoints completos aún no vistos (los .tmp de checkpointing.py se ignoran)
+        new = 0
+        for ckpt in sorted(self.ckpt_root.glob("ckpt_*")):
+            name = ckpt.name
+            if name in self.seen or not (ckpt / "model.zip").exists():
+                continue
+            self.seen.add(name)
+            model_zip, actor = self.staging / f"{name}.zip", self.staging / f"{name}_actor.npz"
+            try:
+                _stage(ckpt / "model.zip", model_zip)
+            except FileNotFoundError:
+                print(f"[WARN] {name} se borró antes de poder evaluarlo")
+                continue
+            steps = int(name.split("_")[-1])
+            job = self.pool.apply_async(evaluate_checkpoint, (str(model_zip), str(actor), self.cfg,
+                                                              self.episodes, self.chunk, self.stats_kwargs))
+            self.pending.append((name, steps, model_zip, actor, job))
+            print(f"[watch] {name}: evaluando {self.episodes} episodios en segundo plano", flush=True)
+            new += 1
+        return new
+
+    def collect(self) -> int:
+        done = 0
+        for item in [p for p in self.pending if p[4].ready()]:
+            self.pending.remove(item)
+            name, steps, model_zip, actor, job = item
+            try:
+                result = job.get()
+            except Exception as exc:
+                print(f"[WARN] {name}: la evaluación falló ({exc})", flush=True)
+                model_zip.unlink(missing_ok=True)
+                actor.unlink(missing_ok=True)
+                continue
+            self._record(name, steps, model_zip, actor, result)
+            done += 1
+        self.evaluated += done
+        return done
+
+    def _record(self, name: str, steps: int, model_zip: Path, actor: Path, result: dict) -> None:
+        s = result["summary"]
+        value = METRICS[self.metric](s)
+        is_best = self.best is None or value > self.best["value"]
+        row = {
+            "steps": steps, "checkpoint": name, "evaluated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "episodes": s["episodes"], "seed": self.cfg.random_seed,
+            "mean_return": f"{s['return']['mean']:.6f}",
+            "return_ci_lo": f"{s['return']['ci'][0]:.6f}", "return_ci_hi": f"{s['return']['ci'][1]:.6f}",
+            "mean_final_bankroll": f"{s['final_bankroll']['mean']:.4f}",
+            "median_final_bankroll": f"{s['final_bankroll_quantiles']['q0.5']:.4f}",
+            "ruin_rate": f"{s['ruin_rate']:.6f}", "target_rate": f"{s.get('target_rate', 0.0):.6f}",
+            "eval_s": f"{result['eval_s']:.2f}", "best": int(is_best),
+        }
+        new_file = not self.leaderboard.exists()
+        with self.leaderboard.open("a", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDS)
+            if new_file:
+                w.writeheader()
+            w.writerow(row)
+
+        if is_best:
+            os.replace(model_zip, self.out_dir / BEST_MODEL)
+            os.replace(actor, self.out_dir / BEST_ACTOR)
+            self.best = {"checkpoint": name, "steps": steps, "metric": self.metric, "value": value,
+                         "seed": self.cfg.random_seed, "summary": s}
+            tmp = self.out_dir / f".{BEST_JSON}.tmp"
+            tmp.write_text(json.dumps(self.best, indent=2), encoding="utf-8")
+            os.replace(tmp, self.out_dir / BEST_JSON)
+        else:
+            model_zip.unlink(missing_ok=True)
+            actor.unlink(missing_ok=True)
+        print(f"[watch] {name} ({steps} pasos): return medio {s['return']['mean']:.4f} "
+              f"[{s['return']['ci'][0]:.4f}, {s['return']['ci'][1]:.4f}], bankroll final medio "
+              f"{s['final_bankroll']['mean']:.2f}, ruina {s['ruin_rate']:.1%} ({result['eval_s']:.1f}s)"
+              + ("  <- mejor" if is_best else ""), flush=True)
+
+    def finished(self) -> bool:
+        # Entrenamiento terminado (done.json) y su último checkpoint ya visto y evaluado
+        done = self.ckpt_root / DONE
+        if self.pending or not done.exists():
+            return False
+        steps = json.loads(done.read_text(encoding="utf-8"))["steps"]
+        return f"ckpt_{steps:09d}" in self.seen or not any(self.ckpt_root.glob("ckpt_*"))
+
+    def run(self, poll: float = 2.0, parent_pid: int | None = None, once: bool = False) -> None:
+        try:
+            while True:
+                finished = self.finished()
+                self.discover()
+                self.collect()
+                if not self.pending and (finished or once or not _parent_alive(parent_pid)):
+                    break
+                time.sleep(poll)
+        finally:
+            self.pool.terminate()
+            self.pool.join()
+            for leftover in self.staging.glob("*"):
+                leftover.unlink(missing_ok=True)
+            self.staging.rmdir()
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser()
+    p.add_argument("--ckpt_dir", type=str, default="models/checkpoints")
+    p.add_argument("--out_dir", type=str, default=None, help="por defecto, el padre de --ckpt_dir")
+    p.add_argument("--episodes", type=int, default=2_000)
+    p.add_argument("--seed", type=int, default=20_240,
+                   help="semilla de las tiradas de evaluación (distinta de la de entrenamiento)")
+    p.add_argument("--metric", choices=list(METRICS), default="mean_return", help="criterio del mejor modelo")
+    p.add_argument("--initial_bankroll", type=float, default=100.0)
+    p.add_argument("--bet_fraction", type=float, default=0.10)
+    p.add_argument("--max_steps", type=int, default=2_000)
+    p.add_argument("--target_bankroll", type=float, default=200.0)
+    p.add_argument("--ruin_fraction", type=float, default=0.01)
+    p.add_argument("--workers", type=int, default=1, help="checkpoints evaluados a la vez")
+    p.add_argument("--chunk", type=int, default=4096, help="episodios por lote")
+    p.add_argument("--nice", type=int, default=10, help="prioridad de los evaluadores (0 = la misma)")
+    p.add_argument("--poll", type=float, default=2.0, help="segundos entre búsquedas de checkpoints")
+    p.add_argument("--parent_pid", type=int, default=None, help="termina si muere este proceso")
+    p.add_argument("--once", action="store_true", help="evalúa los checkpoints presentes y termina")
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    ckpt_root = Path(args.ckpt_dir)
+    out_dir = Path(args.out_dir) if args.out_dir else ckpt_root.parent
+    cfg = RouletteConfig(
+        initial_bankroll=args.initial_bankroll,
+        bet_fraction=args.bet_fraction,
+        max_steps=args.max_steps,
+        target_bankroll=args.target_bankroll,
+        random_seed=args.seed,
+        use_wheel_layout=True,
+        counter_spins=True,
+    )
+    watcher = CheckpointWatcher(ckpt_root, out_dir, cfg, args.episodes, metric=args.metric,
+                                workers=args.workers, chunk=args.chunk, nice=args.nice,
+                                ruin_fraction=args.ruin_fraction)
+    print(f"[watch] Vigilando {ckpt_root} ({args.episodes} episodios, semilla {args.seed}) -> "
+          f"{watcher.leaderboard}", flush=True)
+    watcher.run(poll=args.poll, parent_pid=args.parent_pid, once=args.once)
+    if watcher.best is not None:
+        print(f"[OK] {watcher.evaluated} checkpoints evaluados; mejor: {watcher.best['checkpoint']} "
+              f"({args.metric} = {watcher.best['value']:.4f}) -> {out_dir / BEST_MODEL}")
+    return watcher.best
+
+if __name__ == "__main__":
+    main()
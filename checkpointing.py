@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# Checkpoints periódicos sin bloquear el entrenamiento: modelo + optimizadores + replay buffer.
+#
+# En el hilo de entrenamiento sólo se copia el estado (tensores clonados y las filas ocupadas del
+# replay buffer); la serialización, la compresión y la escritura a disco se hacen en un hilo de
+# fondo. Cada checkpoint es un directorio
+#   checkpoints/ckpt_000050000/  model.zip (formato SB3, incluye optimizadores y log_ent_coef)
+#                                replay.npz (arrays del buffer + pos/full)
+#                                meta.json
+# y checkpoints/latest.json apunta al último completo (se escribe al final, con os.replace).
+from __future__ import annotations
+import copy
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.save_util import save_to_zip_file
+from stable_baselines3.common.utils import get_device
+
+LATEST = "latest.json"
+
+def snapshot_model(model) -> dict:
+    # Copia de lo que guarda model.save(), desacoplada del modelo que sigue entrenando
+    data = model.__dict__.copy()
+    exclude = set(model._excluded_save_params())
+    state_dicts_names, torch_variable_names = model._get_torch_save_params()
+    for name in state_dicts_names + torch_variable_names:
+        exclude.add(name.split(".")[0])
+    for name in exclude:
+        data.pop(name, None)
+    variables = {}
+    for name in torch_variable_names:
+        obj = model
+        for part in name.split("."):
+            obj = getattr(obj, part)
+        variables[name] = obj.detach().clone()
+    return {
+        "data": copy.deepcopy(data),
+        "params": copy.deepcopy(model.get_parameters()),
+        "variables": variables,
+    }
+
+def snapshot_buffer(buffer) -> dict:
+    # Filas ocupadas de cada array del buffer (vale para cualquier buffer basado en arrays NumPy)
+    size = buffer.buffer_size if buffer.full else buffer.pos
+    arrays = {name: value[:size].copy() for name, value in vars(buffer).items()
+              if isinstance(value, np.ndarray) and value.shape[:1] == (buffer.buffer_size,)}
+    return {"arrays": arrays, "pos": int(buffer.pos), "full": bool(buffer.full)}
+
+def restore_buffer(buffer, path: str | Path) -> None:
+    with np.load(path) as z:
+        for name in z.files:
+            if name.startswith("_"):
+                continue
+            rows = z[name]
+            target = getattr(buffer, name)
+            if target.shape[1:] != rows.shape[1:]:
+                raise ValueError(f"Replay buffer incompatible en {name}: {rows.shape} vs {target.shape}")
+            target[:rows.shape[0]] = rows
+        buffer.pos = int(z["_pos"])
+        buffer.full = bool(z["_full"])
+
+def latest_checkpoint(root: str | Path) -> Path | None:
+    path = Path(root) / LATEST
+    if not path.exists():
+        return None
+    ckpt = Path(root) / json.loads(path.read_text(encoding="utf-8"))["dir"]
+    return ckpt if ckpt.exists() else None
+
+class AsyncCheckpointer:
+    def __init__(self, root: str | Path, keep: int = 2, compress: bool = True):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.keep = int(keep)
+        self.compress = compress
+        self._queue: queue.Queue = queue.Queue(maxsize=1)
+        self._idle = threading.Event()
+        self._idle.set()
+        self.error: BaseException | None = None
+        self.written: list[Path] = sorted(p for p in self.root.glob("ckpt_*") if p.is_dir())
+        self._thread = threading.Thread(target=self._worker, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self) -> bool:
+        return not self._idle.is_set()
+
+    def submit(self, model, extra: dict | None = None) -> bool:
+        # Copia el estado y lo encola; devuelve False (sin copiar) si aún se escribe el anterior
+        if self.error is not None:
+            raise RuntimeError("Falló el último checkpoint") from self.error
+        if self.busy:
+            return False
+        self._idle.clear()
+        snap = {
+            "steps": int(model.num_timesteps),
+            "model": snapshot_model(model),
+            "buffer": snapshot_buffer(model.replay_buffer) if getattr(model, "replay_buffer", None) else None,
+            "extra": extra or {},
+        }
+        self._queue.put(snap)
+        return True
+
+    def wait(self) -> None:
+        self._idle.wait()
+        if self.error is not None:
+            raise RuntimeError("Falló el último checkpoint") from self.error
+
+    def close(self) -> None:
+        self.wait()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _worker(self) -> None:
+        while True:
+            snap = self._queue.get()
+            if snap is None:
+                return
+            try:
+                self._write(snap)
+            except BaseException as exc:  # se relanza en el hilo de entrenamiento
+                self.error = exc
+            finally:
+                self._idle.set()
+
+    def _write(self, snap: dict) -> None:
+        t0 = time.perf_counter()
+        name = f"ckpt_{snap['steps']:09d}"
+        final = self.root / name
+        tmp = self.root / f".{name}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        m = snap["model"]
+        save_to_zip_file(tmp / "model.zip", data=m["data"], params=m["params"], pytorch_variables=m["variables"])
+        if snap["buffer"] is not None:
+            b = snap["buffer"]
+            save = np.savez_compressed if self.compress else np.savez
+            save(tmp / "replay.npz", _pos=b["pos"], _full=b["full"], **b["arrays"])
+        meta = {"steps": snap["steps"], "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "write_s": round(time.perf_counter() - t0, 3), **snap["extra"]}
+        (tmp / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+        latest_tmp = self.root / f".{LATEST}.tmp"
+        latest_tmp.write_text(json.dumps({"dir": name, "steps": snap["steps"]}), encoding="utf-8")
+        os.replace(latest_tmp, self.root / LATEST)
+
+        if final in self.written:
+            self.written.remove(final)
+        self.written.append(final)
+        while len(self.written) > self.keep:
+            shutil.rmtree(self.written.pop(0), ignore_errors=True)
+
+class AsyncCheckpointCallback(BaseCallback):
+    # Checkpoint cada `save_every` pasos; si el anterior sigue escribiéndose se reintenta en el
+    # siguiente paso en lugar de esperar. Al terminar se guarda uno final y se espera al hilo.
+    def __init__(self, checkpointer: AsyncCheckpointer, save_every: int, extra: dict | None = None,
+                 verbose: int = 1):
+        super().__init__(verbose)
+        self.checkpointer = checkpointer
+        self.save_every = int(save_every)
+        self.extra = extra or {}
+        self._next = 0
+
+    def _on_training_start(self) -> None:
+        self._next = (self.num_timesteps // self.save_every + 1) * self.save_every
+
+    def _on_step(self) -> bool:
+        if self.num_timesteps >= self._next and self.checkpointer.submit(self.model, self.extra):
+            if self.verbose:
+                print(f"[ckpt] checkpoint en {self.num_timesteps} pasos (escritura en segundo plano)")
+            self._next = (self.num_timesteps // self.save_every + 1) * self.save_every
+        return True
+
+    def _on_training_end(self) -> None:
+        self.checkpointer.wait()
+        self.checkpointer.submit(self.model, self.extra)
+        self.checkpointer.wait()
+        if self.verbose and self.checkpointer.written:
+            print(f"[OK] Checkpoint final -> {self.checkpointer.written[-1]}")
+
+def load_checkpoint(algo_cls, ckpt_dir: str | Path, env, device="auto"):
+    # Modelo + optimizadores + replay buffer de un checkpoint; el entorno se reinicia al seguir
+    ckpt_dir = Path(ckpt_dir)
+    model = algo_cls.load(str(ckpt_dir / "model.zip"), env=env, device=get_device(device))
+    replay = ckpt_dir / "replay.npz"
+    if replay.exists() and getattr(model, "replay_buffer", None) is not None:
+        restore_buffer(model.replay_buffer, replay)
+    # Los episodios en curso no se guardan: se fuerza un reset del VecEnv en el siguiente learn()
+    model._last_obs = None
+    return model
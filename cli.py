@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# CLI única: train / sweep / watch / eval / play / serve / loadtest / simulate / solve / report / bench.
+#
+# Este módulo sólo importa la librería estándar; cada subcomando importa su módulo (y con él
+# torch, SB3, gymnasium o pygame) al ejecutarse, así que `--help` o un `simulate` corto no pagan
+# el arranque de torch. Los argumentos tras el subcomando se pasan tal cual a su parser:
+#   python cli.py train --timesteps 200000 --n_envs 8
+#   python cli.py sweep --grid seed=1,2,3 --set timesteps=100000 --workers 3
+#   python cli.py watch --ckpt_dir models/checkpoints --episodes 2000
+#   python cli.py eval --model models/sac_roulette_actor.npz --episodes 1000 --batched
+#   python cli.py simulate --strategy kelly --paths 100000
+#   python cli.py solve --bet_fraction 0.1 --target_bankroll 200 --out models/dp_policy.npz
+#   python cli.py report --csv eval_large_bankroll.csv --trace traces/eval
+#   python cli.py play [--connect 127.0.0.1:8765]
+#   python cli.py serve --port 8765 --seats 7
+#   python cli.py loadtest --players 2000 --procs 2 --duration 30
+#   python cli.py bench --only env,physics --baseline benchmark_baseline.json
+from __future__ import annotations
+import argparse
+import importlib
+import sys
+
+# subcomando -> (módulo con main(argv), descripción)
+COMMANDS = {
+    "train": ("train_sac", "entrena el agente SAC (stable-baselines3 + torch)"),
+    "sweep": ("sweep", "barrido de hiperparámetros/semillas en paralelo con parada por la mediana"),
+    "watch": ("checkpoint_watcher", "evalúa cada checkpoint en segundo plano: leaderboard y mejor modelo"),
+    "eval": ("evaluate_policy", "evalúa un modelo .zip o un actor NumPy .npz"),
+    "play": ("main", "ruleta interactiva con pygame (local o contra un servidor de mesas)"),
+    "serve": ("table_server", "servidor de mesas multijugador (asyncio, JSON por líneas)"),
+    "loadtest": ("load_test", "prueba de carga del servidor con miles de bots"),
+    "simulate": ("simulate_strategies", "Monte Carlo de estrategias clásicas (sólo NumPy)"),
+    "solve": ("dp_solver", "política óptima exacta por programación dinámica (sólo NumPy)"),
+    "report": ("report", "informe PNG/HTML de CSV de episodios y trazas en result_examples/"),
+    "bench": ("benchmark", "banco de pruebas de rendimiento y comparación con la referencia"),
+}
+
+def build_parser() -> argparse.ArgumentParser:
+    listing = "\n".join(f"  {name:<10}{desc}" for name, (_, desc) in COMMANDS.items())
+    p = argparse.ArgumentParser(
+        prog="cli.py",
+        description=f"Ruleta europea: entrenamiento, barridos, evaluación, juego, servidor de mesas, simulación, solver, informes y benchmarks\n\n"
+                    f"subcomandos:\n{listing}",
+        epilog="Ayuda de cada subcomando: cli.py <subcomando> --help",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    p.add_argument("command", choices=list(COMMANDS), metavar="subcomando")
+    return p
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in COMMANDS:
+        build_parser().parse_args(argv[:1])  # ayuda o error de argparse
+        return None
+    module_name, _ = COMMANDS[argv[0]]
+    module = importlib.import_module(module_name)
+    return module.main(argv[1:])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# Replay buffer compacto para RouletteEnv / RouletteVecEnv.
+#
+# La observación es [bankroll_norm, 7 one-hots del último número]: se guarda el bankroll como
+# float32 y los one-hots empaquetados en un uint8 (bit k = one-hot k), que se decodifican con
+# una tabla de 128 filas sólo al muestrear. Acciones en float32 o, opcionalmente, float16;
+# dones/timeouts como bool. Por transición (10 opciones):
+#   ReplayBuffer de SB3:   8·4 (obs) + 8·4 (next_obs) + 10·4 + 4 + 4 + 4  = 116 bytes
+#   CompactReplayBuffer:   (4+1) + (4+1) + 10·4 (ó 10·2) + 4 + 1 + 1       =  56 (36) bytes
+# El muestreo devuelve ReplayBufferSamples idénticos a los de ReplayBuffer (salvo el redondeo
+# de las acciones en float16), así que SAC no nota la diferencia.
+#   SAC(..., replay_buffer_class=CompactReplayBuffer, replay_buffer_kwargs={"action_dtype": "float16"})
+from __future__ import annotations
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.buffers import BaseBuffer, ReplayBuffer
+from stable_baselines3.common.type_aliases import ReplayBufferSamples
+
+N_ONEHOTS = 7
+_BITS = np.arange(N_ONEHOTS, dtype=np.uint8)
+# Fila c = los 7 one-hots codificados en el entero c
+DECODE_TABLE = ((np.arange(1 << N_ONEHOTS)[:, None] >> _BITS) & 1).astype(np.float32)
+
+def encode_onehots(onehots: np.ndarray) -> np.ndarray:
+    # (..., 7) en {0, 1} -> (...,) uint8
+    return ((np.asarray(onehots) > 0.5).astype(np.uint8) << _BITS).sum(axis=-1, dtype=np.uint8)
+
+def decode_obs(bankroll: np.ndarray, code: np.ndarray) -> np.ndarray:
+    # bankroll (B,) + códigos uint8 (B,) -> observaciones (B, 8) en float32
+    obs = np.empty((bankroll.shape[0], 1 + N_ONEHOTS), dtype=np.float32)
+    obs[:, 0] = bankroll
+    obs[:, 1:] = DECODE_TABLE[code]
+    return obs
+
+class CompactReplayBuffer(ReplayBuffer):
+    def __init__(self, buffer_size: int, observation_space: spaces.Space, action_space: spaces.Space,
+                 device="auto", n_envs: int = 1, optimize_memory_usage: bool = False,
+                 handle_timeout_termination: bool = True, action_dtype: str = "float32"):
+        if not isinstance(observation_space, spaces.Box) or observation_space.shape != (1 + N_ONEHOTS,):
+            raise ValueError(f"CompactReplayBuffer espera la observación de RouletteEnv (8,), no {observation_space}")
+        if optimize_memory_usage:
+            raise ValueError("CompactReplayBuffer no admite optimize_memory_usage")
+        # Sin ReplayBuffer.__init__: reservaría los arrays completos que queremos evitar
+        BaseBuffer.__init__(self, buffer_size, observation_space, action_space, device, n_envs=n_envs)
+        self.buffer_size = max(buffer_size // n_envs, 1)
+        self.optimize_memory_usage = False
+        self.handle_timeout_termination = handle_timeout_termination
+
+        shape = (self.buffer_size, self.n_envs)
+        self.bankroll = np.zeros(shape, dtype=np.float32)
+        self.last_code = np.zeros(shape, dtype=np.uint8)
+        self.next_bankroll = np.zeros(shape, dtype=np.float32)
+        self.next_code = np.zeros(shape, dtype=np.uint8)
+        self.actions = np.zeros(shape + (self.action_dim,), dtype=np.dtype(action_dtype))
+        self.rewards = np.zeros(shape, dtype=np.float32)
+        self.dones = np.zeros(shape, dtype=bool)
+        self.timeouts = np.zeros(shape, dtype=bool)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.bankroll, self.last_code, self.next_bankroll, self.next_code,
+                                      self.actions, self.rewards, self.dones, self.timeouts))
+
+    @staticmethod
+    def full_nbytes(buffer_size: int, action_dim: int, obs_dim: int = 1 + N_ONEHOTS) -> int:
+        # Lo que ocuparía el ReplayBuffer de SB3 con el mismo tamaño (referencia para los logs)
+        return buffer_size * (2 * obs_dim * 4 + action_dim * 4 + 3 * 4)
+
+    def add(self, obs, next_obs, action, reward, done, infos) -> None:
+        obs = np.asarray(obs).reshape(self.n_envs, -1)
+        next_obs = np.asarray(next_obs).reshape(self.n_envs, -1)
+        self.bankroll[self.pos] = obs[:, 0]
+        self.last_code[self.pos] = encode_onehots(obs[:, 1:])
+        self.next_bankroll[self.pos] = next_obs[:, 0]
+        self.next_code[self.pos] = encode_onehots(next_obs[:, 1:])
+        self.actions[self.pos] = np.asarray(action).reshape(self.n_envs, self.action_dim)
+        self.rewards[self.pos] = reward
+        self.dones[self.pos] = done
+        if self.handle_timeout_termination:
+            self.timeouts[self.pos] = [info.get("TimeLimit.truncated", False) for info in infos]
+
+        self.pos += 1
+        if self.pos == self.buffer_size:
+            self.full = True
+            self.pos = 0
+
+    def _get_samples(self, batch_inds: np.ndarray, env=None) -> ReplayBufferSamples:
+        env_indices = np.random.randint(0, high=self.n_envs, size=(len(batch_inds),))
+        obs = decode_obs(self.bankroll[batch_inds, env_indices], self.last_code[batch_inds, env_indices])
+        next_obs = decode_obs(self.next_bankroll[batch_inds, env_indices], self.next_code[batch_inds, env_indices])
+        dones = self.dones[batch_inds, env_indices] & ~self.timeouts[batch_inds, env_indices]
+        data = (
+            self._normalize_obs(obs, env),
+            self.actions[batch_inds, env_indices].astype(np.float32),
+            self._normalize_obs(next_obs, env),
+            dones.astype(np.float32).reshape(-1, 1),
+            self._normalize_reward(self.rewards[batch_inds, env_indices].reshape(-1, 1), env),
+        )
+        return ReplayBufferSamples(*tuple(map(self.to_torch, data)))
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# Curriculum / aleatorización de regímenes de mesa durante el entrenamiento.
+#
+# Cada etapa asigna a cada mesa del VecEnv sus parámetros (roulette_config.TABLE_PARAMS) y
+# cambia en caliente: RouletteVecEnv.set_params() en el backend nativo y env_method("set_params")
+# en dummy/subproc, sin reconstruir entornos ni procesos. Cada mesa aplica los valores nuevos
+# al empezar su siguiente episodio.
+#   {"stages": [
+#      {"until": 0.3, "params": {"bet_fraction": 0.05}},
+#      {"until": 0.7, "params": {"bet_fraction": [0.05, 0.1, 0.2]}},
+#      {"params": {"bet_fraction": {"uniform": [0.02, 0.3]},
+#                  "initial_bankroll": {"loguniform": [100, 1000000]}, "target_multiple": 2.0}}],
+#    "resample_every": 10000, "seed": 0}
+# Valores: escalar (todas las mesas), lista (la mesa i toma lista[i % len], regímenes fijos) o
+# distribución choice/uniform/loguniform/int (una muestra por mesa; se vuelve a muestrear cada
+# `resample_every` pasos). `until` <= 1 es fracción de los pasos totales; > 1, pasos absolutos.
+# `target_multiple` fija target_bankroll = multiple · initial_bankroll de cada mesa.
+from __future__ import annotations
+import json
+from pathlib import Path
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+
+from roulette_config import TABLE_PARAMS
+from roulette_vec_env import RouletteVecEnv
+
+DERIVED_PARAMS = ("target_multiple",)
+
+def load_spec(text: str) -> dict:
+    # JSON en línea o ruta a un fichero JSON
+    text = text.strip()
+    spec = json.loads(text) if text.startswith("{") else json.loads(Path(text).read_text(encoding="utf-8"))
+    for stage in spec.get("stages", []):
+        unknown = set(stage.get("params", {})) - set(TABLE_PARAMS) - set(DERIVED_PARAMS)
+        if unknown:
+            raise ValueError(f"Parámetros de curriculum desconocidos: {', '.join(sorted(unknown))}")
+    if not spec.get("stages"):
+        raise ValueError("El curriculum necesita al menos una etapa en 'stages'")
+    return spec
+
+def sample_values(value, n: int, rng: np.random.Generator) -> np.ndarray:
+    # Un valor por mesa a partir de un escalar, una lista cíclica o una distribución
+    if isinstance(value, dict):
+        (kind, arg), = value.items()
+        if kind == "choice":
+            return np.asarray(arg)[rng.integers(len(arg), size=n)]
+        if kind == "uniform":
+            return rng.uniform(arg[0], arg[1], size=n)
+        if kind == "loguniform":
+            return np.exp(rng.uniform(np.log(arg[0]), np.log(arg[1]), size=n))
+        if kind == "int":
+            return rng.integers(arg[0], arg[1] + 1, size=n)
+        raise ValueError(f"Distribución desconocida: {kind!r} (choice, uniform, loguniform, int)")
+    if isinstance(value, (list, tuple)):
+        return np.resize(np.asarray(value), n)
+    return np.full(n, value)
+
+class CurriculumScheduler:
+    def __init__(self, spec: dict, n_envs: int, total_timesteps: int):
+        self.stages = list(spec["stages"])
+        self.n_envs = int(n_envs)
+        self.resample_every = int(spec.get("resample_every", 0))
+        self.rng = np.random.default_rng(spec.get("seed"))
+        self.bounds = []
+        for stage in self.stages:
+            until = stage.get("until")
+            if until is None:
+                self.bounds.append(np.inf)
+            else:
+                self.bounds.append(float(until) * total_timesteps if float(until) <= 1 else float(until))
+
+    def stage_at(self, steps: int) -> int:
+        return min(int(np.searchsorted(self.bounds, steps, side="right")), len(self.stages) - 1)
+
+    def params(self, stage: int) -> dict[str, np.ndarray]:
+        out = {name: sample_values(v, self.n_envs, self.rng) for name, v in self.stages[stage]["params"].items()}
+        multiple = out.pop("target_multiple", None)
+        if multiple is not None:
+            if "initial_bankroll" not in out:
+                raise ValueError("target_multiple necesita initial_bankroll en la misma etapa")
+            out["target_bankroll"] = multiple * out["initial_bankroll"]
+        if "max_steps" in out:
+            out["max_steps"] = out["max_steps"].astype(np.int64)
+        return out
+
+    def is_random(self, stage: int) -> bool:
+        return any(isinstance(v, dict) for v in self.stages[stage]["params"].values())
+
+def apply_params(venv, params: dict[str, np.ndarray]) -> None:
+    # Vectorizado en el VecEnv nativo; en dummy/subproc, una llamada por sub-entorno
+    base = venv.unwrapped
+    if isinstance(base, RouletteVecEnv):
+        base.set_params(**params)
+        return
+    for i in range(venv.num_envs):
+        venv.env_method("set_params", indices=i, **{k: v[i].item() for k, v in params.items()})
+
+class CurriculumCallback(BaseCallback):
+    def __init__(self, scheduler: CurriculumScheduler, verbose: int = 1):
+        super().__init__(verbose)
+        self.scheduler = scheduler
+        self.stage = -1
+        self._last_sample = 0
+
+    def prime(self, venv, steps: int = 0) -> None:
+        # Aplica la etapa inicial antes de learn(), que hace el primer reset del VecEnv: así
+        # los primeros episodios ya usan sus parámetros. Con --resume, steps = pasos ya hechos.
+        self._apply(self.scheduler.stage_at(steps), venv, steps)
+
+    def _apply(self, stage: int, venv=None, steps: int | None = None) -> None:
+        steps = self.num_timesteps if steps is None else steps
+        params = self.scheduler.params(stage)
+        apply_params(venv if venv is not None else self.training_env, params)
+        self._last_sample = steps
+        if stage != self.stage and self.verbose:
+            desc = ", ".join(f"{k}={np.min(v):g}..{np.max(v):g}" for k, v in params.items())
+            print(f"[curriculum] etapa {stage} en {steps} pasos: {desc}")
+        self.stage = stage
+        if venv is None:  # dentro de learn(): el logger ya existe
+            self.logger.record("curriculum/stage", stage)
+            for name, values in params.items():
+                self.logger.record(f"curriculum/{name}_mean", float(np.mean(values)))
+
+    def _on_training_start(self) -> None:
+        if self.stage < 0:
+            self._apply(self.scheduler.stage_at(self.num_timesteps))
+
+    def _on_step(self) -> bool:
+        stage = self.scheduler.stage_at(self.num_timesteps)
+        every = self.scheduler.resample_every
+        if stage != self.stage or (every > 0 and self.scheduler.is_random(stage)
+                                   and self.num_timesteps - self._last_sample >= every):
+            self._apply(stage)
+        return True
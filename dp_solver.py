@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# Solver exacto (programación dinámica) de la política que maximiza P(llegar a target_bankroll).
+#
+# En RouletteEnv el estado relevante es (bankroll, pasos restantes): last_n no cambia las
+# probabilidades. Cada paso se apuesta bet_fraction·b repartido según los pesos w del menú, así que
+#   b' = b · g(n),   g(n) = 1 + bet_fraction · (w · PAYOUTS[n] - 1),   n uniforme en 0..36
+# y en log(b) la transición es un desplazamiento que no depende de b. Con una rejilla uniforme en
+# log(b) entre un suelo y target_bankroll, cada iteración es una interpolación por multiplicador
+# distinto más un producto de matrices (acciones × multiplicadores):
+#   V_t(b) = max_w  E_n[ V_{t-1}(b · g(n)) ],   V = 1 si b >= target, 0 bajo el suelo / bancarrota
+# Acciones: pesos sobre el menú en una rejilla del símplex (múltiplos de 1/resolution), sin
+# duplicados (dos acciones son iguales si dan la misma distribución de g). Si V deja de cambiar
+# antes de max_steps la política es estacionaria y no se guardan más filas.
+#   python dp_solver.py --bet_fraction 0.1 --initial_bankroll 100 --target_bankroll 200 \
+#       --out models/dp_policy.npz --check_episodes 20000
+from __future__ import annotations
+import argparse
+import itertools
+import time
+from pathlib import Path
+import numpy as np
+
+from payouts import payout_matrix
+from roulette_config import OPTION_NAMES, RouletteConfig
+
+LOGIT_FLOOR = -10.0  # logit de las opciones con peso 0 (RouletteEnv recorta en ±10)
+
+def action_set(n_options: int, resolution: int) -> np.ndarray:
+    # Todas las composiciones de `resolution` unidades entre las opciones -> pesos (A, n_options)
+    combos = itertools.combinations_with_replacement(range(n_options), resolution)
+    return np.array([np.bincount(c, minlength=n_options) for c in combos], dtype=np.float64) / resolution
+
+def unique_actions(weights: np.ndarray, payouts: np.ndarray, bet_fraction: float):
+    # Se queda con una acción por distribución de multiplicadores (los 37 bolsillos son equiprobables)
+    growth = 1.0 + bet_fraction * (weights @ payouts.T - 1.0)          # (A, 37)
+    keys = np.round(np.sort(growth, axis=1), 12)
+    _, first = np.unique(keys, axis=0, return_index=True)
+    first = np.sort(first)
+    return weights[first], growth[first]
+
+def solve(cfg: RouletteConfig, grid_size: int = 2048, floor: float = 1e-6, resolution: int = 4,
+          tol: float = 1e-12, verbose: bool = True) -> dict:
+    t0 = time.perf_counter()
+    payouts = payout_matrix(cfg.bet_options)
+    weights, growth = unique_actions(action_set(payouts.shape[1], resolution), payouts, float(cfg.bet_fraction))
+
+    # Rejilla en log(b): el último punto es exactamente el objetivo
+    target = float(cfg.target_bankroll)
+    lo = max(float(cfg.bankrupt_threshold), floor * target)
+    x = np.linspace(np.log(lo), np.log(target), grid_size)
+    dx = x[1] - x[0]
+
+    # Multiplicadores distintos y su probabilidad bajo cada acción
+    g_vals, inverse = np.unique(np.round(growth, 12), return_inverse=True)
+    inverse = inverse.reshape(growth.shape)
+    probs = np.zeros((len(weights), len(g_vals)))
+    np.add.at(probs, (np.repeat(np.arange(len(weights)), growth.shape[1]), inverse.ravel()), 1.0 / growth.shape[1])
+    with np.errstate(divide="ignore"):
+        shifts = np.where(g_vals > 0, np.log(np.maximum(g_vals, 1e-300)) / dx, -np.inf)
+    idx = np.arange(grid_size, dtype=np.float64)
+
+    value = np.zeros(grid_size)
+    value[-1] = 1.0
+    policy = [np.zeros(grid_size, dtype=np.int16)]  # fila t = pasos restantes (t=0 no se usa)
+    shifted = np.empty((len(g_vals), grid_size))
+    converged_at = None
+    for t in range(1, int(cfg.max_steps) + 1):
+        for u, d in enumerate(shifts):
+            # Fuera por arriba = objetivo alcanzado (1); por abajo = suelo o bancarrota (0)
+            shifted[u] = 0.0 if np.isinf(d) else np.interp(idx + d, idx, value, left=0.0, right=1.0)
+        q = probs @ shifted
+        best = q.argmax(axis=0)
+        new_value = q[best, np.arange(grid_size)]
+        new_value[-1] = 1.0
+        if cfg.bankrupt_threshold > 0 and lo == cfg.bankrupt_threshold:
+            new_value[0] = 0.0
+        policy.append(best.astype(np.int16))
+        delta = float(np.abs(new_value - value).max())
+        value = new_value
+        if delta < tol:
+            converged_at = t
+            break
+
+    initial = float(cfg.initial_bankroll)
+    success = float(np.interp(np.log(initial), x, value, left=0.0, right=1.0))
+    elapsed = time.perf_counter() - t0
+    if verbose:
+        horizon = f"convergió en {converged_at} pasos" if converged_at else f"horizonte {cfg.max_steps} pasos"
+        print(f"[dp] {len(weights)} acciones distintas, {len(g_vals)} multiplicadores, "
+              f"rejilla {grid_size}, {horizon} ({elapsed:.2f}s)")
+    return {
+        "x0": float(x[0]), "dx": float(dx), "grid_size": grid_size,
+        "weights": weights.astype(np.float32),
+        "policy": np.stack(policy),
+        "value": value.astype(np.float32),
+        "success": success,
+        "converged_at": converged_at,
+        "elapsed_s": elapsed,
+        "initial_bankroll": initial,
+        "target_bankroll": target,
+        "bet_fraction": float(cfg.bet_fraction),
+        "max_steps": int(cfg.max_steps),
+    }
+
+def save_solution(sol: dict, path: str | Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, kind="dp_table", **{k: v for k, v in sol.items() if v is not None})
+    return path
+
+class TablePolicy:
+    # Política tabulada del solver con la interfaz predict() de SB3 / NumpyPolicy.
+    # Con bankroll (y pasos) reales hace la búsqueda exacta; sólo con la observación usa
+    # bankroll_norm · initial_bankroll, que la observación recorta en el bankroll inicial.
+    uses_bankroll = True
+
+    def __init__(self, path: str | Path):
+        with np.load(path) as z:
+            if "kind" not in z.files or str(z["kind"]) != "dp_table":
+                raise ValueError(f"{path} no es una política de dp_solver.py")
+            self.x0, self.dx = float(z["x0"]), float(z["dx"])
+            self.weights = z["weights"]
+            self.policy = z["policy"]
+            self.value = z["value"]
+            self.success = float(z["success"])
+            self.initial_bankroll = float(z["initial_bankroll"])
+            self.max_steps = int(z["max_steps"])
+        self.logits = np.log(np.maximum(self.weights, np.exp(LOGIT_FLOOR))).astype(np.float32)
+
+    def action_index(self, bankroll, steps=None) -> np.ndarray:
+        bankroll = np.atleast_1d(np.asarray(bankroll, dtype=np.float64))
+        last = self.policy.shape[0] - 1
+        if steps is None:
+            rows = np.full(bankroll.shape, last)
+        else:
+            rows = np.clip(self.max_steps - np.atleast_1d(np.asarray(steps)), 1, last)
+        cols = np.rint((np.log(np.maximum(bankroll, 1e-300)) - self.x0) / self.dx).astype(np.int64)
+        cols = np.clip(cols, 0, self.policy.shape[1] - 1)
+        return self.policy[rows, cols]
+
+    def predict(self, observation, state=None, episode_start=None, deterministic: bool = True,
+                bankroll=None, steps=None):
+        obs = np.asarray(observation, dtype=np.float32)
+        if bankroll is None:
+            bankroll = obs.reshape(-1, obs.shape[-1])[:, 0] * self.initial_bankroll
+        actions = self.logits[self.action_index(bankroll, steps)]
+        if obs.ndim == 1:
+            actions = actions[0]
+        return actions, None
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser()
+    p.add_argument("--initial_bankroll", type=float, default=100.0)
+    p.add_argument("--target_bankroll", type=float, default=200.0)
+    p.add_argument("--bet_fraction", type=float, default=0.10)
+    p.add_argument("--max_steps", type=int, default=2_000)
+    p.add_argument("--bankrupt_threshold", type=float, default=0.0)
+    p.add_argument("--grid", type=int, default=2048, help="puntos de la rejilla en log(bankroll)")
+    p.add_argument("--floor", type=float, default=1e-6,
+                   help="suelo de la rejilla como fracción del objetivo (por debajo, P(éxito) = 0)")
+    p.add_argument("--resolution", type=int, default=4, help="pesos en múltiplos de 1/resolution")
+    p.add_argument("--out", type=str, default="models/dp_policy.npz")
+    p.add_argument("--check_episodes", type=int, default=0,
+                   help="simula la política tabulada en RouletteVecEnv y compara con la P(éxito) calculada")
+    p.add_argument("--seed", type=int, default=123)
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    cfg = RouletteConfig(initial_bankroll=args.initial_bankroll, target_bankroll=args.target_bankroll,
+                         bet_fraction=args.bet_fraction, max_steps=args.max_steps,
+                         bankrupt_threshold=args.bankrupt_threshold, random_seed=args.seed,
+                         counter_spins=True, lean=True)
+    sol = solve(cfg, grid_size=args.grid, floor=args.floor, resolution=args.resolution)
+    out = save_solution(sol, args.out)
+    print(f"[OK] Política tabulada -> {out}")
+    print(f"P(éxito) óptima desde {args.initial_bankroll:g} hasta {args.target_bankroll:g}: {sol['success']:.6f}")
+
+    policy = TablePolicy(out)
+    w = policy.weights[policy.action_index(args.initial_bankroll, 0)[0]]
+    print("Apuesta óptima en el bankroll inicial: "
+          + ", ".join(f"{OPTION_NAMES[k]} {w[k]:.0%}" for k in np.flatnonzero(w)))
+
+    if args.check_episodes:
+        from evaluate_policy import run_episodes_batched
+        _, _, finals = run_episodes_batched(policy, cfg, args.check_episodes)
+        hits = float(np.mean(finals >= args.target_bankroll))
+        half = 1.96 * np.sqrt(hits * (1 - hits) / args.check_episodes)
+        print(f"Simulación ({args.check_episodes} episodios): P(éxito) = {hits:.4f} ± {half:.4f}")
+
+if __name__ == "__main__":
+    main()
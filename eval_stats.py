@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# Estadísticas incrementales y combinables para evaluaciones de millones de episodios.
+#
+# Memoria constante: nada guarda los valores individuales.
+#   RunningStats   -> media/varianza de Welford por lotes; merge() con la fórmula de Chan
+#   QuantileSketch -> cuantiles con error relativo acotado (cubos logarítmicos, estilo DDSketch)
+#   EvalStats      -> return, pasos y bankroll final + tasa de ruina y de objetivo alcanzado
+# Todas son serializables con pickle y se combinan con merge(), así que cada proceso acumula
+# sus episodios y el proceso principal sólo suma los resúmenes parciales.
+from __future__ import annotations
+import math
+import numpy as np
+
+Z_95 = 1.959963984540054
+
+class RunningStats:
+    __slots__ = ("n", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values) -> None:
+        x = np.asarray(values, dtype=np.float64).ravel()
+        if x.size == 0:
+            return
+        batch = RunningStats()
+        batch.n = int(x.size)
+        batch.mean = float(x.mean())
+        batch.m2 = float(((x - batch.mean) ** 2).sum())
+        batch.min = float(x.min())
+        batch.max = float(x.max())
+        self.merge(batch)
+
+    def merge(self, other: RunningStats) -> None:
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def var(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+    def ci(self, z: float = Z_95) -> tuple[float, float]:
+        # Intervalo normal para la media
+        half = z * self.std / math.sqrt(max(self.n, 1))
+        return self.mean - half, self.mean + half
+
+class QuantileSketch:
+    # |x| se asigna al cubo ceil(log_gamma |x|); el centro del cubo tiene error relativo <= rel_acc.
+    # Positivos y negativos en dos almacenes; |x| < min_value cuenta como cero.
+    def __init__(self, rel_acc: float = 0.005, min_value: float = 1e-9):
+        self.rel_acc = float(rel_acc)
+        self.gamma = (1.0 + self.rel_acc) / (1.0 - self.rel_acc)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = float(min_value)
+        self.pos: dict[int, int] = {}
+        self.neg: dict[int, int] = {}
+        self.zero = 0
+        self.n = 0
+
+    def _add_to(self, store: dict[int, int], mags: np.ndarray) -> None:
+        if mags.size == 0:
+            return
+        keys, counts = np.unique(np.ceil(np.log(mags) / self._log_gamma).astype(np.int64), return_counts=True)
+        for k, c in zip(keys.tolist(), counts.tolist()):
+            store[k] = store.get(k, 0) + c
+
+    def update(self, values) -> None:
+        x = np.asarray(values, dtype=np.float64).ravel()
+        if x.size == 0:
+            return
+        self.n += int(x.size)
+        big = np.abs(x) >= self.min_value
+        self.zero += int(x.size - big.sum())
+        self._add_to(self.pos, x[big & (x > 0)])
+        self._add_to(self.neg, -x[big & (x < 0)])
+
+    def merge(self, other: QuantileSketch) -> None:
+        if other.gamma != self.gamma:
+            raise ValueError("Sólo se combinan sketches con la misma precisión relativa")
+        for store, theirs in ((self.pos, other.pos), (self.neg, other.neg)):
+            for k, c in theirs.items():
+                store[k] = store.get(k, 0) + c
+        self.zero += other.zero
+        self.n += other.n
+
+    def _value(self, key: int) -> float:
+        return 2.0 * self.gamma ** key / (self.gamma + 1.0)
+
+    def quantiles(self, qs) -> list[float]:
+        if self.n == 0:
+            return [math.nan for _ in qs]
+        # Cubos en orden creciente de valor: negativos de mayor a menor magnitud, cero, positivos
+        neg_keys = sorted(self.neg, reverse=True)
+        pos_keys = sorted(self.pos)
+        values = [-self._value(k) for k in neg_keys] + [0.0] + [self._value(k) for k in pos_keys]
+        counts = np.cumsum([self.neg[k] for k in neg_keys] + [self.zero] + [self.pos[k] for k in pos_keys])
+        out = []
+        for q in qs:
+            rank = float(q) * (self.n - 1)
+            out.append(values[int(np.searchsorted(counts, rank, side="right"))])
+        return out
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+def wilson_interval(k: int, n: int, z: float = Z_95) -> tuple[float, float]:
+    # Intervalo de Wilson para una proporción (se comporta bien con tasas cercanas a 0 o 1)
+    if n == 0:
+        return 0.0, 1.0
+    p = k / n
+    denom = 1.0 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+class EvalStats:
+    QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+    # Ruina = bankroll final <= ruin_bankroll. Con apuestas proporcionales el bankroll nunca
+    # llega exactamente a 0, así que conviene un umbral (p. ej. 1% del inicial).
+    def __init__(self, initial_bankroll: float, ruin_bankroll: float = 0.0,
+                 target_bankroll: float | None = None, rel_acc: float = 0.005):
+        self.initial_bankroll = float(initial_bankroll)
+        self.ruin_bankroll = float(ruin_bankroll)
+        self.target_bankroll = None if target_bankroll is None else float(target_bankroll)
+        self.returns = RunningStats()
+        self.lengths = RunningStats()
+        self.finals = RunningStats()
+        self.final_q = QuantileSketch(rel_acc)
+        self.return_q = QuantileSketch(rel_acc)
+        self.ruined = 0
+        self.reached = 0
+
+    @property
+    def n(self) -> int:
+        return self.finals.n
+
+    def update(self, returns, lengths, finals) -> None:
+        finals = np.asarray(finals, dtype=np.float64)
+        self.returns.update(returns)
+        self.lengths.update(lengths)
+        self.finals.update(finals)
+        self.final_q.update(finals)
+        self.return_q.update(returns)
+        self.ruined += int((finals <= self.ruin_bankroll).sum())
+        if self.target_bankroll is not None:
+            self.reached += int((finals >= self.target_bankroll).sum())
+
+    def merge(self, other: EvalStats) -> None:
+        self.returns.merge(other.returns)
+        self.lengths.merge(other.lengths)
+        self.finals.merge(other.finals)
+        self.final_q.merge(other.final_q)
+        self.return_q.merge(other.return_q)
+        self.ruined += other.ruined
+        self.reached += other.reached
+
+    def summary(self, z: float = Z_95) -> dict:
+        def block(s: RunningStats) -> dict:
+            lo, hi = s.ci(z)
+            return {"mean": s.mean, "std": s.std, "min": s.min, "max": s.max, "ci": [lo, hi]}
+        out = {
+            "episodes": self.n,
+            "z": z,
+            "return": block(self.returns),
+            "steps": block(self.lengths),
+            "final_bankroll": block(self.finals),
+            "final_bankroll_quantiles": dict(zip((f"q{q:g}" for q in self.QUANTILES),
+                                                 self.final_q.quantiles(self.QUANTILES))),
+            "return_quantiles": dict(zip((f"q{q:g}" for q in self.QUANTILES),
+                                         self.return_q.quantiles(self.QUANTILES))),
+            "ruin_bankroll": self.ruin_bankroll,
+            "ruin_rate": self.ruined / max(self.n, 1),
+            "ruin_ci": list(wilson_interval(self.ruined, self.n, z)),
+        }
+        if self.target_bankroll is not None:
+            out["target_rate"] = self.reached / max(self.n, 1)
+            out["target_ci"] = list(wilson_interval(self.reached, self.n, z))
+        return out
+
+    def format(self, z: float = Z_95) -> str:
+        s = self.summary(z)
+        fb, ret = s["final_bankroll"], s["return"]
+        q = s["final_bankroll_quantiles"]
+        lines = [
+            f"Episodios: {s['episodes']}",
+            f"Return medio: {ret['mean']:.2f} ± {ret['std']:.2f}  (IC: {ret['ci'][0]:.2f} .. {ret['ci'][1]:.2f})",
+            f"Bankroll final medio: {fb['mean']:.2f}  (IC: {fb['ci'][0]:.2f} .. {fb['ci'][1]:.2f})",
+            f"Profit medio: {fb['mean'] - self.initial_bankroll:.2f}",
+            "Cuantiles bankroll final: " + "  ".join(f"{k}={v:,.2f}" for k, v in q.items()),
+            f"Pasos medios: {s['steps']['mean']:.1f}",
+            f"Tasa de ruina (<= {self.ruin_bankroll:,.2f}): {s['ruin_rate']*100:.3f}%  (IC: {s['ruin_ci'][0]*100:.3f}% .. {s['ruin_ci'][1]*100:.3f}%)",
+        ]
+        if "target_rate" in s:
+            lines.append(f"Objetivo alcanzado: {s['target_rate']*100:.3f}%  "
+                         f"(IC: {s['target_ci'][0]*100:.3f}% .. {s['target_ci'][1]*100:.3f}%)")
+        return "\n".join(lines)
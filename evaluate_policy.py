@@ -1,15 +1,140 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 import argparse
+import json
+import multiprocessing as mp
+import os
+import time
 from pathlib import Path
 import csv
 import numpy as np
-from stable_baselines3 import SAC
 
 from roulette_env_sb3 import RouletteEnv, RouletteConfig
+from roulette_config import BLAS_THREAD_VARS
+from trajectory_recorder import TrajectoryRecorder
+from numpy_policy import load_policy
+from eval_stats import EvalStats
+# SB3/torch sólo se importan si hacen falta: con un actor .npz y sin --profile la evaluación
+# (también --batched y --workers) funciona sin torch instalado.
+
+CSV_HEADER = "episode,initial_bankroll,final_bankroll,profit,steps\r\n"
+
+def run_episodes_batched(model, cfg: RouletteConfig, episodes: int, recorder=None,
+                         timings: Timings | None = None, first_episode: int = 0):
+    # Todos los episodios en paralelo (lockstep): un predict por paso sobre el lote de
+    # observaciones activas; los episodios terminados quedan enmascarados.
+    # first_episode desplaza los streams: el lote cubre los episodios first_episode..+episodes-1.
+    from roulette_vec_env import RouletteVecEnv
+    venv = RouletteVecEnv(cfg, n_envs=episodes, recorder=recorder)
+    obs = venv.reset()
+    returns = np.zeros(episodes, dtype=np.float64)
+    lengths = np.zeros(episodes, dtype=np.int64)
+    finals = np.full(episodes, float(cfg.initial_bankroll), dtype=np.float64)
+    active = np.ones(episodes, dtype=bool)
+    venv.record_mask = active  # sólo se graban los pasos de episodios en curso
+    # Mesa i = episodio i del env 0: con contador/cinta, mismas tiradas que el modo secuencial
+    venv.set_streams(seed=cfg.random_seed, env_ids=0, episodes=first_episode + np.arange(episodes))
+    actions = np.zeros((episodes,) + venv.action_space.shape, dtype=np.float32)
+    # Las políticas tabuladas (dp_solver.py) piden el bankroll real: la observación lo recorta
+    uses_bankroll = getattr(model, "uses_bankroll", False)
+    while active.any():
+        idx = np.flatnonzero(active)
+        t0 = time.perf_counter()
+        if uses_bankroll:
+            actions[idx], _ = model.predict(obs[idx], deterministic=True, bankroll=venv.bankroll[idx],
+                                            steps=venv.steps[idx])
+        else:
+            actions[idx], _ = model.predict(obs[idx], deterministic=True)
+        t1 = time.perf_counter()
+        obs, _, dones, infos = venv.step(actions)
+        if timings is not None:
+            timings.add("inference", t1 - t0)
+            timings.add("env", time.perf_counter() - t1)
+            timings.steps += idx.size
+        for i in idx[dones[idx]]:
+            returns[i] = infos[i]["episode"]["r"]
+            lengths[i] = infos[i]["episode"]["l"]
+            finals[i] = infos[i]["bankroll"]
+            active[i] = False
+    venv.close()
+    return returns, lengths, finals
+
+def format_rows(first_episode: int, initial: float, finals: np.ndarray, lengths: np.ndarray) -> str:
+    # Filas del CSV de un bloque de episodios (numeración desde 1), ya unidas en un solo str
+    return "".join(
+        f"{ep},{initial:.2f},{fin:.2f},{fin - initial:.2f},{steps}\r\n"
+        for ep, fin, steps in zip(range(first_episode + 1, first_episode + 1 + len(finals)),
+                                  finals.tolist(), lengths.tolist())
+    )
+
+# --------- evaluación por bloques en un pool de procesos ----------
+_WORKER: dict = {}
+
+def _init_worker(model_path: str, cfg: RouletteConfig, stats_kwargs: dict) -> None:
+    _WORKER["model"] = load_policy(model_path, device="cpu")
+    _WORKER["cfg"] = cfg
+    _WORKER["stats_kwargs"] = stats_kwargs
+
+def _eval_chunk(task: tuple[int, int]):
+    # Un bloque de episodios: filas CSV formateadas + estadísticas parciales (nada más cruza procesos)
+    start, count = task
+    cfg = _WORKER["cfg"]
+    returns, lengths, finals = run_episodes_batched(_WORKER["model"], cfg, count, first_episode=start)
+    stats = EvalStats(**_WORKER["stats_kwargs"])
+    stats.update(returns, lengths, finals)
+    return format_rows(start, float(cfg.initial_bankroll), finals, lengths), stats
+
+def evaluate_parallel(model_path: Path, cfg: RouletteConfig, episodes: int, out_csv: Path,
+                      stats: EvalStats, workers: int, chunk: int = 4096) -> EvalStats:
+    # Episodios repartidos en bloques de `chunk` entre `workers` procesos. Cada episodio tiene su
+    # stream Philox (seed, episodio), así que el resultado no depende de workers ni de chunk.
+    # Las filas se escriben en orden según llegan los bloques; la memoria no crece con `episodes`.
+    tasks = [(start, min(chunk, episodes - start)) for start in range(0, episodes, chunk)]
+    stats_kwargs = {"initial_bankroll": stats.initial_bankroll, "ruin_bankroll": stats.ruin_bankroll,
+                    "target_bankroll": stats.target_bankroll}
+    t0 = time.perf_counter()
+    report_every = max(len(tasks) // 20, 1)
+    with out_csv.open("w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        f.write(CSV_HEADER)
+        if workers <= 1:
+            _init_worker(str(model_path), cfg, stats_kwargs)
+            results = map(_eval_chunk, tasks)
+            pool = None
+        else:
+            # Un hilo de BLAS/torch por proceso: el paralelismo lo ponen los procesos (heredan el
+            # entorno al arrancar; después se restaura el del proceso principal)
+            saved = {var: os.environ.get(var) for var in BLAS_THREAD_VARS}
+            os.environ.update({var: "1" for var in BLAS_THREAD_VARS})
+            try:
+                pool = mp.get_context("spawn").Pool(workers, initializer=_init_worker,
+                                                    initargs=(str(model_path), cfg, stats_kwargs))
+            finally:
+                for var, value in saved.items():
+                    if value is None:
+                        os.environ.pop(var, None)
+                    else:
+                        os.environ[var] = value
+            results = pool.imap(_eval_chunk, tasks)
+        try:
+            for i, (text, part) in enumerate(results, 1):
+                f.write(text)
+                stats.merge(part)
+                if i % report_every == 0 or i == len(tasks):
+                    elapsed = time.perf_counter() - t0
+                    print(f"[eval] {stats.n}/{episodes} episodios  "
+                          f"({stats.n / max(elapsed, 1e-9):,.0f} ep/s, {elapsed:.1f}s)")
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+    return stats
 
 def evaluate(model_path: Path, bankroll: float, episodes: int, bet_fraction: float,
-             max_steps: int, target_bankroll: float, seed: int, out_csv: Path):
+             max_steps: int, target_bankroll: float, seed: int, out_csv: Path,
+             batched: bool = False, trace_dir: Path | None = None, trace_format: str = "npz",
+             counter_spins: bool = False, spin_tape: str | None = None, profile: Path | None = None,
+             workers: int = 0, chunk: int = 4096, ruin_fraction: float = 0.01,
+             summary_json: Path | None = None):
     cfg = RouletteConfig(
         initial_bankroll=bankroll,
         bet_fraction=bet_fraction,
@@ -17,46 +142,101 @@ def evaluate(model_path: Path, bankroll: float, episodes: int, bet_fraction: flo
         target_bankroll=target_bankroll,
         random_seed=seed,
         use_wheel_layout=True,
+        lean=True,
+        counter_spins=counter_spins,
+        spin_tape=spin_tape,
     )
 
-    env = RouletteEnv(cfg)
-    model = SAC.load(str(model_path))
+    stats = EvalStats(bankroll, ruin_bankroll=max(cfg.bankrupt_threshold, ruin_fraction * bankroll),
+                      target_bankroll=target_bankroll)
+    if workers > 0:
+        if not (cfg.counter_spins or cfg.spin_tape):
+            # Semillas por episodio: sin ellas el resultado dependería del reparto en bloques
+            cfg.counter_spins = True
+            print("[eval] --workers usa tiradas por contador (--counter_spins) para sembrar cada episodio")
+        evaluate_parallel(model_path, cfg, episodes, out_csv, stats, workers, chunk)
+        _report(stats, out_csv, summary_json)
+        return stats
+
+    # Traza paso a paso opcional en buffers columnares (ver trajectory_recorder.py)
+    recorder = None
+    if trace_dir is not None:
+        recorder = TrajectoryRecorder(trace_dir, n_options=len(cfg.bet_options), fmt=trace_format)
 
-    returns, lens, finals = [], [], []
+    env = RouletteEnv(cfg, recorder=recorder)
+    model = load_policy(model_path)
+    extra = {}
+    timings = None
+    if profile is not None:
+        from profiling import Timings
+        timings = Timings()
 
     with out_csv.open("w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         w.writerow(["episode", "initial_bankroll", "final_bankroll", "profit", "steps"])
-        for ep in range(1, episodes+1):
-            obs, _ = env.reset()
+        if batched:
+            # Mismas filas por episodio; las tiradas sólo coinciden con el modo secuencial
+            # con --counter_spins o --spin_tape
             ini = float(cfg.initial_bankroll)
-            done = False
-            ep_ret = 0.0
-            steps = 0
-            last_info = {"bankroll": ini}  # fallback por si el episodio termina en 0 pasos
-            while not done:
-                action, _ = model.predict(obs, deterministic=True)
-                obs, r, term, trunc, info = env.step(action)
-                last_info = info
-                ep_ret += float(r)
-                steps += 1
-                done = bool(term or trunc)
-            fin = float(last_info["bankroll"])
-            profit = fin - ini
-            returns.append(ep_ret)
-            lens.append(steps)
-            finals.append(fin)
-            w.writerow([ep, f"{ini:.2f}", f"{fin:.2f}", f"{profit:.2f}", steps])
+            returns, lens, finals = run_episodes_batched(model, cfg, episodes, recorder=recorder,
+                                                         timings=timings)
+            stats.update(returns, lens, finals)
+            t_io = time.perf_counter()
+            for ep, (fin, steps) in enumerate(zip(finals, lens), 1):
+                w.writerow([ep, f"{ini:.2f}", f"{fin:.2f}", f"{fin - ini:.2f}", int(steps)])
+            if timings is not None:
+                timings.add("io", time.perf_counter() - t_io)
+        else:
+            for ep in range(1, episodes+1):
+                obs, _ = env.reset()
+                ini = float(cfg.initial_bankroll)
+                done = False
+                ep_ret = 0.0
+                steps = 0
+                last_info = {"bankroll": ini}  # fallback por si el episodio termina en 0 pasos
+                while not done:
+                    t0 = time.perf_counter()
+                    if getattr(model, "uses_bankroll", False):
+                        extra = {"bankroll": env.bankroll, "steps": env.steps}
+                    action, _ = model.predict(obs, deterministic=True, **extra)
+                    t1 = time.perf_counter()
+                    obs, r, term, trunc, info = env.step(action)
+                    if timings is not None:
+                        timings.add("inference", t1 - t0)
+                        timings.add("env", time.perf_counter() - t1)
+                    last_info = info
+                    ep_ret += float(r)
+                    steps += 1
+                    done = bool(term or trunc)
+                fin = float(last_info["bankroll"])
+                profit = fin - ini
+                stats.update([ep_ret], [steps], [fin])
+                t_io = time.perf_counter()
+                w.writerow([ep, f"{ini:.2f}", f"{fin:.2f}", f"{profit:.2f}", steps])
+                if timings is not None:
+                    timings.add("io", time.perf_counter() - t_io)
+                    timings.steps += steps
 
+    if recorder is not None:
+        recorder.close()
+        print(f"[OK] Traza ({recorder.rows_written} pasos) -> {trace_dir}")
+    if timings is not None:
+        print(timings.format())
+        print(f"[OK] Perfil de tiempos -> {timings.export(profile)}")
+    _report(stats, out_csv, summary_json)
+    return stats
+
+def _report(stats: EvalStats, out_csv: Path, summary_json: Path | None) -> None:
     print(f"[OK] Evaluación -> {out_csv}")
-    print(f"Episodios: {episodes}")
-    print(f"Return medio: {np.mean(returns):.2f} ± {np.std(returns):.2f}")
-    print(f"Bankroll final medio: {np.mean(finals):.2f}")
-    print(f"Profit medio: {np.mean(np.array(finals) - bankroll):.2f}")
+    if summary_json is not None:
+        summary_json.write_text(json.dumps(stats.summary(), indent=2), encoding="utf-8")
+        print(f"[OK] Resumen -> {summary_json}")
+    print(stats.format())
 
-if __name__ == "__main__":
+def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser()
-    p.add_argument("--model", type=str, default="models/sac_roulette.zip")
+    p.add_argument("--model", type=str, default="models/sac_roulette.zip",
+                   help=".zip de SB3 o actor .npz exportado con numpy_policy.py")
     p.add_argument("--episodes", type=int, default=20)
     p.add_argument("--bankroll", type=float, default=1_000_000.0)
     p.add_argument("--bet_fraction", type=float, default=0.10)
@@ -64,7 +244,30 @@ if __name__ == "__main__":
     p.add_argument("--target_bankroll", type=float, default=2_000_000.0)
     p.add_argument("--seed", type=int, default=123)
     p.add_argument("--out_csv", type=str, default="eval_large_bankroll.csv")
-    args = p.parse_args()
+    p.add_argument("--batched", action="store_true",
+                   help="ejecuta todos los episodios en paralelo (un predict por paso)")
+    p.add_argument("--trace_dir", type=str, default=None,
+                   help="graba número, apuesta, ganancia, bankroll y pesos de cada paso")
+    p.add_argument("--trace_format", choices=("npz", "memmap"), default="npz")
+    p.add_argument("--counter_spins", action="store_true",
+                   help="tiradas Philox por (seed, episodio, paso): iguales en modo secuencial y en lote")
+    p.add_argument("--spin_tape", type=str, default=None, help="reproduce una cinta .npy de spin_source.py")
+    p.add_argument("--profile", type=str, default=None,
+                   help="exporta el desglose de tiempos (env/inference/io) a .csv o .jsonl (JSON por líneas)")
+    p.add_argument("--workers", type=int, default=0,
+                   help="reparte los episodios en bloques entre N procesos con estadísticas incrementales "
+                        "(memoria constante; 1 = por bloques en este proceso)")
+    p.add_argument("--chunk", type=int, default=4096, help="episodios por bloque con --workers")
+    p.add_argument("--ruin_fraction", type=float, default=0.01,
+                   help="ruina = bankroll final <= esta fracción del inicial")
+    p.add_argument("--summary_json", type=str, default=None, help="guarda el resumen estadístico en JSON")
+    return p
+
+def main(argv=None):
+    p = build_parser()
+    args = p.parse_args(argv)
+    if args.workers > 0 and (args.trace_dir or args.profile):
+        p.error("--trace_dir y --profile no están disponibles con --workers")
 
     evaluate(
         model_path=Path(args.model),
@@ -75,4 +278,17 @@ if __name__ == "__main__":
         target_bankroll=args.target_bankroll,
         seed=args.seed,
         out_csv=Path(args.out_csv),
+        batched=args.batched,
+        trace_dir=Path(args.trace_dir) if args.trace_dir else None,
+        trace_format=args.trace_format,
+        counter_spins=args.counter_spins,
+        spin_tape=args.spin_tape,
+        profile=Path(args.profile) if args.profile else None,
+        workers=args.workers,
+        chunk=args.chunk,
+        ruin_fraction=args.ruin_fraction,
+        summary_json=Path(args.summary_json) if args.summary_json else None,
     )
+
+if __name__ == "__main__":
+    main()
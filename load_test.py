@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# Prueba de carga de table_server.py: miles de jugadores simulados concurrentes.
+#
+# Cada bot se conecta, se sienta donde el servidor le deje y repite apuesta -> "spin" -> resultado
+# hasta --duration segundos (o --spins tiradas). Se miden:
+#   ida y vuelta   -> desde que envía "spin" hasta que recibe su "result" (incluye la ventana de
+#                     apuestas y la física: con --speed 1 en el servidor, ~15 s)
+#   entrega        -> recepción del "result" menos la marca "t" del tick en que se asentó la bola
+#                     (mismo reloj: servidor y bots en la misma máquina)
+# Los bots se reparten en --procs procesos (spawn), cada uno con su bucle asyncio; las latencias se
+# acumulan en QuantileSketch / RunningStats y el proceso principal las combina con merge().
+# Mientras juegan se muestrean las estadísticas del servidor (tick, CPU, mesas por núcleo).
+#   python table_server.py --speed 64 --report_every 5 &
+#   python load_test.py --players 2000 --procs 2 --duration 30
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import threading
+import time
+import numpy as np
+
+from eval_stats import QuantileSketch, RunningStats
+from table_server import raise_fd_limit
+
+# Apuestas de los bots: (tipo, argumento) del menú de payouts.py
+BOT_BETS = [("RED", None), ("BLACK", None), ("EVEN", None), ("ODD", None), ("LOW", None), ("HIGH", None),
+            ("DOZEN", 1), ("DOZEN", 2), ("DOZEN", 3), ("COLUMN", 1), ("COLUMN", 2), ("COLUMN", 3)]
+LATENCY_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+RESULT_TIMEOUT = 120.0  # s sin result (una tirada en tiempo real dura ~15 s)
+
+class BotStats:
+    def __init__(self):
+        self.round_trip = RunningStats()
+        self.round_trip_q = QuantileSketch(0.005)
+        self.delivery = RunningStats()
+        self.delivery_q = QuantileSketch(0.005)
+        self.spins = 0
+        self.players = 0
+        self.failed = 0
+        self.errors = 0
+        self.waits = 0
+        self.broke = 0
+
+    def merge(self, other: BotStats) -> None:
+        self.round_trip.merge(other.round_trip)
+        self.round_trip_q.merge(other.round_trip_q)
+        self.delivery.merge(other.delivery)
+        self.delivery_q.merge(other.delivery_q)
+        self.spins += other.spins
+        self.players += other.players
+        self.failed += other.failed
+        self.errors += other.errors
+        self.waits += other.waits
+        self.broke += other.broke
+
+async def _send(writer: asyncio.StreamWriter, obj) -> None:
+    writer.write((json.dumps(obj, separators=(",", ":")) + "\n").encode())
+    await writer.drain()
+
+async def _expect(reader: asyncio.StreamReader, events: tuple) -> dict:
+    # Siguiente mensaje de uno de los tipos `events` (salta frames y avisos de otros jugadores)
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("el servidor cerró la conexión")
+        msg = json.loads(line)
+        if msg.get("ev") in events:
+            return msg
+
+async def bot(host: str, port: int, seed: int, deadline: float, spins: int, chip: int, think: float,
+              stats: BotStats) -> None:
+    rng = np.random.default_rng(seed)
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats.failed += 1
+        return
+    stats.players += 1
+    rt, dl = [], []
+    try:
+        await _send(writer, {"op": "join"})
+        joined = await _expect(reader, ("joined", "error"))
+        bankroll = joined.get("bankroll", 0)
+        done = 0
+        while time.time() < deadline and (spins <= 0 or done < spins):
+            if bankroll < chip:
+                stats.broke += 1
+                break
+            kind, arg = BOT_BETS[rng.integers(len(BOT_BETS))]
+            await _send(writer, {"op": "bet", "bets": [[kind, arg, chip]]})
+            if (await _expect(reader, ("slip", "error")))["ev"] == "error":
+                # Bola en juego (otra tirada de la mesa): espera a su result y vuelve a apostar
+                stats.waits += 1
+                await asyncio.wait_for(_expect(reader, ("result",)), RESULT_TIMEOUT)
+                continue
+            t0 = time.perf_counter()
+            await _send(writer, {"op": "spin"})
+            msg = await asyncio.wait_for(_expect(reader, ("result", "error")), RESULT_TIMEOUT)
+            if msg["ev"] == "error":
+                stats.errors += 1
+                continue
+            rt.append(time.perf_counter() - t0)
+            dl.append(time.time() - msg["t"])
+            bankroll = msg["bankroll"]
+            done += 1
+            if think > 0:
+                await asyncio.sleep(rng.exponential(think))
+        await _send(writer, {"op": "leave"})
+    except (ConnectionError, json.JSONDecodeError, asyncio.TimeoutError):
+        stats.errors += 1
+    finally:
+        writer.close()
+        stats.spins += len(rt)
+        stats.round_trip.update(rt)
+        stats.round_trip_q.update(rt)
+        stats.delivery.update(dl)
+        stats.delivery_q.update(dl)
+
+async def run_bots(host: str, port: int, players: int, first_seed: int, duration: float, spins: int,
+                   chip: int, think: float, ramp: float) -> BotStats:
+    stats = BotStats()
+    deadline = time.time() + ramp + duration
+
+    async def delayed(i: int):
+        # Conexiones escalonadas a lo largo de `ramp` segundos (sin avalancha de accept())
+        await asyncio.sleep(ramp * i / max(players, 1))
+        await bot(host, port, first_seed + i, deadline, spins, chip, think, stats)
+
+    await asyncio.gather(*(delayed(i) for i in range(players)))
+    return stats
+
+def _run_proc(job: tuple) -> BotStats:
+    raise_fd_limit()
+    return asyncio.run(run_bots(*job))
+
+async def server_stats(host: str, port: int) -> dict:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        await _send(writer, {"op": "stats"})
+        return await _expect(reader, ("stats",))
+    finally:
+        writer.close()
+
+def sample_server(host: str, port: int, stop: threading.Event, out: dict, every: float = 2.0) -> None:
+    # Estadísticas del servidor mientras juegan los bots: al final ya no queda nadie sentado y
+    # las mesas por núcleo sólo cuentan mesas ocupadas
+    while not stop.wait(every):
+        try:
+            s = asyncio.run(server_stats(host, port))
+        except (OSError, ConnectionError, json.JSONDecodeError):
+            continue
+        if s.get("active_tables"):
+            out["loaded"] = s
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser()
+    p.add_argument("--host", type=str, default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--players", type=int, default=1000)
+    p.add_argument("--procs", type=int, default=1, help="procesos con bots (cada uno, un bucle asyncio)")
+    p.add_argument("--duration", type=float, default=30.0, help="segundos de juego tras la rampa")
+    p.add_argument("--spins", type=int, default=0, help="tiradas por bot (0 = hasta --duration)")
+    p.add_argument("--ramp", type=float, default=5.0, help="segundos para conectar a todos los bots")
+    p.add_argument("--chip", type=int, default=1, help="importe de cada apuesta")
+    p.add_argument("--think", type=float, default=0.0, help="pausa media (exponencial) entre tiradas, s")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--summary_json", type=str, default=None)
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    raise_fd_limit()
+    procs = max(1, min(args.procs, args.players))
+    split = np.array_split(np.arange(args.players), procs)
+    jobs = [(args.host, args.port, len(ids), args.seed + int(ids[0]) if len(ids) else 0, args.duration,
+             args.spins, args.chip, args.think, args.ramp) for ids in split]
+    print(f"[load] {args.players} bots en {procs} proceso(s) contra {args.host}:{args.port} "
+          f"(rampa {args.ramp:g}s, {args.duration:g}s de juego)", flush=True)
+    t0 = time.perf_counter()
+    sampled: dict = {}
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_server, args=(args.host, args.port, stop, sampled), daemon=True)
+    sampler.start()
+    try:
+        if procs == 1:
+            parts = [_run_proc(jobs[0])]
+        else:
+            with mp.get_context("spawn").Pool(procs) as pool:
+                parts = pool.map(_run_proc, jobs)
+    finally:
+        stop.set()
+        sampler.join()
+    elapsed = time.perf_counter() - t0
+    stats = BotStats()
+    for part in parts:
+        stats.merge(part)
+    server = sampled.get("loaded") or asyncio.run(server_stats(args.host, args.port))
+
+    rt_q = stats.round_trip_q.quantiles(LATENCY_QUANTILES)
+    dl_q = stats.delivery_q.quantiles(LATENCY_QUANTILES)
+    fmt = lambda qs: "  ".join(f"p{q*100:g}={v*1e3:.1f}ms" for q, v in zip(LATENCY_QUANTILES, qs))
+    print(f"[OK] {stats.players} bots conectados ({stats.failed} fallidos), {stats.spins} tiradas en "
+          f"{elapsed:.1f}s ({stats.spins / max(elapsed, 1e-9):.0f}/s), {stats.errors} errores, "
+          f"{stats.waits} apuestas con la bola en juego, {stats.broke} sin saldo")
+    print(f"Ida y vuelta spin -> result: media {stats.round_trip.mean*1e3:.1f}ms  {fmt(rt_q)}")
+    print(f"Entrega del result: media {stats.delivery.mean*1e3:.2f}ms  {fmt(dl_q)}")
+    per_core = server.get("tables_per_core")
+    print(f"Servidor (con carga): {server['active_tables']}/{server['tables']} mesas ocupadas, tick {server['tick_ms']:.2f} ms (p99 {server['tick_p99_ms']:.2f} ms), "
+          f"CPU {server['cpu_share']:.0%}" + (f", ~{per_core:,.0f} mesas/núcleo" if per_core else ""))
+    summary = {
+        "players": stats.players, "failed": stats.failed, "spins": stats.spins, "errors": stats.errors,
+        "elapsed_s": elapsed, "spins_per_sec": stats.spins / max(elapsed, 1e-9),
+        "round_trip_ms": {"mean": stats.round_trip.mean * 1e3,
+                          **{f"p{q*100:g}": v * 1e3 for q, v in zip(LATENCY_QUANTILES, rt_q)}},
+        "delivery_ms": {"mean": stats.delivery.mean * 1e3,
+                        **{f"p{q*100:g}": v * 1e3 for q, v in zip(LATENCY_QUANTILES, dl_q)}},
+        "server": server,
+        "procs": procs,
+        "cpu_count": os.cpu_count(),
+    }
+    if args.summary_json:
+        with open(args.summary_json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"[OK] Resumen -> {args.summary_json}")
+    return summary
+
+if __name__ == "__main__":
+    main()
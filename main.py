@@ -15,22 +15,32 @@
 #   S      -> Enable straight-number selection mode
 #   LEFT/RIGHT -> Change straight number when S mode active
 #   ENTER  -> Add straight-number bet with current chip
+#   T      -> Toggle turbo: auto-spin the current bet slip hundreds of times per second
+#   A      -> Toggle AI player: a trained policy (--model) places the bets and spins
+#
+# Online: python main.py --connect HOST:PORT [--table ID|new] plays a seat of a table run by
+# table_server.py (SPACE asks for the spin; the ball goes when every seated player is ready or
+# the betting window closes). Turbo is local only.
 #
 # Notes: This is a simplified casino model for education.
-# Payouts: even-money 1:1, straight 35:1. Zero loses even-money bets.
+# Payouts come from payouts.py (full European table; the keys above use
+# even-money 1:1 and straight 35:1). Zero loses even-money bets.
 #
 from __future__ import annotations
-import math, sys, random
-from typing import List, Tuple, Dict, Optional
+import argparse, math, os, sys
+from typing import Tuple, Dict, Optional
+import numpy as np
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
 import pygame
 
-# -------------------- Wheel Definition (European) --------------------
-# Number order clockwise when viewed from above; we'll consider angle 0 at top and increase clockwise.
-WHEEL_ORDER = [0, 32, 15, 19, 4, 21, 2, 25, 17, 34, 6, 27, 13, 36, 11, 30, 8, 23,
-               10, 5, 24, 16, 33, 1, 20, 14, 31, 9, 22, 18, 29, 7, 28, 12, 35, 3, 26]
+import wheel_physics as physics
+from wheel_physics import WHEEL_ORDER, POCKETS, ANGLE_PER
+from payouts import RED_NUMBERS, BET_INDEX, PAYOUT_MATRIX
+from table import Table, BANKROLL_START
+from roulette_config import OPTION_NAMES, OPTION_KEYS
 
-RED_NUMBERS = {1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36}
-BLACK_NUMBERS = set(range(1,37)) - RED_NUMBERS
+# -------------------- Wheel Definition (European) --------------------
+# WHEEL_ORDER (clockwise, angle 0 at top) and the spin physics live in wheel_physics.py.
 
 # -------------------- Game Config --------------------
 WIDTH, HEIGHT = 1100, 900
@@ -39,13 +49,17 @@ R_OUTER = 360
 R_INNER = 260
 R_TEXT  = 400  # radius for placing number labels
 BALL_RADIUS = 10
+WHEEL_AREA = pygame.Rect(0, 0, 900-10, HEIGHT)           # left side: table + wheel
+PANEL_RECT = pygame.Rect(900-10, 0, WIDTH-(900-10), HEIGHT)  # right side: UI panel
 
 FPS = 60
-
-BANKROLL_START = 1000
-
-POCKETS = len(WHEEL_ORDER)
-ANGLE_PER = 2*math.pi / POCKETS
+SIM_DT = physics.FRAME_DT   # fixed physics step (time units of the original 60 FPS loop)
+MAX_SIM_STEPS = 8           # physics steps per rendered frame before dropping time
+TURBO_BATCH = 16            # spins resolved per frame in turbo (~1000 spins/s at 60 FPS)
+TURBO_REDRAW_EVERY = 6      # in turbo only every Nth frame is rendered
+AI_BET_FRACTION = 0.10      # AI stakes this fraction of the bankroll per spin (as RouletteEnv)
+AI_SPIN_DELAY_MS = 700      # the AI's bet slip stays on screen this long before it spins
+AI_DEFAULT_MODELS = ("models/sac_roulette_actor.npz", "models/sac_roulette.zip")
 
 # Colors
 WHITE=(255,255,255); BLACK=(0,0,0); RED=(220,0,0); GREEN=(0,140,0); GRAY=(60,60,60); LIGHT=(220,220,220)
@@ -57,14 +71,8 @@ def pocket_color(n:int):
     return RED if n in RED_NUMBERS else BLACK
 
 def even_money_win(n:int, bet:str)->bool:
-    if n==0: return False
-    if bet=="RED": return n in RED_NUMBERS
-    if bet=="BLACK": return n in BLACK_NUMBERS
-    if bet=="EVEN": return (n%2)==0
-    if bet=="ODD": return (n%2)==1
-    if bet=="LOW": return 1<=n<=18
-    if bet=="HIGH": return 19<=n<=36
-    return False
+    k = BET_INDEX.get((bet, None))
+    return k is not None and bool(PAYOUT_MATRIX[n, k] > 0)
 
 def round_points(cx, cy, radius, a0, a1, steps=10):
     # Points along arc from angle a0 to a1 (clockwise positive)
@@ -87,102 +95,258 @@ def angle_wrap(a):
     return a
 
 # -------------------- Pygame Setup --------------------
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("European Roulette — RL-ready Visual Wheel")
-clock = pygame.time.Clock()
-font = pygame.font.SysFont("arial", 20)
-font_small = pygame.font.SysFont("arial", 16)
-font_big = pygame.font.SysFont("arial", 28, bold=True)
+# Nothing is initialised at import time: importing this module (e.g. for the helpers
+# above) never opens a window. init_display() creates the window, clock and fonts.
+screen: Optional[pygame.Surface] = None
+clock: Optional[pygame.time.Clock] = None
+font = font_small = font_big = None
+
+def init_display():
+    global screen, clock, font, font_small, font_big
+    if screen is not None:
+        return screen
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("European Roulette — RL-ready Visual Wheel")
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont("arial", 20)
+    font_small = pygame.font.SysFont("arial", 16)
+    font_big = pygame.font.SysFont("arial", 28, bold=True)
+    return screen
 
 # -------------------- Game State --------------------
-bankroll = BANKROLL_START
+# Rules, bankroll, bet slip, physics and statistics live in a table.Table with a single seat
+# (or a table_client.RemoteTable with --connect, where table_server.py runs them). This module
+# only keeps the UI state and the handles to the table and our seat.
+table = Table()
+player = "local"
+seat = table.sit(player, BANKROLL_START)
+
 chip_amount = 10
-bet_slip : Dict[Tuple[str, Optional[int]], int] = {}  # key: ("RED",None) or ("STRAIGHT",17) -> amount
 select_straight_mode = False
 straight_number = 17
 
-spinning = False
-result_number = None
-result_timer = 0
+# turbo mode: the slip auto-spun by Table.run_turbo_batch
+turbo = False
+turbo_slip : Dict[Tuple[str, Optional[int]], int] = {}
+
+# AI player: the policy runs in a separate process (policy_worker.py)
+ai_mode = False
+ai_model_path: Optional[str] = None
+ai_worker = None
+ai_spin_at: Optional[int] = None   # pygame ticks at which the AI's slip is spun
 
-# physics
-wheel_angle = 0.0
-wheel_av = 0.0
-ball_angle = 0.0
-ball_av = 0.0
+def connect(address:str, table_id=None):
+    # Thin-client mode: same UI, the table lives on the server
+    global table, player, seat
+    from table_client import RemoteTable
+    table = RemoteTable(address, table_id)
+    player = table.player
+    seat = table.seat
 
 def add_bet(key:Tuple[str, Optional[int]], amount:int):
     if amount<=0: return
-    bet_slip[key] = bet_slip.get(key, 0) + amount
+    try:
+        table.place_bet(player, key, amount)
+    except ValueError:
+        pass  # ball in play or not enough bankroll: the chip is not placed
 
 def total_bet_amount():
-    return sum(bet_slip.values())
+    return seat.total_bet_amount()
 
 def can_spin():
-    return (not spinning) and total_bet_amount()>0 and bankroll>=total_bet_amount()
+    return table.can_spin()
 
 def launch_spin():
-    global spinning, result_number, result_timer, wheel_av, ball_av, ball_angle, wheel_angle, bankroll
-    # Deduct stake from bankroll
-    stake = total_bet_amount()
-    bankroll -= stake
-    # Randomize starting angles and angular velocities
-    wheel_angle = random.random()*2*math.pi
-    ball_angle = random.random()*2*math.pi
-    wheel_av  = (random.uniform(0.9, 1.2)) * (2*math.pi/8) * (-1)   # slow clockwise
-    ball_av   = (random.uniform(5.0, 6.5)) * (2*math.pi/8)           # fast counterclockwise
-    spinning = True
-    result_number = None
-    result_timer = 0
-
-def settle(n:int):
-    global bankroll
-    # Payouts: even-money 1:1, straight 35:1
-    payout = 0
-    for (kind,arg), amt in bet_slip.items():
-        if kind in ("RED","BLACK","EVEN","ODD","LOW","HIGH"):
-            if even_money_win(n, kind):
-                payout += amt*2  # return includes stake of that bet
-        elif kind=="STRAIGHT":
-            if arg == n:
-                payout += amt*36
-    bankroll += payout
+    # Local table: spins now. Remote table: asks the server, which spins when the table is ready
+    if table.request_spin(player):
+        table.launch_spin()
+
+def toggle_turbo():
+    global turbo, turbo_slip
+    if turbo:
+        turbo = False
+        return
+    if not table.supports_turbo:
+        return
+    slip = dict(seat.bet_slip) or dict(seat.last_slip)
+    if not table.spinning and slip and seat.bankroll >= sum(slip.values()):
+        turbo_slip = slip
+        table.clear_bets(player)
+        turbo = True
+
+def run_turbo_batch(k:int):
+    # Resolve k spins of the turbo slip at once; stops as soon as the bankroll can't cover it
+    global turbo
+    if table.run_turbo_batch(player, turbo_slip, k) < k:
+        turbo = False
+
+def ai_slip(weights, total:int) -> Dict[Tuple[str, Optional[int]], int]:
+    # Split `total` chips over the menu by the policy weights (largest remainder, integer dollars)
+    raw = np.asarray(weights, dtype=np.float64) * total
+    amounts = np.floor(raw).astype(np.int64)
+    rest = total - int(amounts.sum())
+    if rest > 0:
+        amounts[np.argsort(amounts - raw)[:rest]] += 1
+    return {key: int(a) for key, a in zip(OPTION_KEYS, amounts) if a > 0}
+
+def toggle_ai():
+    global ai_mode, ai_worker, ai_spin_at, turbo
+    if ai_mode:
+        ai_mode = False
+        ai_spin_at = None
+        if not table.spinning:
+            table.clear_bets(player)
+        return
+    if ai_model_path is None:
+        return
+    if ai_worker is None:
+        # Loading (and torch for .zip models) happens in the worker process
+        from policy_worker import PolicyWorker
+        ai_worker = PolicyWorker(ai_model_path)
+    turbo = False
+    if not table.spinning:
+        table.clear_bets(player)
+    ai_mode = True
+
+def update_ai(now:int):
+    # Non-blocking AI step: poll the worker, place its slip, spin after a short delay
+    global ai_mode, ai_spin_at
+    if ai_worker is None:
+        return
+    weights = ai_worker.poll()
+    if not ai_mode or table.spinning or player in table.ready:
+        return
+    if weights is not None:
+        total = int(AI_BET_FRACTION * seat.bankroll)
+        if total < 1:
+            ai_mode = False
+            return
+        table.clear_bets(player)
+        try:
+            table.place_bets(player, ai_slip(weights, total).items())
+        except ValueError:
+            pass
+        ai_spin_at = now + AI_SPIN_DELAY_MS
+    if seat.bet_slip and ai_spin_at is not None:
+        if now >= ai_spin_at and can_spin():
+            ai_spin_at = None
+            launch_spin()
+    elif ai_worker.pending is None:
+        last_n = -1 if table.result_number is None else table.result_number
+        ai_worker.request(seat.bankroll / BANKROLL_START, last_n)
 
 def compute_winning_number(wheel_angle, ball_angle):
-    # Determine which pocket the ball points to in wheel coordinates
-    rel = angle_wrap(ball_angle - wheel_angle)  # angle of ball in wheel frame
-    # We define pocket 0 spanning [0, ANGLE_PER), then next clockwise.
-    idx = int((rel) // ANGLE_PER) % POCKETS
-    return WHEEL_ORDER[idx]
+    # Pocket under the ball in wheel coordinates (pocket 0 spans [0, ANGLE_PER))
+    return int(physics.winning_numbers(wheel_angle, ball_angle))
 
 def update_physics(dt):
-    global wheel_angle, ball_angle, wheel_av, ball_av, spinning, result_number, result_timer, bet_slip
-
-    if not spinning:
-        return
-
-    # Friction (simple linear decel)
-    wheel_av *= 0.999
-    ball_av  *= 0.9975
-
-    # Minimal angular velocities
-    if abs(wheel_av) < 0.01: wheel_av = 0.01 if wheel_av>=0 else -0.01
-    if abs(ball_av)  < 0.2:  ball_av  = 0.2 if ball_av>=0 else -0.2
-
-    wheel_angle = angle_wrap(wheel_angle + wheel_av*dt)
-    ball_angle  = angle_wrap(ball_angle  + ball_av*dt)
-
-    # When ball is slow enough, "drop" to final pocket with damping and finish
-    if abs(ball_av) < 0.45:
-        # Snap after a brief delay
-        result_timer += dt
-        if result_timer > 1.2:
-            n = compute_winning_number(wheel_angle, ball_angle)
-            result_number = n
-            settle(n)
-            spinning = False
-            bet_slip.clear()
+    # Friction, minimal velocities, ball drop, settle delay and payouts: see Table.step
+    table.step(dt)
+
+# -------------------- Render Cache --------------------
+class TextCache:
+    # Rendered text surfaces keyed by (font, text, color); cleared when it grows too big
+    def __init__(self, maxsize:int=512):
+        self.maxsize = maxsize
+        self._surfaces: Dict[tuple, pygame.Surface] = {}
+
+    def render(self, fnt, text:str, antialias:bool, color):
+        key = (id(fnt), text, antialias, color)
+        surf = self._surfaces.get(key)
+        if surf is None:
+            if len(self._surfaces) >= self.maxsize:
+                self._surfaces.clear()
+            surf = self._surfaces[key] = fnt.render(text, antialias, color)
+        return surf
+
+text_cache = TextCache()
+
+# Palette indices of the 8-bit wedge ring: 0..36 = wedge slots, then fixed colors
+_SLOT_SEPARATOR, _SLOT_OUTLINE, _SLOT_HUB, _SLOT_HUB_RIM, _SLOT_CLEAR = 37, 38, 39, 40, 255
+ROTATION_FRAMES = 96  # pre-rotated ring frames per pocket arc (~0.1° each)
+
+class WheelCache:
+    # Pre-rendered layers: the static table (background, rim, indicator), the wedge ring and
+    # the 37 upright number labels. The ring is an 8-bit surface whose wedge i uses palette
+    # slot i, so a rotation by k pockets + d is the frame pre-rotated by d with the pocket
+    # colors shifted k slots: only ROTATION_FRAMES surfaces cover every angle.
+    def __init__(self):
+        cx, cy = CENTER
+        self.static = pygame.Surface(WHEEL_AREA.size).convert()
+        self.static.fill(BG)
+        pygame.draw.circle(self.static, LIGHT, (int(cx), int(cy)), R_TEXT, 0)
+        pygame.draw.circle(self.static, BG, (int(cx), int(cy)), R_TEXT-12, 0)
+        tip = (cx, cy - (R_OUTER + 48))
+        pygame.draw.polygon(self.static, (200,200,200), [
+            (tip[0], tip[1]-10),
+            (tip[0]-10, tip[1]+10),
+            (tip[0]+10, tip[1]+10),
+        ])
+
+        size = 2*R_OUTER + 4
+        c = size/2
+        ring = pygame.Surface((size, size), 0, 8)
+        self.palette = [(0,0,0)]*256
+        self.palette[_SLOT_SEPARATOR] = (60,60,60)
+        self.palette[_SLOT_OUTLINE] = GRAY
+        self.palette[_SLOT_HUB] = (200,200,200)
+        self.palette[_SLOT_HUB_RIM] = (120,120,120)
+        ring.set_palette(self.palette)
+        ring.fill(_SLOT_CLEAR)
+        a = 0.0
+        for slot in range(POCKETS):
+            poly = wedge_polygon(c, c, R_OUTER, R_INNER, a, a + ANGLE_PER)
+            pygame.draw.polygon(ring, slot, poly)
+            pygame.draw.polygon(ring, _SLOT_OUTLINE, poly, 1)
+            a += ANGLE_PER
+        pygame.draw.circle(ring, _SLOT_HUB, (int(c), int(c)), R_INNER-15, 0)
+        pygame.draw.circle(ring, _SLOT_HUB_RIM, (int(c), int(c)), R_INNER-15, 3)
+        for i in range(POCKETS):
+            ang = i*ANGLE_PER
+            pygame.draw.line(ring, _SLOT_SEPARATOR,
+                             (c + R_INNER*math.sin(ang), c - R_INNER*math.cos(ang)),
+                             (c + R_OUTER*math.sin(ang), c - R_OUTER*math.cos(ang)), 2)
+        ring.set_colorkey(_SLOT_CLEAR)
+        # pygame rotates counterclockwise; wheel angles grow clockwise on screen
+        self.frames = [pygame.transform.rotate(ring, -math.degrees(f*ANGLE_PER/ROTATION_FRAMES))
+                       for f in range(ROTATION_FRAMES)]
+        self.pocket_colors = [pocket_color(num) for num in WHEEL_ORDER]
+
+        self.labels = [font_small.render(str(num), True, pocket_color(num)) for num in WHEEL_ORDER]
+        self.label_half = np.array([lab.get_size() for lab in self.labels], dtype=np.float64) / 2
+        self.label_angles = np.arange(POCKETS)*ANGLE_PER + ANGLE_PER/2
+
+    def draw(self, surface, wheel_angle:float, ball_angle:float):
+        cx, cy = CENTER
+        surface.blit(self.static, WHEEL_AREA.topleft)
+
+        steps = int(round(angle_wrap(wheel_angle) / ANGLE_PER * ROTATION_FRAMES)) % (POCKETS*ROTATION_FRAMES)
+        k, f = divmod(steps, ROTATION_FRAMES)
+        frame = self.frames[f]
+        # slot s shows wedge s-k
+        self.palette[:POCKETS] = self.pocket_colors[-k:] + self.pocket_colors[:-k] if k else self.pocket_colors
+        frame.set_palette(self.palette)
+        surface.blit(frame, frame.get_rect(center=CENTER))
+
+        ang = self.label_angles + wheel_angle
+        xs = cx + (R_OUTER+20)*np.sin(ang) - self.label_half[:, 0]
+        ys = cy - (R_OUTER+20)*np.cos(ang) - self.label_half[:, 1]
+        surface.blits([(lab, (round(x), round(y))) for lab, x, y in zip(self.labels, xs.tolist(), ys.tolist())],
+                      doreturn=False)
+
+        bx = cx + (R_OUTER-30)*math.sin(ball_angle)
+        by = cy - (R_OUTER-30)*math.cos(ball_angle)
+        pygame.draw.circle(surface, YELLOW, (int(bx), int(by)), BALL_RADIUS)
+
+def panel_state():
+    # Everything draw_panel shows; the panel is only redrawn when this changes
+    ai = None
+    if ai_mode and ai_worker is not None:
+        w = ai_worker.weights
+        ai = (ai_worker.status, None if w is None else tuple(np.round(w, 3).tolist()))
+    return (seat.bankroll, chip_amount, tuple(seat.bet_slip.items()), select_straight_mode,
+            straight_number, table.result_number, turbo, table.spin_count, ai)
 
 def draw_wheel(surface):
     # Draw table background
@@ -221,7 +385,7 @@ def draw_wheel(surface):
     for i, num in enumerate(WHEEL_ORDER):
         ang = i*ANGLE_PER + ANGLE_PER/2
         # rotate by wheel_angle
-        ang = angle_wrap(ang + wheel_angle)
+        ang = angle_wrap(ang + table.wheel_angle)
         x = cx + (R_OUTER+20)*math.sin(ang)
         y = cy - (R_OUTER+20)*math.cos(ang)
         col = pocket_color(num)
@@ -230,8 +394,8 @@ def draw_wheel(surface):
         surface.blit(label, rect)
 
     # Draw ball (rotates opposite direction)
-    bx = cx + (R_OUTER-30)*math.sin(ball_angle)
-    by = cy - (R_OUTER-30)*math.cos(ball_angle)
+    bx = cx + (R_OUTER-30)*math.sin(table.ball_angle)
+    by = cy - (R_OUTER-30)*math.cos(table.ball_angle)
     pygame.draw.circle(surface, YELLOW, (int(bx), int(by)), BALL_RADIUS)
 
     # Top indicator triangle
@@ -244,45 +408,109 @@ def draw_wheel(surface):
 
 def draw_panel(surface):
     # Right side panel
-    panel_rect = pygame.Rect(900-10, 0, 1100- (900-10), HEIGHT)
+    panel_rect = PANEL_RECT
     pygame.draw.rect(surface, PANEL, panel_rect)
 
     x = panel_rect.x + 20
     y = 20
-    surface.blit(font_big.render("RUEDA EUROPEA", True, WHITE), (x, y)); y+=40
+    surface.blit(text_cache.render(font_big, "RUEDA EUROPEA", True, WHITE), (x, y)); y+=40
 
-    surface.blit(font.render(f"Bankroll: ${bankroll}", True, WHITE), (x,y)); y+=30
-    surface.blit(font.render(f"Chip: ${chip_amount}   (↑/↓ para cambiar)", True, WHITE), (x,y)); y+=30
+    surface.blit(text_cache.render(font, f"Bankroll: ${seat.bankroll}", True, WHITE), (x,y)); y+=30
+    surface.blit(text_cache.render(font, f"Chip: ${chip_amount}   (↑/↓ para cambiar)", True, WHITE), (x,y)); y+=30
 
     y+=10
-    surface.blit(font.render("Apuestas (ENTER para STRAIGHT)", True, LIGHT), (x,y)); y+=25
-
-    # Show bet slip
-    if bet_slip:
-        for (kind,arg), amt in bet_slip.items():
+    surface.blit(text_cache.render(font, "Apuestas (ENTER para STRAIGHT)", True, LIGHT), (x,y)); y+=25
+
+    # Show bet slip (the AI's slip is summarised: its weights are drawn below)
+    if ai_mode:
+        text = f"IA: {len(seat.bet_slip)} apuestas" if seat.bet_slip else "IA: esperando a la política"
+        surface.blit(text_cache.render(font_small, text, True, WHITE), (x,y)); y+=22
+    elif seat.bet_slip:
+        for (kind,arg), amt in seat.bet_slip.items():
             text = f"{kind}{' '+str(arg) if arg is not None else ''}: ${amt}"
-            surface.blit(font_small.render(text, True, WHITE), (x,y)); y+=22
+            surface.blit(text_cache.render(font_small, text, True, WHITE), (x,y)); y+=22
     else:
-        surface.blit(font_small.render("— Vacío —", True, (180,180,180)), (x,y)); y+=22
+        surface.blit(text_cache.render(font_small, "— Vacío —", True, (180,180,180)), (x,y)); y+=22
 
     y+=10
-    surface.blit(font.render("Total apuesta:", True, LIGHT), (x,y)); y+=25
-    surface.blit(font_big.render(f"${total_bet_amount()}", True, WHITE), (x,y)); y+=40
+    surface.blit(text_cache.render(font, "Total apuesta:", True, LIGHT), (x,y)); y+=25
+    surface.blit(text_cache.render(font_big, f"${total_bet_amount()}", True, WHITE), (x,y)); y+=40
 
-    surface.blit(font_small.render("1 RED, 2 BLACK, 3 EVEN, 4 ODD", True, WHITE), (x,y)); y+=20
-    surface.blit(font_small.render("5 LOW, 6 HIGH, S STRAIGHT num", True, WHITE), (x,y)); y+=20
-    surface.blit(font_small.render("←/→ cambia número, ENTER agrega", True, WHITE), (x,y)); y+=20
-    surface.blit(font_small.render("C limpia, SPACE gira", True, WHITE), (x,y)); y+=20
+    if ai_mode:
+        draw_ai_weights(surface, x, y); y+=110
+    else:
+        surface.blit(text_cache.render(font_small, "1 RED, 2 BLACK, 3 EVEN, 4 ODD", True, WHITE), (x,y)); y+=20
+        surface.blit(text_cache.render(font_small, "5 LOW, 6 HIGH, S STRAIGHT num", True, WHITE), (x,y)); y+=20
+        surface.blit(text_cache.render(font_small, "←/→ cambia número, ENTER agrega", True, WHITE), (x,y)); y+=20
+        surface.blit(text_cache.render(font_small, "C limpia, SPACE gira, A IA", True, WHITE), (x,y)); y+=20
 
     y+=20
     if select_straight_mode:
-        surface.blit(font.render(f"STRAIGHT nº: {straight_number}", True, YELLOW), (x,y)); y+=30
+        surface.blit(text_cache.render(font, f"STRAIGHT nº: {straight_number}", True, YELLOW), (x,y)); y+=30
 
-    if result_number is not None:
-        col = pocket_color(result_number)
-        txt = font_big.render(f"Salió: {result_number}", True, col)
+    draw_stats(surface, x, 540)
+
+    if table.result_number is not None:
+        col = pocket_color(table.result_number)
+        txt = text_cache.render(font_big, f"Salió: {table.result_number}", True, col)
         surface.blit(txt, (x, HEIGHT-60))
 
+def draw_ai_weights(surface, x, y):
+    # Policy status and its softmax weight per menu option (two columns of bars)
+    if ai_worker.status == "error":
+        status, col = f"IA error: {ai_worker.error}"[:48], RED
+    elif ai_worker.status == "loading":
+        status, col = "IA: cargando modelo…", LIGHT
+    else:
+        status, col = f"IA: {os.path.basename(ai_model_path)}", YELLOW
+    surface.blit(text_cache.render(font_small, status, True, col), (x,y)); y+=22
+    weights = ai_worker.weights
+    col_w = (PANEL_RECT.right - x - 20) // 2
+    bar_max = col_w - 100
+    for i, name in enumerate(OPTION_NAMES):
+        cx = x + (i % 2) * col_w
+        cy = y + (i // 2) * 17
+        p = 0.0 if weights is None else float(weights[i])
+        surface.blit(text_cache.render(font_small, f"{name} {p*100:4.1f}%", True, WHITE), (cx, cy))
+        pygame.draw.rect(surface, GRAY, (cx + 88, cy + 4, bar_max, 8), 1)
+        if p > 0:
+            pygame.draw.rect(surface, YELLOW, (cx + 88, cy + 4, max(int(bar_max * p), 1), 8))
+
+def draw_stats(surface, x, y):
+    # Running statistics: spin count, hit frequency per pocket and bankroll curve
+    w = PANEL_RECT.right - x - 20
+    mode = f"TURBO ({sum(turbo_slip.values())}/giro)" if turbo else "T = turbo"
+    surface.blit(text_cache.render(font_small, f"Giros: {table.spin_count}   {mode}", True, YELLOW if turbo else LIGHT), (x,y)); y+=24
+
+    # Hit frequency per pocket (table order 0..36), scaled to the most frequent pocket
+    h = 60
+    bar_w = w / 37
+    pocket_hits = table.pocket_hits
+    top = max(int(pocket_hits.max()), 1)
+    for n in range(37):
+        bh = int(h * pocket_hits[n] / top)
+        if bh:
+            pygame.draw.rect(surface, pocket_color(n) if n else GREEN,
+                             (x + int(n*bar_w), y + h - bh, max(int(bar_w) - 1, 1), bh))
+    pygame.draw.line(surface, GRAY, (x, y+h), (x+w, y+h), 1)
+    if table.spin_count:
+        expected = 100.0 / 37
+        hot = int(pocket_hits.argmax())
+        surface.blit(text_cache.render(font_small, f"máx: {hot} ({100.0*pocket_hits[hot]/table.spin_count:.2f}% vs {expected:.2f}%)",
+                                       True, WHITE), (x, y+h+4))
+    y += h + 30
+
+    # Bankroll curve
+    h = 90
+    pygame.draw.rect(surface, BG, (x, y, w, h))
+    if len(seat.history) > 1:
+        hist = np.asarray(seat.history, dtype=np.float64)
+        lo, hi = float(hist.min()), float(hist.max())
+        xs = x + np.linspace(0, w-1, hist.size)
+        ys = y + h - 1 - (hist - lo) / max(hi - lo, 1e-9) * (h - 2)
+        pygame.draw.lines(surface, YELLOW, False, list(zip(xs.tolist(), ys.tolist())), 1)
+        surface.blit(text_cache.render(font_small, f"${int(lo)} – ${int(hi)}", True, LIGHT), (x, y+h+4))
+
 def handle_keydown(event_key):
     global chip_amount, select_straight_mode, straight_number
     if event_key == pygame.K_UP:
@@ -290,7 +518,7 @@ def handle_keydown(event_key):
     elif event_key == pygame.K_DOWN:
         chip_amount = max(5, chip_amount - 5)
     elif event_key == pygame.K_c:
-        bet_slip.clear()
+        table.clear_bets(player)
     elif event_key == pygame.K_1:
         add_bet(("RED", None), chip_amount)
     elif event_key == pygame.K_2:
@@ -311,18 +539,41 @@ def handle_keydown(event_key):
         straight_number = 0 if straight_number==36 else (straight_number+1)
     elif event_key == pygame.K_RETURN and select_straight_mode:
         add_bet(("STRAIGHT", straight_number), chip_amount)
-
-def main():
-    global spinning, result_number
-
-    # initial angles
-    global wheel_angle, ball_angle, wheel_av, ball_av
-    wheel_angle = 0.0
-    ball_angle  = math.pi  # opposite
+    elif event_key == pygame.K_t and not ai_mode:
+        toggle_turbo()
+    elif event_key == pygame.K_a:
+        toggle_ai()
+
+def main(argv=None):
+    global ai_model_path
+    p = argparse.ArgumentParser(description="European roulette with a visual wheel (pygame)")
+    p.add_argument("--model", type=str, default=None,
+                   help="policy for the AI player (A): actor .npz or SB3 .zip")
+    p.add_argument("--ai", action="store_true", help="start with the AI player on")
+    p.add_argument("--connect", type=str, default=None, metavar="HOST:PORT",
+                   help="play at a table of table_server.py instead of locally")
+    p.add_argument("--table", type=str, default=None,
+                   help="with --connect: table id to join, or 'new' (default: any free seat)")
+    args = p.parse_args(argv)
+    ai_model_path = args.model or next((m for m in AI_DEFAULT_MODELS if os.path.exists(m)), None)
+    if args.connect:
+        table_id = args.table if args.table in (None, "new") else int(args.table)
+        connect(args.connect, table_id)
+    init_display()
+    if args.ai:
+        toggle_ai()
+
+    wheel_cache = WheelCache()
+    last_angles = None
+    last_panel = None
+    frame = 0
+    accumulator = 0.0
 
     running = True
     while running:
-        dt = clock.tick(FPS) / 60.0
+        # Physics runs in fixed SIM_DT steps; frame timing only feeds the accumulator
+        accumulator = min(accumulator + clock.tick(FPS) / 60.0, MAX_SIM_STEPS*SIM_DT)
+        frame += 1
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -331,82 +582,41 @@ def main():
                 if event.key == pygame.K_ESCAPE:
                     running = False
                 elif event.key == pygame.K_SPACE:
-                    if can_spin():
-                        result_number = None
+                    if can_spin() and not turbo and not ai_mode:
                         launch_spin()
                 else:
                     handle_keydown(event.key)
 
-        update_physics(dt)
-
-        # Draw wheel rotated by wheel_angle; do this by applying an angle offset during label computation
-        # We'll "bake" wheel_angle into drawing by rotating labels; wedges themselves are static but we simulate
-        # rotation by effectively offsetting label angle. For visuals, we also draw ball separately.
-        # Simpler approach: re-draw wedges fixed and only rotate labels/ball angles using current angles.
-        # For a more realistic look, we can rotate wedges by shifting their computed angles (wheel_angle).
-        # Here, we incorporate wheel_angle into the wedge generation by temporarily rotating the surface via math.
-        # To keep performance OK, we approximate by drawing wedges already accounted for with base angles then overlay
-        # labels that include wheel_angle. The separators and ball depiction use angles with current wheel/ball states.
-
-        # To simulate wheel rotation in wedge colors, we redraw wedges each frame with angles + wheel_angle
-        # by temporarily modifying the global draw routine. We'll re-implement a quick version here.
-        def draw_wheel_with_rotation(surface):
-            surface.fill(BG)
-            cx, cy = CENTER
-
-            pygame.draw.circle(surface, LIGHT, (int(cx), int(cy)), R_TEXT, 0)
-            pygame.draw.circle(surface, BG, (int(cx), int(cy)), R_TEXT-12, 0)
-
-            a = wheel_angle  # start rotated
-            for i, num in enumerate(WHEEL_ORDER):
-                a0 = a
-                a1 = a + ANGLE_PER
-                poly = wedge_polygon(cx, cy, R_OUTER, R_INNER, a0, a1)
-                col = pocket_color(num)
-                pygame.draw.polygon(surface, col, poly)
-                pygame.draw.polygon(surface, GRAY, poly, 1)
-                a = a1
-
-            pygame.draw.circle(surface, (200,200,200), (int(cx), int(cy)), R_INNER-15, 0)
-            pygame.draw.circle(surface, (120,120,120), (int(cx), int(cy)), R_INNER-15, 3)
-
-            # Separator lines (rotated)
-            for i in range(POCKETS):
-                ang = wheel_angle + i*ANGLE_PER
-                x0 = cx + R_INNER*math.sin(ang)
-                y0 = cy - R_INNER*math.cos(ang)
-                x1 = cx + R_OUTER*math.sin(ang)
-                y1 = cy - R_OUTER*math.cos(ang)
-                pygame.draw.line(surface, (60,60,60), (x0,y0), (x1,y1), 2)
-
-            # Numbers around the rim
-            for i, num in enumerate(WHEEL_ORDER):
-                ang = wheel_angle + i*ANGLE_PER + ANGLE_PER/2
-                x = cx + (R_OUTER+20)*math.sin(ang)
-                y = cy - (R_OUTER+20)*math.cos(ang)
-                col = pocket_color(num)
-                label = font_small.render(str(num), True, col)
-                rect = label.get_rect(center=(x,y))
-                surface.blit(label, rect)
-
-            # Ball
-            bx = cx + (R_OUTER-30)*math.sin(ball_angle)
-            by = cy - (R_OUTER-30)*math.cos(ball_angle)
-            pygame.draw.circle(surface, YELLOW, (int(bx), int(by)), BALL_RADIUS)
-
-            # Indicator
-            tip = (cx, cy - (R_OUTER + 48))
-            pygame.draw.polygon(surface, (200,200,200), [
-                (tip[0], tip[1]-10),
-                (tip[0]-10, tip[1]+10),
-                (tip[0]+10, tip[1]+10),
-            ])
-
-        draw_wheel_with_rotation(screen)
-        draw_panel(screen)
-
-        pygame.display.flip()
-
+        update_ai(pygame.time.get_ticks())
+        if turbo:
+            run_turbo_batch(TURBO_BATCH)
+            accumulator = 0.0
+            if frame % TURBO_REDRAW_EVERY:
+                continue
+        while accumulator >= SIM_DT:
+            update_physics(SIM_DT)
+            accumulator -= SIM_DT
+
+        # Cached layers: redraw the wheel only when it moved and the panel only when
+        # its contents changed, then push just those rects to the display.
+        dirty = []
+        angles = (table.wheel_angle, table.ball_angle)
+        if angles != last_angles:
+            wheel_cache.draw(screen, *angles)
+            dirty.append(WHEEL_AREA)
+            last_angles = angles
+        state = panel_state()
+        if state != last_panel:
+            draw_panel(screen)
+            dirty.append(PANEL_RECT)
+            last_panel = state
+        if dirty:
+            pygame.display.update(dirty)
+
+    if ai_worker is not None:
+        ai_worker.close()
+    if args.connect:
+        table.close()
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Inferencia del actor SAC sin torch: exportador a .npz + política NumPy con forward por lotes.
+#
+# El actor determinista de SB3 es  a = tanh(mu(MLP(obs)))  reescalado a [low, high] del
+# action_space. export_actor() lee sólo los pesos del actor del .zip guardado (sin construir el
+# modelo, ni críticos ni optimizadores) y NumpyPolicy.predict() replica model.predict(obs,
+# deterministic=True) con la misma firma, así que sirve directamente en evaluate_policy.py.
+#   python numpy_policy.py --model models/sac_roulette.zip --out models/sac_roulette_actor.npz --check
+from __future__ import annotations
+import argparse
+import time
+from pathlib import Path
+import numpy as np
+
+ACTIVATIONS = {
+    "ReLU": lambda x: np.maximum(x, 0.0, out=x),
+    "Tanh": lambda x: np.tanh(x, out=x),
+    "ELU": lambda x: np.where(x > 0, x, np.expm1(np.minimum(x, 0.0))).astype(x.dtype),
+    "LeakyReLU": lambda x: np.where(x > 0, x, 0.01 * x).astype(x.dtype),
+}
+
+def export_actor(model_path: str | Path, out_path: str | Path) -> Path:
+    # Necesita SB3/torch sólo para leer el .zip; el .npz resultante no depende de ellos
+    from stable_baselines3.common.save_util import load_from_zip_file
+    data, params, _ = load_from_zip_file(str(model_path), device="cpu", print_system_info=False)
+    kwargs = data.get("policy_kwargs") or {}
+    if kwargs.get("use_sde"):
+        raise ValueError("Los actores con gSDE no están soportados por la exportación NumPy")
+    activation = getattr(kwargs.get("activation_fn"), "__name__", "ReLU")
+    if activation not in ACTIVATIONS:
+        raise ValueError(f"Activación no soportada: {activation} (opciones: {', '.join(ACTIVATIONS)})")
+
+    state = params["policy"]
+    layers = sorted({int(k.split(".")[2]) for k in state if k.startswith("actor.latent_pi.")})
+    arrays = {}
+    for i, idx in enumerate(layers):
+        arrays[f"w{i}"] = state[f"actor.latent_pi.{idx}.weight"].cpu().numpy().T.astype(np.float32)
+        arrays[f"b{i}"] = state[f"actor.latent_pi.{idx}.bias"].cpu().numpy().astype(np.float32)
+    arrays["w_mu"] = state["actor.mu.weight"].cpu().numpy().T.astype(np.float32)
+    arrays["b_mu"] = state["actor.mu.bias"].cpu().numpy().astype(np.float32)
+
+    space = data["action_space"]
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(out_path, n_layers=len(layers), activation=activation,
+             low=space.low.astype(np.float32), high=space.high.astype(np.float32), **arrays)
+    return out_path
+
+class NumpyPolicy:
+    def __init__(self, path: str | Path):
+        with np.load(path) as z:
+            n = int(z["n_layers"])
+            self.layers = [(z[f"w{i}"], z[f"b{i}"]) for i in range(n)]
+            self.w_mu, self.b_mu = z["w_mu"], z["b_mu"]
+            self.low, self.high = z["low"], z["high"]
+            self.activation = str(z["activation"])
+        self._act = ACTIVATIONS[self.activation]
+        self.obs_dim = self.layers[0][0].shape[0] if self.layers else self.w_mu.shape[0]
+        self.action_dim = self.w_mu.shape[1]
+
+    def forward(self, obs: np.ndarray) -> np.ndarray:
+        # (B, obs_dim) -> (B, action_dim) en la escala del action_space
+        x = np.asarray(obs, dtype=np.float32).reshape(-1, self.obs_dim)
+        for w, b in self.layers:
+            x = self._act(x @ w + b)
+        a = np.tanh(x @ self.w_mu + self.b_mu)
+        return self.low + 0.5 * (a + 1.0) * (self.high - self.low)
+
+    def predict(self, observation, state=None, episode_start=None, deterministic: bool = True):
+        # Misma firma y forma de salida que model.predict de SB3 (siempre determinista)
+        obs = np.asarray(observation, dtype=np.float32)
+        actions = self.forward(obs)
+        if obs.ndim == 1:
+            actions = actions[0]
+        return actions, None
+
+def load_policy(path: str | Path, device: str = "auto"):
+    # .npz -> NumpyPolicy o política tabulada de dp_solver.py (sin torch); otra cosa -> SAC.load
+    if Path(path).suffix == ".npz":
+        with np.load(path) as z:
+            tabulated = "kind" in z.files and str(z["kind"]) == "dp_table"
+        if tabulated:
+            from dp_solver import TablePolicy
+            return TablePolicy(path)
+        return NumpyPolicy(path)
+    from stable_baselines3 import SAC
+    return SAC.load(str(path), device=device)
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--model", type=str, default="models/sac_roulette.zip")
+    p.add_argument("--out", type=str, default=None, help="por defecto <model>_actor.npz")
+    p.add_argument("--check", action="store_true", help="compara con SAC.predict y mide la latencia")
+    args = p.parse_args()
+
+    model_path = Path(args.model)
+    out = Path(args.out) if args.out else model_path.with_name(model_path.stem + "_actor.npz")
+    export_actor(model_path, out)
+    print(f"[OK] Actor exportado -> {out} ({out.stat().st_size / 1024:.1f} KiB)")
+
+    if args.check:
+        from stable_baselines3 import SAC
+        model = SAC.load(str(model_path), device="cpu")
+        policy = NumpyPolicy(out)
+        obs = np.random.default_rng(0).random((4096, policy.obs_dim), dtype=np.float32)
+        ref, _ = model.predict(obs, deterministic=True)
+        got, _ = policy.predict(obs)
+        print(f"Diferencia máxima con SB3: {np.abs(ref - got).max():.2e}")
+        for name, fn in (("SB3", model.predict), ("NumPy", policy.predict)):
+            t0 = time.perf_counter()
+            for o in obs[:1000]:
+                fn(o, deterministic=True)
+            print(f"{name:>6}: {(time.perf_counter() - t0) * 1e3:.3f} µs/obs (predict de 1 observación)")
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# Motor de pagos tabulado para la ruleta europea (compartido por el entorno y el juego pygame)
+#
+# Cada apuesta se identifica con una clave (tipo, argumento), igual que el bet_slip de main.py:
+#   ("RED", None) ... ("HIGH", None)       even-money         1:1
+#   ("DOZEN", 1..3), ("COLUMN", 1..3)                          2:1
+#   ("SIXLINE", primer número de la 1ª fila: 1,4,...,31)       5:1
+#   ("CORNER", número superior izquierdo)                      8:1
+#   ("STREET", primer número de la fila: 1,4,...,34)          11:1
+#   ("SPLIT", (a, b)) con a < b, incluye 0-1, 0-2 y 0-3       17:1
+#   ("STRAIGHT", 0..36)                                       35:1
+#
+# PAYOUT_MATRIX[n, k] = retorno bruto (incluye la apuesta) por unidad apostada en la
+# apuesta k si sale n; 0 si pierde. Liquidar es un único gather + producto escalar.
+from __future__ import annotations
+import numpy as np
+
+RED_NUMBERS = {1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36}
+BLACK_NUMBERS = set(range(1,37)) - RED_NUMBERS
+ZERO = 0
+
+BetKey = tuple  # (tipo, argumento)
+
+EVEN_MONEY = ("RED", "BLACK", "EVEN", "ODD", "LOW", "HIGH")
+
+# Retorno bruto por tipo (pago + apuesta)
+GROSS_RETURN = {
+    "STRAIGHT": 36, "SPLIT": 18, "STREET": 12, "CORNER": 9, "SIXLINE": 6,
+    "DOZEN": 3, "COLUMN": 3,
+    "RED": 2, "BLACK": 2, "EVEN": 2, "ODD": 2, "LOW": 2, "HIGH": 2,
+}
+
+def bet_numbers(kind: str, arg=None) -> tuple[int, ...]:
+    # Números cubiertos por una apuesta; ValueError si la apuesta no existe en el paño
+    if kind == "RED":   return tuple(sorted(RED_NUMBERS))
+    if kind == "BLACK": return tuple(sorted(BLACK_NUMBERS))
+    if kind == "EVEN":  return tuple(range(2, 37, 2))
+    if kind == "ODD":   return tuple(range(1, 37, 2))
+    if kind == "LOW":   return tuple(range(1, 19))
+    if kind == "HIGH":  return tuple(range(19, 37))
+    if kind == "DOZEN" and arg in (1, 2, 3):
+        return tuple(range(12*(arg-1) + 1, 12*arg + 1))
+    if kind == "COLUMN" and arg in (1, 2, 3):
+        return tuple(range(arg, 37, 3))
+    if kind == "STRAIGHT" and isinstance(arg, int) and 0 <= arg <= 36:
+        return (arg,)
+    if kind == "STREET" and isinstance(arg, int) and 1 <= arg <= 34 and arg % 3 == 1:
+        return (arg, arg+1, arg+2)
+    if kind == "SIXLINE" and isinstance(arg, int) and 1 <= arg <= 31 and arg % 3 == 1:
+        return tuple(range(arg, arg+6))
+    if kind == "CORNER" and isinstance(arg, int) and 1 <= arg <= 32 and arg % 3 != 0:
+        return (arg, arg+1, arg+3, arg+4)
+    if kind == "SPLIT" and isinstance(arg, tuple) and len(arg) == 2:
+        a, b = arg
+        if a == 0 and b in (1, 2, 3):
+            return (a, b)
+        if 1 <= a < b <= 36 and ((b == a+1 and a % 3 != 0) or b == a+3):
+            return (a, b)
+    raise ValueError(f"Apuesta no válida: {(kind, arg)}")
+
+def _all_bets() -> list[BetKey]:
+    keys: list[BetKey] = [(k, None) for k in EVEN_MONEY]
+    keys += [("DOZEN", d) for d in (1, 2, 3)]
+    keys += [("COLUMN", c) for c in (1, 2, 3)]
+    keys += [("SIXLINE", r) for r in range(1, 32, 3)]
+    keys += [("CORNER", n) for n in range(1, 33) if n % 3 != 0]
+    keys += [("STREET", r) for r in range(1, 35, 3)]
+    keys += [("SPLIT", (0, b)) for b in (1, 2, 3)]
+    keys += [("SPLIT", (a, a+1)) for a in range(1, 36) if a % 3 != 0]
+    keys += [("SPLIT", (a, a+3)) for a in range(1, 34)]
+    keys += [("STRAIGHT", n) for n in range(37)]
+    return keys
+
+def payout_matrix(keys) -> np.ndarray:
+    # Matriz 37×K para un menú de apuestas arbitrario
+    keys = list(keys)
+    m = np.zeros((37, len(keys)), dtype=np.float64)
+    for k, (kind, arg) in enumerate(keys):
+        m[list(bet_numbers(kind, arg)), k] = GROSS_RETURN[kind]
+    return m
+
+ALL_BETS: list[BetKey] = _all_bets()
+BET_INDEX: dict[BetKey, int] = {k: i for i, k in enumerate(ALL_BETS)}
+PAYOUT_MATRIX = payout_matrix(ALL_BETS)
+PAYOUT_MATRIX.setflags(write=False)
+
+def settle_slip(n: int, slip: dict) -> float:
+    # Retorno bruto de un bet_slip {clave: importe} para el número n
+    if not slip:
+        return 0.0
+    idx = [BET_INDEX[k] for k in slip]
+    return float(PAYOUT_MATRIX[n, idx] @ np.fromiter(slip.values(), dtype=np.float64, count=len(slip)))
+
+def settle_batch(numbers: np.ndarray, stakes: np.ndarray, matrix: np.ndarray = PAYOUT_MATRIX) -> np.ndarray:
+    # Retorno bruto de B tiradas: stakes (B, K) sobre las columnas de `matrix`
+    return np.einsum("ij,ij->i", stakes, matrix[numbers])
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# Inferencia de la política en un proceso aparte, para interfaces que no pueden bloquearse.
+#
+# El proceso hijo carga el modelo (actor NumPy .npz o .zip de SB3, que arrastra torch) y
+# responde peticiones (bankroll normalizado, último número) con los pesos softmax sobre el menú
+# de apuestas, igual que RouletteEnv.step. El proceso que llama sólo encola y sondea sin
+# esperar, así que ni la carga ni la primera inferencia congelan su bucle.
+from __future__ import annotations
+import multiprocessing as mp
+import queue
+import traceback
+import numpy as np
+
+def softmax_weights(action) -> np.ndarray:
+    # Misma conversión acción -> pesos que RouletteEnv.step
+    logits = np.asarray(action, dtype=np.float64).clip(-10, 10)
+    exps = np.exp(logits - logits.max())
+    return exps / exps.sum()
+
+def _serve(model_path: str, requests, replies) -> None:
+    try:
+        from numpy_policy import load_policy
+        from roulette_env_sb3 import OBS_TABLE
+        policy = load_policy(model_path, device="cpu")
+        # Primera inferencia aquí (calienta torch) antes de declararse listo
+        policy.predict(np.zeros(8, dtype=np.float32), deterministic=True)
+    except Exception as exc:
+        replies.put(("error", f"{type(exc).__name__}: {exc}"))
+        traceback.print_exc()
+        return
+    replies.put(("ready", model_path))
+
+    obs = np.empty(8, dtype=np.float32)
+    while True:
+        msg = requests.get()
+        if msg is None:
+            return
+        req_id, bankroll_norm, last_n = msg
+        obs[0] = min(max(bankroll_norm, 0.0), 1.0)
+        obs[1:] = OBS_TABLE[last_n + 1]
+        action, _ = policy.predict(obs, deterministic=True)
+        replies.put(("weights", req_id, softmax_weights(action).tolist()))
+
+class PolicyWorker:
+    def __init__(self, model_path: str):
+        ctx = mp.get_context("spawn")
+        self.model_path = str(model_path)
+        self._requests = ctx.Queue()
+        self._replies = ctx.Queue()
+        self._proc = ctx.Process(target=_serve, args=(self.model_path, self._requests, self._replies),
+                                 name="policy-worker", daemon=True)
+        self._proc.start()
+        self.status = "loading"      # loading -> ready | error
+        self.error: str | None = None
+        self.weights: np.ndarray | None = None
+        self._next_id = 0
+        self.pending: int | None = None  # id de la petición sin respuesta
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def request(self, bankroll_norm: float, last_n: int) -> bool:
+        # Encola una petición si no hay otra en curso; nunca bloquea
+        if not self.ready or self.pending is not None:
+            return False
+        self._next_id += 1
+        self.pending = self._next_id
+        self._requests.put((self.pending, float(bankroll_norm), int(last_n)))
+        return True
+
+    def poll(self) -> np.ndarray | None:
+        # Procesa las respuestas disponibles; devuelve pesos nuevos si acaba de llegar la pendiente
+        fresh = None
+        while True:
+            try:
+                msg = self._replies.get_nowait()
+            except queue.Empty:
+                break
+            if msg[0] == "ready":
+                self.status = "ready"
+            elif msg[0] == "error":
+                self.status, self.error = "error", msg[1]
+            elif msg[0] == "weights" and msg[1] == self.pending:
+                self.pending = None
+                self.weights = fresh = np.asarray(msg[2])
+        if self.status == "loading" and not self._proc.is_alive():
+            self.status, self.error = "error", "el proceso de inferencia terminó"
+        return fresh
+
+    def close(self) -> None:
+        if self._proc.is_alive():
+            self._requests.put(None)
+            self._proc.join(timeout=1.0)
+            if self._proc.is_alive():
+                self._proc.terminate()
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# Instrumentación ligera del camino caliente: dónde se va el tiempo en entrenamiento y evaluación.
+#
+# Secciones:
+#   env        -> step del entorno (RouletteEnv / VecEnv)
+#   inference  -> predict / muestreo de acciones (en SB3 incluye guardar la transición en el buffer)
+#   gradient   -> model.train(): los gradient_steps tras cada rollout
+#   io         -> volcados del logger, CSV y guardado de modelos
+# Cada muestra cuesta dos perf_counter() y una escritura en un buffer circular NumPy, así que
+# puede quedarse activada en ejecuciones normales. Los percentiles se calculan sobre las últimas
+# `window` muestras de cada sección. El histórico de informes también está acotado (`history`) y
+# export() sólo añade al fichero las instantáneas nuevas (CSV o JSON por líneas).
+from __future__ import annotations
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.vec_env import VecEnvWrapper
+
+SECTIONS = ("env", "inference", "gradient", "io")
+PERCENTILES = (50, 90, 99)
+
+class _Series:
+    __slots__ = ("buf", "count", "total")
+
+    def __init__(self, window: int):
+        self.buf = np.zeros(window, dtype=np.float64)
+        self.count = 0
+        self.total = 0.0
+
+class Timings:
+    def __init__(self, window: int = 4096, history: int = 1024):
+        self.window = int(window)
+        self.series: dict[str, _Series] = {name: _Series(self.window) for name in SECTIONS}
+        self.steps = 0          # pasos de entorno (lo actualiza quien mide)
+        self.t_start = time.perf_counter()
+        self.history: deque[dict] = deque(maxlen=int(history))  # últimas instantáneas
+        self.n_snapshots = 0
+        self._exported: dict[Path, int] = {}  # fichero -> instantáneas ya escritas
+
+    def add(self, name: str, dt: float) -> None:
+        s = self.series.get(name)
+        if s is None:
+            s = self.series[name] = _Series(self.window)
+        s.buf[s.count % self.window] = dt
+        s.count += 1
+        s.total += dt
+
+    @contextmanager
+    def section(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.t_start
+        out = {
+            "elapsed_s": round(elapsed, 6),
+            "steps": int(self.steps),
+            "steps_per_sec": round(self.steps / max(elapsed, 1e-9), 3),
+            "sections": {},
+        }
+        for name, s in self.series.items():
+            if s.count == 0:
+                continue
+            recent = s.buf[:min(s.count, self.window)] * 1e3
+            pct = np.percentile(recent, PERCENTILES)
+            row = {
+                "count": s.count,
+                "total_s": round(s.total, 6),
+                "share": round(s.total / max(elapsed, 1e-9), 4),
+                "mean_ms": round(s.total / s.count * 1e3, 6),
+            }
+            row.update({f"p{p}_ms": round(float(v), 6) for p, v in zip(PERCENTILES, pct)})
+            out["sections"][name] = row
+        return out
+
+    def snapshot(self) -> dict:
+        # Guarda el resumen actual en el histórico (una fila por sección al exportar a CSV)
+        snap = self.summary()
+        self.history.append(snap)
+        self.n_snapshots += 1
+        return snap
+
+    def format(self, snap: dict | None = None) -> str:
+        snap = snap or self.summary()
+        parts = [f"{snap['steps']} pasos  {snap['steps_per_sec']:.0f} pasos/s"]
+        for name, row in snap["sections"].items():
+            parts.append(f"{name} {row['share']*100:.0f}% p50/p99={row['p50_ms']:.3f}/{row['p99_ms']:.3f}ms")
+        return "[prof] " + " | ".join(parts)
+
+    def export(self, path: str | Path) -> Path:
+        # .csv -> una fila por (instantánea, sección); otro sufijo -> un resumen JSON por línea.
+        # La primera llamada reescribe el fichero; las siguientes sólo añaden las instantáneas nuevas.
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.history or self.history[-1]["steps"] != self.steps:
+            self.snapshot()
+        first = path not in self._exported
+        new = min(self.n_snapshots - self._exported.get(path, 0), len(self.history))
+        snaps = list(self.history)[len(self.history) - new:]
+        with path.open("w" if first else "a", newline="", encoding="utf-8") as f:
+            if path.suffix.lower() == ".csv":
+                fields = ["elapsed_s", "steps", "steps_per_sec", "section", "count", "total_s", "share", "mean_ms"]
+                fields += [f"p{p}_ms" for p in PERCENTILES]
+                w = csv.DictWriter(f, fieldnames=fields)
+                if first:
+                    w.writeheader()
+                for snap in snaps:
+                    head = {k: snap[k] for k in ("elapsed_s", "steps", "steps_per_sec")}
+                    for name, row in snap["sections"].items():
+                        w.writerow({**head, "section": name, **row})
+            else:
+                f.writelines(json.dumps(snap) + "\n" for snap in snaps)
+        self._exported[path] = self.n_snapshots
+        return path
+
+class TimedVecEnv(VecEnvWrapper):
+    # Mide step_async + step_wait del VecEnv envuelto (sección "env")
+    def __init__(self, venv, timings: Timings):
+        super().__init__(venv)
+        self.timings = timings
+        self.step_start = 0.0
+        self.step_end = 0.0
+
+    def reset(self):
+        return self.venv.reset()
+
+    def step_async(self, actions) -> None:
+        self.step_start = time.perf_counter()
+        self.venv.step_async(actions)
+
+    def step_wait(self):
+        out = self.venv.step_wait()
+        self.step_end = time.perf_counter()
+        self.timings.add("env", self.step_end - self.step_start)
+        self.timings.steps += self.num_envs
+        return out
+
+class ProfilingCallback(BaseCallback):
+    # Reparte el tiempo de model.learn() en env / inference / gradient / io.
+    # Necesita que el VecEnv de entrenamiento esté envuelto en TimedVecEnv (misma instancia de Timings).
+    def __init__(self, timings: Timings, report_every: int = 10_000, out_path: str | Path | None = None,
+                 verbose: int = 1):
+        super().__init__(verbose)
+        self.timings = timings
+        self.report_every = int(report_every)
+        self.out_path = Path(out_path) if out_path else None
+        self._timed_env: TimedVecEnv | None = None
+        self._mark = 0.0        # fin del último step del entorno (o inicio del rollout)
+        self._io_since_mark = 0.0
+        self._train_start: float | None = None
+        self._next_report = self.report_every
+
+    def _on_training_start(self) -> None:
+        env = self.training_env
+        while not isinstance(env, TimedVecEnv) and hasattr(env, "venv"):
+            env = env.venv
+        if not isinstance(env, TimedVecEnv):
+            raise ValueError("ProfilingCallback necesita el VecEnv envuelto en TimedVecEnv")
+        self._timed_env = env
+
+        # Los volcados del logger cuentan como io (ocurren dentro del rollout)
+        dump = self.logger.dump
+        def timed_dump(step: int = 0) -> None:
+            t0 = time.perf_counter()
+            dump(step)
+            dt = time.perf_counter() - t0
+            self.timings.add("io", dt)
+            self._io_since_mark += dt
+        self.logger.dump = timed_dump
+        self._next_report = self.num_timesteps + self.report_every
+
+    def _close_gradient(self, now: float) -> None:
+        if self._train_start is not None:
+            self.timings.add("gradient", now - self._train_start - self._io_since_mark)
+            self._train_start = None
+
+    def _on_rollout_start(self) -> None:
+        now = time.perf_counter()
+        self._close_gradient(now)
+        self._mark = now
+        self._io_since_mark = 0.0
+
+    def _on_step(self) -> bool:
+        env = self._timed_env
+        self.timings.add("inference", env.step_start - self._mark - self._io_since_mark)
+        self._mark = env.step_end
+        self._io_since_mark = 0.0
+        if self.num_timesteps >= self._next_report:
+            self._next_report += self.report_every
+            self._report()
+        return True
+
+    def _on_rollout_end(self) -> None:
+        self._train_start = time.perf_counter()
+        self._io_since_mark = 0.0
+
+    def _on_training_end(self) -> None:
+        self._close_gradient(time.perf_counter())
+        self._report()
+
+    def _report(self) -> None:
+        snap = self.timings.snapshot()
+        if self.verbose:
+            print(self.timings.format(snap))
+        if self.out_path is not None:
+            self.timings.export(self.out_path)
@@ -0,0 +1,533 @@
+# -*- coding: utf-8 -*-
+# Informe de resultados (PNG + HTML en result_examples/) en memoria constante.
+#
+# Lee por bloques los CSV de episodios de evaluate_policy.py (episode, initial_bankroll,
+# final_bankroll, profit, steps) o de train_sac.py (episode, return, length, final_bankroll) y las
+# trazas paso a paso de trajectory_recorder.py, y lo resume todo en una sola pasada:
+#   MinMaxDownsampler  -> curvas reducidas a primer/último/mínimo/máximo punto por cubo (M4): los
+#                         picos y caídas se conservan; el ancho de cubo se duplica si no cabe la serie
+#   lttb()             -> Largest-Triangle-Three-Buckets sobre esos puntos (--downsample lttb)
+#   StreamingHistogram -> histograma de ancho fijo (lineal o log10) que se re-agrupa al crecer el rango
+#   QuantileBands      -> histograma (paso × log10 bankroll) del que salen las bandas de cuantiles
+# Media, desviación y cuantiles vienen de eval_stats (RunningStats / QuantileSketch). Nada guarda
+# filas: un CSV de 10^8 episodios usa la misma memoria que uno de 10^3.
+#   python report.py --csv eval_large_bankroll.csv --trace traces/eval --name eval
+#   python report.py --csv models/training_episodes.csv --downsample lttb --points 1500
+from __future__ import annotations
+import argparse
+import html
+import json
+import time
+from pathlib import Path
+import numpy as np
+
+from eval_stats import QuantileSketch, RunningStats, wilson_interval
+from trajectory_recorder import iter_trajectory
+
+BAND_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+SUMMARY_QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+N_POCKETS = 37
+
+class StreamingHistogram:
+    # Cubos [k·w, (k+1)·w) con k en k0..k0+bins-1 y w potencia de 2. Si un valor nuevo no cabe, w se
+    # duplica sumando cubos por pares (los conteos siguen siendo exactos, sólo pierden resolución).
+    # Con log=True se agrupa log10(x) y los x <= 0 se cuentan aparte. Con rows > 1 hay un
+    # histograma por fila, todos con los mismos cubos.
+    def __init__(self, bins: int = 128, log: bool = False, rows: int = 1):
+        self.bins = int(bins)
+        self.log = log
+        self.counts = np.zeros((rows, self.bins), dtype=np.int64)
+        self.width = 0.0
+        self.k0 = 0
+        self.nonpositive = 0
+
+    @property
+    def n(self) -> int:
+        return int(self.counts.sum())
+
+    def _coarsen(self) -> None:
+        keys = self.k0 + np.arange(self.bins)
+        k0 = self.k0 // 2
+        counts = np.zeros_like(self.counts)
+        np.add.at(counts, (slice(None), keys // 2 - k0), self.counts)
+        self.counts, self.k0 = counts, k0
+        self.width *= 2.0
+
+    def _fit(self, lo: float, hi: float) -> None:
+        if self.width == 0.0:
+            span = hi - lo
+            base = span / (self.bins - 1) if span > 0 else max(abs(lo), 1.0) / self.bins
+            self.width = 2.0 ** np.ceil(np.log2(base))
+            self.k0 = int(np.floor(lo / self.width))
+        while True:
+            occupied = np.flatnonzero(self.counts.any(axis=0))
+            klo, khi = int(np.floor(lo / self.width)), int(np.floor(hi / self.width))
+            if occupied.size:
+                klo, khi = min(klo, self.k0 + int(occupied[0])), max(khi, self.k0 + int(occupied[-1]))
+            if khi - klo < self.bins:
+                break
+            self._coarsen()
+        if klo < self.k0 or khi >= self.k0 + self.bins:
+            # Desplaza la ventana; lo que sale por un lado son ceros
+            k0 = klo if klo < self.k0 else khi - self.bins + 1
+            self.counts = np.roll(self.counts, self.k0 - k0, axis=1)
+            self.k0 = k0
+
+    def update(self, values, rows=None) -> None:
+        x = np.asarray(values, dtype=np.float64).ravel()
+        keep = np.isfinite(x)
+        if self.log:
+            self.nonpositive += int((keep & (x <= 0)).sum())
+            keep &= x > 0
+        x = x[keep]
+        if x.size == 0:
+            return
+        if self.log:
+            x = np.log10(x)
+        self._fit(float(x.min()), float(x.max()))
+        idx = np.floor(x / self.width).astype(np.int64) - self.k0
+        if rows is None:
+            self.counts[0] += np.bincount(idx, minlength=self.bins)
+        else:
+            flat = np.asarray(rows, dtype=np.int64).ravel()[keep] * self.bins + idx
+            self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+
+    def edges(self) -> np.ndarray:
+        e = (self.k0 + np.arange(self.bins + 1)) * self.width
+        return 10.0 ** e if self.log else e
+
+    def trimmed(self, row: int = 0) -> tuple[np.ndarray, np.ndarray]:
+        # (bordes, conteos) sólo del tramo ocupado, para dibujar
+        c = self.counts[row]
+        nz = np.flatnonzero(c)
+        if nz.size == 0:
+            return np.zeros(0), c[:0]
+        return self.edges()[nz[0]:nz[-1] + 2], c[nz[0]:nz[-1] + 1]
+
+    def row_quantiles(self, qs) -> np.ndarray:
+        # (len(qs), rows), interpolando linealmente dentro del cubo; NaN en filas vacías
+        cum = np.cumsum(self.counts, axis=1)
+        total = cum[:, -1].astype(np.float64)
+        out = np.full((len(qs), self.counts.shape[0]), np.nan)
+        rows = np.arange(self.counts.shape[0])
+        for j, q in enumerate(qs):
+            target = q * total
+            idx = np.minimum((cum < target[:, None]).sum(axis=1), self.bins - 1)
+            before = np.where(idx > 0, cum[rows, idx - 1], 0)
+            inside = np.maximum(self.counts[rows, idx], 1)
+            frac = np.clip((target - before) / inside, 0.0, 1.0)
+            out[j] = (self.k0 + idx + frac) * self.width
+        if self.log:
+            out = 10.0 ** out
+        out[:, total == 0] = np.nan
+        return out
+
+class QuantileBands:
+    # Cuantiles de y frente al paso: filas = cubos de pasos (su ancho se duplica cuando llega un paso
+    # fuera de rango), columnas = StreamingHistogram de y. Cada fila sólo cuenta los episodios que
+    # seguían vivos en ese paso.
+    def __init__(self, time_bins: int = 256, value_bins: int = 256, log: bool = True):
+        self.time_bins = int(time_bins) + int(time_bins) % 2
+        self.hist = StreamingHistogram(value_bins, log=log, rows=self.time_bins)
+        self.step_width = 1
+
+    def update(self, steps, values) -> None:
+        steps = np.asarray(steps, dtype=np.int64)
+        if steps.size == 0:
+            return
+        while int(steps.max()) >= self.step_width * self.time_bins:
+            c = self.hist.counts
+            self.hist.counts = np.concatenate([c[0::2] + c[1::2], np.zeros_like(c[:self.time_bins // 2])])
+            self.step_width *= 2
+        self.hist.update(values, rows=steps // self.step_width)
+
+    def bands(self, qs=BAND_QUANTILES) -> tuple[np.ndarray, np.ndarray]:
+        x = (np.arange(self.time_bins) + 0.5) * self.step_width
+        keep = self.hist.counts.sum(axis=1) > 0
+        return x[keep], self.hist.row_quantiles(qs)[:, keep]
+
+class MinMaxDownsampler:
+    # Por cubo de x guarda el primer, último, mínimo y máximo punto (M4). Con tantos cubos como
+    # píxeles de ancho, la línea dibujada es la misma que con la serie completa. x debe crecer
+    # dentro de cada bloque y entre bloques.
+    FIELDS = ("first", "last", "min", "max")
+
+    def __init__(self, buckets: int = 2048):
+        self.buckets = int(buckets) + int(buckets) % 2
+        self.width = 0.0
+        self.x0 = 0.0
+        self.x = {f: np.zeros(self.buckets) for f in self.FIELDS}
+        self.y = {f: np.zeros(self.buckets) for f in self.FIELDS}
+        self.filled = np.zeros(self.buckets, dtype=bool)
+        self.n = 0
+
+    def _coarsen(self) -> None:
+        half = self.buckets // 2
+        fl = self.filled.reshape(half, 2)
+        pick = {  # columna (0 = cubo par, 1 = impar) que sobrevive al juntar cada par
+            "first": ~fl[:, 0],
+            "last": fl[:, 1],
+            "min": fl[:, 1] & (~fl[:, 0] | (self.y["min"].reshape(half, 2)[:, 1] < self.y["min"].reshape(half, 2)[:, 0])),
+            "max": fl[:, 1] & (~fl[:, 0] | (self.y["max"].reshape(half, 2)[:, 1] > self.y["max"].reshape(half, 2)[:, 0])),
+        }
+        rows = np.arange(half)
+        for f, col in pick.items():
+            col = col.astype(np.int64)
+            for store in (self.x, self.y):
+                merged = np.zeros(self.buckets)
+                merged[:half] = store[f].reshape(half, 2)[rows, col]
+                store[f] = merged
+        filled = np.zeros(self.buckets, dtype=bool)
+        filled[:half] = fl.any(axis=1)
+        self.filled = filled
+        self.width *= 2.0
+
+    def update(self, x, y) -> None:
+        x = np.asarray(x, dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64).ravel()
+        keep = np.isfinite(y)
+        x, y = x[keep], y[keep]
+        if x.size == 0:
+            return
+        if self.width == 0.0:
+            self.x0 = float(x[0])
+            span = float(x[-1]) - self.x0
+            self.width = span / self.buckets if span > 0 else 1.0
+        b = np.floor((x - self.x0) / self.width).astype(np.int64)
+        while b[-1] >= self.buckets:
+            self._coarsen()
+            b //= 2
+
+        # Un segmento por cubo tocado (x creciente -> cubos contiguos)
+        starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+        ends = np.r_[starts[1:], len(b)] - 1
+        seg = b[starts]
+        ids = np.repeat(np.arange(len(starts)), ends - starts + 1)
+        idx = {"first": starts, "last": ends}
+        for f, reduce in (("min", np.minimum), ("max", np.maximum)):
+            ext = reduce.reduceat(y, starts)
+            hit = np.flatnonzero(y == ext[ids])
+            _, first_hit = np.unique(ids[hit], return_index=True)
+            idx[f] = hit[first_hit]
+
+        old = self.filled[seg]
+        for f, i in idx.items():
+            ny = y[i]
+            if f == "first":
+                keep_old = old
+            elif f == "last":
+                keep_old = np.zeros_like(old)
+            elif f == "min":
+                keep_old = old & (self.y[f][seg] <= ny)
+            else:
+                keep_old = old & (self.y[f][seg] >= ny)
+            self.x[f][seg] = np.where(keep_old, self.x[f][seg], x[i])
+            self.y[f][seg] = np.where(keep_old, self.y[f][seg], ny)
+        self.filled[seg] = True
+        self.n += int(x.size)
+
+    def points(self) -> tuple[np.ndarray, np.ndarray]:
+        xs = np.concatenate([self.x[f][self.filled] for f in self.FIELDS])
+        ys = np.concatenate([self.y[f][self.filled] for f in self.FIELDS])
+        xs, first = np.unique(xs, return_index=True)
+        return xs, ys[first]
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> tuple[np.ndarray, np.ndarray]:
+    # Largest-Triangle-Three-Buckets: conserva el primer y el último punto y, en cada cubo, el que
+    # forma el triángulo de mayor área con el punto elegido antes y la media del cubo siguiente
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nhi = edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[hi:nhi].mean(), y[hi:nhi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return x[out], y[out]
+
+class ColumnReport:
+    # Resumen de una columna: media/desviación, cuantiles y histograma
+    def __init__(self, name: str, log: bool = False, bins: int = 128):
+        self.name = name
+        self.stats = RunningStats()
+        self.sketch = QuantileSketch()
+        self.hist = StreamingHistogram(bins, log=log)
+
+    def update(self, values: np.ndarray) -> None:
+        self.stats.update(values)
+        self.sketch.update(values)
+        self.hist.update(values)
+
+    def summary(self) -> dict:
+        s = self.stats
+        # El sketch devuelve el centro del cubo: se recorta a [min, max] (p. ej. pasos <= max_steps)
+        qs = np.clip(self.sketch.quantiles(SUMMARY_QUANTILES), s.min, s.max).tolist() if s.n else []
+        return {"n": s.n, "mean": s.mean, "std": s.std, "min": s.min, "max": s.max,
+                **dict(zip((f"q{q:g}" for q in SUMMARY_QUANTILES), qs))}
+
+def read_episodes(path: Path, chunk: int, bins: int, points: int, initial_bankroll: float | None,
+                  ruin_fraction: float, target_bankroll: float | None) -> dict:
+    import pandas as pd
+    header = set(pd.read_csv(path, nrows=0).columns)
+    if "final_bankroll" not in header:
+        raise ValueError(f"{path}: falta la columna final_bankroll (¿es un CSV de evaluate_policy/train_sac?)")
+    steps_col = "steps" if "steps" in header else "length"
+    value_col = "profit" if "profit" in header else "return"
+    usecols = [c for c in ("initial_bankroll", "final_bankroll", steps_col, value_col) if c in header]
+
+    cols = {"final_bankroll": ColumnReport("final_bankroll", log=True, bins=bins)}
+    for name in (steps_col, value_col):
+        if name in header:
+            cols[name] = ColumnReport(name, bins=bins)
+    curve, mean_curve = MinMaxDownsampler(points), MinMaxDownsampler(points)
+    n, total = 0, 0.0
+    ruined = reached = 0
+    for part in pd.read_csv(path, usecols=usecols, chunksize=chunk, dtype=np.float64):
+        finals = part["final_bankroll"].to_numpy()
+        if finals.size == 0:
+            continue
+        if initial_bankroll is None:
+            initial_bankroll = float(part["initial_bankroll"].iloc[0]) if "initial_bankroll" in part else 100.0
+        for name, col in cols.items():
+            col.update(part[name].to_numpy())
+        x = np.arange(n + 1, n + len(finals) + 1, dtype=np.float64)
+        curve.update(x, finals)
+        mean_curve.update(x, (total + np.cumsum(finals)) / x)
+        total += float(finals.sum())
+        n += len(finals)
+        ruined += int((finals <= ruin_fraction * initial_bankroll).sum())
+        if target_bankroll is not None:
+            reached += int((finals >= target_bankroll).sum())
+
+    if initial_bankroll is None:  # CSV sin episodios
+        initial_bankroll = 100.0
+    out = {"path": str(path), "episodes": n, "initial_bankroll": initial_bankroll, "columns": cols,
+           "curve": curve, "mean_curve": mean_curve, "steps_col": steps_col, "value_col": value_col,
+           "ruin_bankroll": ruin_fraction * initial_bankroll, "ruin_rate": ruined / max(n, 1),
+           "ruin_ci": wilson_interval(ruined, n)}
+    if target_bankroll is not None:
+        out["target_bankroll"] = target_bankroll
+        out["target_rate"] = reached / max(n, 1)
+        out["target_ci"] = wilson_interval(reached, n)
+    return out
+
+def read_trace(path: Path, chunk: int, bins: int, points: int, sample_episodes: int) -> dict:
+    bands = QuantileBands(time_bins=min(points, 512), value_bins=bins)
+    bankroll = ColumnReport("bankroll", log=True, bins=bins)
+    pockets = np.zeros(N_POCKETS, dtype=np.int64)
+    samples: dict[int, MinMaxDownsampler] = {}
+    rows = 0
+    for part in iter_trajectory(path, chunk):
+        steps, values = part["step"], part["bankroll"]
+        bands.update(steps, values)
+        bankroll.update(values)
+        pockets += np.bincount(part["number"].astype(np.int64), minlength=N_POCKETS)[:N_POCKETS]
+        rows += len(values)
+        # Episodios de ejemplo: los primeros `sample_episodes` que aparecen, clave (env, episodio)
+        keys = (part["env"].astype(np.int64) << 32) | part["episode"].astype(np.int64)
+        uniq, first = np.unique(keys, return_index=True)
+        for key in uniq[np.argsort(first)].tolist():
+            if key not in samples:
+                if len(samples) >= sample_episodes:
+                    continue
+                samples[key] = MinMaxDownsampler(points)
+            m = keys == key
+            samples[key].update(steps[m], values[m])
+    if rows == 0:
+        raise ValueError(f"{path}: traza vacía o sin chunk_*.npz / columns.json")
+    return {"path": str(path), "rows": rows, "bands": bands, "bankroll": bankroll, "pockets": pockets,
+            "samples": {f"env {k >> 32} · ep {k & 0xFFFFFFFF}": d for k, d in samples.items()}}
+
+def _curve(d: MinMaxDownsampler, method: str, points: int):
+    x, y = d.points()
+    return lttb(x, y, points) if method == "lttb" else (x, y)
+
+def _hist(ax, col: ColumnReport, title: str) -> None:
+    edges, counts = col.hist.trimmed()
+    if counts.size:
+        ax.stairs(counts, edges, fill=True, alpha=0.6)
+    if col.hist.log:
+        ax.set_xscale("log")
+        if col.hist.nonpositive:
+            title += f"  ({col.hist.nonpositive} valores <= 0)"
+    ax.set_title(title, fontsize=10)
+    ax.set_ylabel("frecuencia")
+
+def _log_scale(ax, values) -> None:
+    # Escala log si el rango abarca más de 3 órdenes de magnitud; symlog si además hay ceros
+    values = np.asarray(values, dtype=np.float64)
+    pos = values[values > 0]
+    if pos.size == 0 or float(pos.max()) / float(pos.min()) <= 1e3:
+        return
+    if float(np.nanmin(values)) > 0:
+        ax.set_yscale("log")
+    else:
+        ax.set_yscale("symlog", linthresh=float(pos.min()))
+        if float(np.nanmin(values)) == 0:
+            ax.set_ylim(bottom=0)
+
+def plot_episodes(ep: dict, out: Path, method: str, points: int) -> Path:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(2, 2, figsize=(16, 9))
+    ax = axes[0, 0]
+    x, y = _curve(ep["curve"], method, points)
+    ax.plot(x, y, lw=0.6, alpha=0.7, label="bankroll final")
+    mx, my = _curve(ep["mean_curve"], method, points)
+    ax.plot(mx, my, lw=1.5, color="C3", label="media acumulada")
+    ax.axhline(ep["initial_bankroll"], color="grey", ls="--", lw=0.8, label="bankroll inicial")
+    if len(y):
+        _log_scale(ax, y)
+    ax.set_title(f"Bankroll final por episodio ({ep['episodes']:,} episodios, {len(x):,} puntos dibujados)",
+                 fontsize=10)
+    ax.set_xlabel("episodio")
+    ax.legend(fontsize=8)
+    cols = ep["columns"]
+    _hist(axes[0, 1], cols["final_bankroll"], "Histograma del bankroll final")
+    _hist(axes[1, 0], cols[ep["steps_col"]], f"Histograma de {ep['steps_col']}")
+    if ep["value_col"] in cols:
+        _hist(axes[1, 1], cols[ep["value_col"]], f"Histograma de {ep['value_col']}")
+    else:
+        axes[1, 1].axis("off")
+    fig.tight_layout()
+    fig.savefig(out, dpi=100)
+    plt.close(fig)
+    return out
+
+def plot_trace(tr: dict, out: Path, method: str, points: int) -> Path:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(16, 9))
+    grid = fig.add_gridspec(2, 2)
+    ax = fig.add_subplot(grid[0, :])
+    x, q = tr["bands"].bands(BAND_QUANTILES)
+    if len(x):
+        ax.fill_between(x, q[0], q[-1], alpha=0.2, color="C0", label="5%–95%")
+        ax.fill_between(x, q[1], q[-2], alpha=0.35, color="C0", label="25%–75%")
+        ax.plot(x, q[2], color="C0", lw=1.5, label="mediana")
+    for i, (name, d) in enumerate(tr["samples"].items()):
+        sx, sy = _curve(d, method, points)
+        ax.plot(sx, sy, lw=0.7, alpha=0.8, color=f"C{(i % 8) + 1}", label=name)
+    if len(x):
+        _log_scale(ax, q[[0, -1]])
+    ax.set_title(f"Bankroll por paso: bandas de cuantiles de los episodios activos ({tr['rows']:,} pasos)",
+                 fontsize=10)
+    ax.set_xlabel("paso")
+    ax.legend(fontsize=8, ncol=2)
+    _hist(fig.add_subplot(grid[1, 0]), tr["bankroll"], "Histograma del bankroll (todos los pasos)")
+    ax = fig.add_subplot(grid[1, 1])
+    pockets = tr["pockets"]
+    ax.bar(np.arange(N_POCKETS), pockets, width=0.8)
+    ax.axhline(pockets.sum() / N_POCKETS, color="grey", ls="--", lw=0.8)
+    ax.set_title("Números ganadores (línea: frecuencia esperada)", fontsize=10)
+    ax.set_xlabel("número")
+    fig.tight_layout()
+    fig.savefig(out, dpi=100)
+    plt.close(fig)
+    return out
+
+def _json_summary(ep: dict | None, tr: dict | None, elapsed: float) -> dict:
+    out = {"elapsed_s": round(elapsed, 3)}
+    if ep is not None:
+        out["episodes"] = {k: v for k, v in ep.items()
+                           if k not in ("columns", "curve", "mean_curve", "steps_col", "value_col")}
+        out["episodes"]["columns"] = {name: col.summary() for name, col in ep["columns"].items()}
+    if tr is not None:
+        out["trace"] = {"path": tr["path"], "rows": tr["rows"], "bankroll": tr["bankroll"].summary(),
+                        "pockets": tr["pockets"].tolist()}
+    return out
+
+def _html_table(columns: dict) -> str:
+    keys = list(next(iter(columns.values())).keys())
+    head = "".join(f"<th>{html.escape(k)}</th>" for k in ["columna"] + keys)
+    body = "".join(
+        "<tr><td>" + html.escape(name) + "</td>" + "".join(f"<td>{v:,.4g}</td>" for v in s.values()) + "</tr>"
+        for name, s in columns.items())
+    return f"<table><tr>{head}</tr>{body}</table>"
+
+def write_html(summary: dict, images: list[Path], out: Path, title: str) -> Path:
+    parts = [f"<h1>{html.escape(title)}</h1>"]
+    ep = summary.get("episodes")
+    if ep is not None:
+        rates = [f"Ruina (bankroll final &lt;= {ep['ruin_bankroll']:,.2f}): {ep['ruin_rate']*100:.3f}% "
+                 f"(IC 95%: {ep['ruin_ci'][0]*100:.3f}% .. {ep['ruin_ci'][1]*100:.3f}%)"]
+        if "target_rate" in ep:
+            rates.append(f"Objetivo {ep['target_bankroll']:,.2f} alcanzado: {ep['target_rate']*100:.3f}% "
+                         f"(IC 95%: {ep['target_ci'][0]*100:.3f}% .. {ep['target_ci'][1]*100:.3f}%)")
+        parts += [f"<h2>Episodios</h2><p>{html.escape(ep['path'])}: {ep['episodes']:,} episodios, "
+                  f"bankroll inicial {ep['initial_bankroll']:,.2f}</p>",
+                  "<p>" + "<br>".join(rates) + "</p>", _html_table(ep["columns"])]
+    tr = summary.get("trace")
+    if tr is not None:
+        parts += [f"<h2>Traza</h2><p>{html.escape(tr['path'])}: {tr['rows']:,} pasos</p>",
+                  _html_table({"bankroll": tr["bankroll"]})]
+    parts += [f'<p><img src="{html.escape(img.name)}" alt="{html.escape(img.stem)}"></p>' for img in images]
+    parts.append(f"<p><small>Generado en {summary['elapsed_s']:.1f}s por report.py</small></p>")
+    style = ("body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;font-size:0.9em}"
+             "td,th{border:1px solid #ccc;padding:0.25em 0.6em;text-align:right}img{max-width:100%}")
+    out.write_text(f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>"
+                   f"<style>{style}</style></head><body>{''.join(parts)}</body></html>", encoding="utf-8")
+    return out
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser()
+    p.add_argument("--csv", type=str, default=None, help="CSV de episodios (evaluate_policy.py o train_sac.py)")
+    p.add_argument("--trace", type=str, default=None, help="directorio de una traza de trajectory_recorder.py")
+    p.add_argument("--out_dir", type=str, default="result_examples")
+    p.add_argument("--name", type=str, default=None, help="prefijo de los ficheros (por defecto, el del CSV/traza)")
+    p.add_argument("--chunk", type=int, default=1 << 18, help="filas por bloque de lectura")
+    p.add_argument("--points", type=int, default=2000, help="cubos por curva (≈ píxeles de ancho)")
+    p.add_argument("--bins", type=int, default=128, help="cubos de los histogramas")
+    p.add_argument("--downsample", choices=["minmax", "lttb"], default="minmax",
+                   help="minmax: primer/último/mín/máx por cubo; lttb: además reduce a --points con LTTB")
+    p.add_argument("--sample_episodes", type=int, default=5, help="episodios de la traza dibujados enteros")
+    p.add_argument("--initial_bankroll", type=float, default=None,
+                   help="si el CSV no tiene la columna initial_bankroll (train_sac.py); por defecto 100")
+    p.add_argument("--ruin_fraction", type=float, default=0.01,
+                   help="ruina = bankroll final <= ruin_fraction · bankroll inicial")
+    p.add_argument("--target_bankroll", type=float, default=None)
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.csv is None and args.trace is None:
+        build_parser().error("indica --csv, --trace o ambos")
+    t0 = time.perf_counter()
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    name = args.name or Path(args.csv or args.trace).stem
+
+    ep = tr = None
+    images = []
+    if args.csv is not None:
+        ep = read_episodes(Path(args.csv), args.chunk, args.bins, args.points, args.initial_bankroll,
+                           args.ruin_fraction, args.target_bankroll)
+        print(f"[report] {ep['episodes']:,} episodios leídos de {args.csv}")
+        images.append(plot_episodes(ep, out_dir / f"{name}_episodes.png", args.downsample, args.points))
+    if args.trace is not None:
+        tr = read_trace(Path(args.trace), args.chunk, args.bins, args.points, args.sample_episodes)
+        print(f"[report] {tr['rows']:,} pasos leídos de {args.trace}")
+        images.append(plot_trace(tr, out_dir / f"{name}_trace.png", args.downsample, args.points))
+
+    summary = _json_summary(ep, tr, time.perf_counter() - t0)
+    summary_path = out_dir / f"{name}_summary.json"
+    summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    page = write_html(summary, images, out_dir / f"{name}_report.html", f"Informe: {name}")
+    for img in images:
+        print(f"[OK] Gráfico -> {img}")
+    print(f"[OK] Resumen -> {summary_path}")
+    print(f"[OK] Informe -> {page} ({summary['elapsed_s']:.1f}s)")
+    return summary
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Configuración de la mesa (sin gymnasium ni torch): la comparten el entorno, el VecEnv,
+# los simuladores y la CLI, que así pueden importarla sin coste de arranque.
+from __future__ import annotations
+from dataclasses import dataclass
+
+OPTION_NAMES = ["RED","BLACK","EVEN","ODD","LOW","HIGH","N7","N17","N23","N32"]
+# Claves de payouts.py equivalentes a OPTION_NAMES (menú por defecto)
+OPTION_KEYS = (("RED", None), ("BLACK", None), ("EVEN", None), ("ODD", None),
+               ("LOW", None), ("HIGH", None), ("STRAIGHT", 7), ("STRAIGHT", 17),
+               ("STRAIGHT", 23), ("STRAIGHT", 32))
+# Variables de hilos de BLAS/OpenMP: fijarlas antes de crear procesos hijos limita sus pools
+BLAS_THREAD_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+# Parámetros que pueden variar por mesa dentro de un mismo VecEnv (curriculum.py)
+TABLE_PARAMS = ("initial_bankroll", "bet_fraction", "max_steps", "bankrupt_threshold", "target_bankroll")
+
+@dataclass
+class RouletteConfig:
+    initial_bankroll: float = 100.0
+    bet_fraction: float = 0.10         # fracción del bankroll apostada por paso
+    max_steps: int = 2000
+    bankrupt_threshold: float = 0.0
+    target_bankroll: float = 200.0
+    random_seed: int | None = None
+    use_wheel_layout: bool = True      # uniforme por bolsillo (rueda europea)
+    bet_options: tuple = OPTION_KEYS   # menú de apuestas (claves de payouts.py)
+    physics_spins: bool = False        # resultados de la física de wheel_physics.py
+    lean: bool = False                 # sin dict `info` por paso (sólo en el paso final)
+    counter_spins: bool = False        # tiradas Philox por (seed, env, episode, step) (spin_source.py)
+    spin_tape: str | None = None       # cinta .npy grabada con spin_source.py (tiene prioridad)
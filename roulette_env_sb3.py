@@ -1,41 +1,61 @@
 # -*- coding: utf-8 -*-
 # Entorno Gymnasium de Ruleta Europea para SB3 (SAC)
 from __future__ import annotations
+from dataclasses import replace
 import numpy as np
 import gymnasium as gym
 from gymnasium import spaces
-from dataclasses import dataclass
-
-# Layout europeo (orden real de la rueda)
-WHEEL_ORDER = [0, 32, 15, 19, 4, 21, 2, 25, 17, 34, 6, 27, 13, 36, 11, 30,
-               8, 23, 10, 5, 24, 16, 33, 1, 20, 14, 31, 9, 22, 18, 29, 7,
-               28, 12, 35, 3, 26]
-RED_NUMBERS = {1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36}
-BLACK_NUMBERS = set(range(1,37)) - RED_NUMBERS
-ZERO = 0
-
-OPTION_NAMES = ["RED","BLACK","EVEN","ODD","LOW","HIGH","N7","N17","N23","N32"]
-
-@dataclass
-class RouletteConfig:
-    initial_bankroll: float = 100.0
-    bet_fraction: float = 0.10         # fracción del bankroll apostada por paso
-    max_steps: int = 2000
-    bankrupt_threshold: float = 0.0
-    target_bankroll: float = 200.0
-    random_seed: int | None = None
-    use_wheel_layout: bool = True      # uniforme por bolsillo (rueda europea)
+
+from payouts import RED_NUMBERS, BLACK_NUMBERS, ZERO, payout_matrix
+# Layout europeo (orden real de la rueda) y física de la bola
+from wheel_physics import WHEEL_ORDER, sample_pockets
+from spin_source import make_spin_source
+from roulette_config import TABLE_PARAMS, RouletteConfig
+# Re-exportados: el menú de apuestas se importaba de aquí antes de existir roulette_config.py
+from roulette_config import OPTION_NAMES, OPTION_KEYS  # noqa: F401
+
+PHYSICS_BLOCK = 4096  # tiradas físicas resueltas por bloque
+SPIN_BLOCK = 512      # pasos pedidos de golpe a la fuente de tiradas (contador / cinta)
+
+def _encode(n: int) -> np.ndarray:
+    # one-hots [zero, red, black, even, odd, low, high] del número n (-1 = sin resultado)
+    row = np.zeros(7, dtype=np.float32)
+    if n >= 0:
+        row[0] = n == ZERO
+        row[1] = n in RED_NUMBERS
+        row[2] = n in BLACK_NUMBERS
+        row[3] = n != ZERO and (n % 2) == 0
+        row[4] = (n % 2) == 1
+        row[5] = 1 <= n <= 18
+        row[6] = 19 <= n <= 36
+    return row
+
+# Fila n+1 = codificación del número n (fila 0 = sin último resultado)
+OBS_TABLE = np.stack([_encode(n) for n in range(-1, 37)])
+
+_NO_INFO: dict = {}  # info compartido de los pasos no terminales en modo lean (no mutar)
 
 class RouletteEnv(gym.Env):
     metadata = {"render_modes": []}
 
-    def __init__(self, config: RouletteConfig | None = None):
+    def __init__(self, config: RouletteConfig | None = None, recorder=None, env_id: int = 0):
         super().__init__()
         self.cfg = config or RouletteConfig()
+        self.recorder = recorder  # TrajectoryRecorder opcional (trajectory_recorder.py)
+        self.env_id = int(env_id)
+        self.episode: int = -1
         self.rng = np.random.default_rng(self.cfg.random_seed)
 
-        # Acción continua → 10 logits (softmax a pesos de apuesta)
-        self.action_space = spaces.Box(low=-8.0, high=8.0, shape=(10,), dtype=np.float32)
+        # Fuente de tiradas por contador o cinta (None = self.rng); se prefetch por bloques de pasos
+        self.spin_source = make_spin_source(self.cfg)
+        self._stream_seed = getattr(self.spin_source, "seed", None)
+        self._spin_buf = np.empty(0, dtype=np.int64)
+        self._spin_start: int = 0
+
+        # Acción continua → un logit por opción del menú (softmax a pesos de apuesta)
+        self.payouts = payout_matrix(self.cfg.bet_options)
+        n_options = self.payouts.shape[1]
+        self.action_space = spaces.Box(low=-8.0, high=8.0, shape=(n_options,), dtype=np.float32)
 
         # Observación: bankroll_norm + one-hots del último resultado
         self.observation_space = spaces.Box(low=0.0, high=1.0, shape=(8,), dtype=np.float32)
@@ -44,51 +64,66 @@ class RouletteEnv(gym.Env):
         self.bankroll: float = float(self.cfg.initial_bankroll)
         self.steps: int = 0
         self.last_n: int = -1  # -1 = no hay último resultado todavía
+        self._physics_buf = np.empty(0, dtype=np.int64)
+        self._physics_pos: int = 0
+        self._next_cfg: RouletteConfig | None = None
+
+    def set_params(self, **params) -> None:
+        # Cambia parámetros de mesa (TABLE_PARAMS) a partir del siguiente episodio; se llama
+        # con env_method desde curriculum.py sin reconstruir el entorno ni el worker
+        unknown = set(params) - set(TABLE_PARAMS)
+        if unknown:
+            raise ValueError(f"Parámetros no modificables: {', '.join(sorted(unknown))}")
+        self._next_cfg = replace(self._next_cfg or self.cfg, **params)
 
     # --------- helpers ----------
     def _spin(self) -> int:
+        if self.spin_source is not None:
+            i = self.steps - 1 - self._spin_start
+            if i >= self._spin_buf.size:
+                self._spin_start = self.steps - 1
+                block = max(min(SPIN_BLOCK, int(self.cfg.max_steps) - self._spin_start), 1)
+                self._spin_buf = self.spin_source.spins(
+                    self.env_id, self.episode, np.arange(self._spin_start, self._spin_start + block),
+                    seed=self._stream_seed)
+                i = 0
+            return int(self._spin_buf[i])
+        if self.cfg.physics_spins:
+            if self._physics_pos >= self._physics_buf.size:
+                self._physics_buf = sample_pockets(PHYSICS_BLOCK, self.rng)
+                self._physics_pos = 0
+            self._physics_pos += 1
+            return int(self._physics_buf[self._physics_pos - 1])
         if not self.cfg.use_wheel_layout:
             return int(self.rng.integers(0, 37))
         idx = int(self.rng.integers(0, len(WHEEL_ORDER)))
         return WHEEL_ORDER[idx]
 
-    def _color(self, n: int) -> str:
-        if n == ZERO: return "zero"
-        return "red" if n in RED_NUMBERS else "black"
-
-    def _parity(self, n: int) -> str:
-        if n == ZERO: return "none"
-        return "even" if (n % 2) == 0 else "odd"
-
-    def _range(self, n: int) -> str:
-        if n == ZERO: return "none"
-        return "low" if (1 <= n <= 18) else "high"
-
     def _obs(self) -> np.ndarray:
         denom = max(self.cfg.initial_bankroll, 1e-9)
-        bnorm = float(np.clip(self.bankroll / denom, 0.0, 1.0))
-        zero = red = black = even = odd = low = high = 0
-        if self.last_n >= 0:
-            c = self._color(self.last_n)
-            p = self._parity(self.last_n)
-            r = self._range(self.last_n)
-            if c == "zero": zero = 1
-            elif c == "red": red = 1
-            elif c == "black": black = 1
-            if p == "even": even = 1
-            elif p == "odd": odd = 1
-            if r == "low": low = 1
-            elif r == "high": high = 1
-        return np.array([bnorm, zero, red, black, even, odd, low, high], dtype=np.float32)
+        obs = np.empty(8, dtype=np.float32)
+        obs[0] = min(max(self.bankroll / denom, 0.0), 1.0)
+        obs[1:] = OBS_TABLE[self.last_n + 1]
+        return obs
 
     # --------- API Gym ----------
     def reset(self, *, seed: int | None = None, options: dict | None = None):
         super().reset(seed=seed)
         if seed is not None:
             self.rng = np.random.default_rng(seed)
+            self._physics_buf = np.empty(0, dtype=np.int64)
+            if self.spin_source is not None:
+                # Semilla nueva = stream nuevo, empezando otra vez por el episodio 0
+                self._stream_seed = seed
+                self.episode = -1
+        self._spin_buf = np.empty(0, dtype=np.int64)
+        self._spin_start = 0
+        if self._next_cfg is not None:
+            self.cfg, self._next_cfg = self._next_cfg, None
         self.bankroll = float(self.cfg.initial_bankroll)
         self.steps = 0
         self.last_n = -1
+        self.episode += 1
         return self._obs(), {}
 
     def step(self, action: np.ndarray):
@@ -99,24 +134,12 @@ class RouletteEnv(gym.Env):
         weights = exps / exps.sum()
 
         stake = float(self.cfg.bet_fraction) * float(self.bankroll)
-        bets = weights * stake
 
         n = self._spin()
         self.last_n = n
 
-        # Payouts: even-money 1:1; straight (7,17,23,32) 35:1
-        win = 0.0
-        if n != ZERO:
-            if n in RED_NUMBERS:   win += float(bets[0]) * 2.0  # RED
-            if n in BLACK_NUMBERS: win += float(bets[1]) * 2.0  # BLACK
-            if (n % 2) == 0:       win += float(bets[2]) * 2.0  # EVEN
-            else:                  win += float(bets[3]) * 2.0  # ODD
-            if 1 <= n <= 18:       win += float(bets[4]) * 2.0  # LOW
-            elif 19 <= n <= 36:    win += float(bets[5]) * 2.0  # HIGH
-        if n == 7:   win += float(bets[6]) * 36.0
-        if n == 17:  win += float(bets[7]) * 36.0
-        if n == 23:  win += float(bets[8]) * 36.0
-        if n == 32:  win += float(bets[9]) * 36.0
+        # Retorno bruto = stake · (pesos · fila n de la matriz de pagos)
+        win = stake * float(weights @ self.payouts[n])
 
         reward = float(win - stake)
         self.bankroll = float(self.bankroll + reward)
@@ -128,6 +151,14 @@ class RouletteEnv(gym.Env):
         )
         truncated = False
 
+        if self.recorder is not None:
+            self.recorder.record(self.env_id, self.episode, self.steps, n, stake, win, self.bankroll, weights)
+
+        if self.cfg.lean:
+            # El paso final sí lleva un dict propio: Monitor/VecEnv lo completan al terminar
+            info = {"bankroll": float(self.bankroll)} if terminated else _NO_INFO
+            return self._obs(), reward, bool(terminated), truncated, info
+
         info = {
             "number": int(n),
             "bankroll": float(self.bankroll),
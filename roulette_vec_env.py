@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+# VecEnv nativo de SB3: N mesas de ruleta en arrays de NumPy (sin bucle Python por mesa)
+from __future__ import annotations
+import inspect
+import time
+from dataclasses import fields
+import numpy as np
+
+from payouts import settle_batch
+from roulette_config import TABLE_PARAMS
+from roulette_env_sb3 import RouletteEnv, RouletteConfig, WHEEL_ORDER, OBS_TABLE
+from spin_source import make_spin_source
+from wheel_physics import sample_pockets
+
+WHEEL_ARRAY = np.array(WHEEL_ORDER, dtype=np.int64)
+
+try:
+    from stable_baselines3.common.monitor import Monitor
+    from stable_baselines3.common.vec_env import VecEnv
+except ImportError:
+    # Sin SB3/torch (p. ej. evaluar un actor .npz por lotes): la parte de la interfaz VecEnv que
+    # usa RouletteVecEnv. Para entrenar hace falta SB3 igualmente.
+    Monitor = None
+
+    class VecEnv:
+        def __init__(self, num_envs: int, observation_space, action_space):
+            self.num_envs = num_envs
+            self.observation_space = observation_space
+            self.action_space = action_space
+            self.reset_infos = [{} for _ in range(num_envs)]
+            self._seeds = [None for _ in range(num_envs)]
+            self._options = [{} for _ in range(num_envs)]
+            self.metadata = {"render_modes": []}
+
+        def _reset_seeds(self) -> None:
+            self._seeds = [None for _ in range(self.num_envs)]
+
+        def _reset_options(self) -> None:
+            self._options = [{} for _ in range(self.num_envs)]
+
+        def _get_indices(self, indices):
+            if indices is None:
+                return range(self.num_envs)
+            return [indices] if isinstance(indices, int) else indices
+
+        def seed(self, seed: int | None = None) -> list:
+            if seed is None:
+                seed = int(np.random.randint(0, np.iinfo(np.uint32).max, dtype=np.uint32))
+            self._seeds = [seed + idx for idx in range(self.num_envs)]
+            return self._seeds
+
+        def step(self, actions: np.ndarray):
+            self.step_async(actions)
+            return self.step_wait()
+
+class RouletteVecEnv(VecEnv):
+    # Mismas reglas que RouletteEnv; episodios con auto-reset y estadísticas estilo Monitor.
+    # Los parámetros de mesa (TABLE_PARAMS) son arrays por sub-entorno: `configs` da una
+    # RouletteConfig por mesa y set_params() los cambia durante el entrenamiento (curriculum.py).
+    def __init__(self, config: RouletteConfig | None = None, n_envs: int = 1, recorder=None,
+                 configs: list[RouletteConfig] | None = None):
+        if configs:
+            config = configs[0]
+            n_envs = len(configs)
+            shared = [f.name for f in fields(RouletteConfig) if f.name not in TABLE_PARAMS]
+            for c in configs[1:]:
+                diff = [name for name in shared if getattr(c, name) != getattr(config, name)]
+                if diff:
+                    raise ValueError(f"Sólo {', '.join(TABLE_PARAMS)} pueden variar por mesa (difiere: {', '.join(diff)})")
+        self.cfg = config or RouletteConfig()
+        self.recorder = recorder  # TrajectoryRecorder opcional (trajectory_recorder.py)
+        probe = RouletteEnv(self.cfg)
+        self.render_mode = None
+        super().__init__(int(n_envs), probe.observation_space, probe.action_space)
+        self.payouts = probe.payouts
+        self.rng = np.random.default_rng(self.cfg.random_seed)
+
+        n = self.num_envs
+        # Parámetros del episodio en curso (atributos) y los que se aplican en el próximo reset
+        self._next_params: dict[str, np.ndarray] = {}
+        for name in TABLE_PARAMS:
+            dtype = np.int64 if name == "max_steps" else np.float64
+            values = [getattr(c, name) for c in configs] if configs else getattr(self.cfg, name)
+            self._next_params[name] = np.broadcast_to(np.asarray(values, dtype=dtype), (n,)).copy()
+            setattr(self, name, self._next_params[name].copy())
+        self._params_pending = False
+        self._obs_scale = 1.0 / np.maximum(self.initial_bankroll, 1e-9)
+        self.bankroll = self.initial_bankroll.copy()
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.last_n = np.full(n, -1, dtype=np.int64)
+        self.ep_return = np.zeros(n, dtype=np.float64)
+        self.episode = np.zeros(n, dtype=np.int64)
+        self.record_mask = np.ones(n, dtype=bool)  # sub-entornos que se graban
+        self._env_ids = np.arange(n)
+
+        # Con contador/cinta la mesa i usa el stream (seed + i, env i), igual que
+        # make_env(cfg, rank=i) de train_sac.py con RouletteEnv independientes
+        self.spin_source = make_spin_source(self.cfg)
+        self._base_seed = getattr(self.spin_source, "seed", None)
+        self.stream_seed = self._default_stream_seeds()
+
+        self.t_start = time.time()
+        self.episode_returns: list[float] = []
+        self.episode_lengths: list[int] = []
+        self._actions: np.ndarray | None = None
+
+    # --------- helpers ----------
+    def _default_stream_seeds(self) -> np.ndarray | None:
+        if self._base_seed is None:
+            return None
+        return self._base_seed + np.arange(self.num_envs, dtype=np.int64)
+
+    def set_streams(self, seed=None, env_ids=None, episodes=None) -> None:
+        # Reasigna (seed, env, episode) de cada mesa tras reset(); p. ej. evaluación en lote con
+        # la mesa i = episodio i del env 0, las mismas tiradas que la evaluación secuencial.
+        n = self.num_envs
+        if seed is not None:
+            self.stream_seed = np.broadcast_to(np.asarray(seed, dtype=np.int64), (n,)).copy()
+        if env_ids is not None:
+            self._env_ids = np.broadcast_to(np.asarray(env_ids, dtype=np.int64), (n,)).copy()
+        if episodes is not None:
+            self.episode[:] = episodes
+
+    def set_params(self, indices=None, **params) -> None:
+        # Nuevos valores por mesa (escalar o array de len(indices)); cada mesa los toma al
+        # empezar su siguiente episodio, así ningún episodio cambia de reglas a medias
+        unknown = set(params) - set(TABLE_PARAMS)
+        if unknown:
+            raise ValueError(f"Parámetros no modificables: {', '.join(sorted(unknown))}")
+        idx = list(self._get_indices(indices))
+        for name, value in params.items():
+            self._next_params[name][idx] = value
+        self._params_pending = True
+
+    def _spin(self) -> np.ndarray:
+        if self.spin_source is not None:
+            return self.spin_source.spins(self._env_ids, self.episode, self.steps - 1,
+                                          seed=self.stream_seed)
+        if self.cfg.physics_spins:
+            return sample_pockets(self.num_envs, self.rng)
+        idx = self.rng.integers(0, 37, size=self.num_envs)
+        if not self.cfg.use_wheel_layout:
+            return idx
+        return WHEEL_ARRAY[idx]
+
+    def _obs(self) -> np.ndarray:
+        obs = np.empty((self.num_envs, 8), dtype=np.float32)
+        obs[:, 0] = np.clip(self.bankroll * self._obs_scale, 0.0, 1.0)
+        obs[:, 1:] = OBS_TABLE[self.last_n + 1]
+        return obs
+
+    def _reset_envs(self, mask: np.ndarray | slice) -> None:
+        if self._params_pending:
+            for name, values in self._next_params.items():
+                getattr(self, name)[mask] = values[mask]
+            self._obs_scale[mask] = 1.0 / np.maximum(self.initial_bankroll[mask], 1e-9)
+            # Pendiente hasta que todas las mesas hayan empezado episodio con los valores nuevos
+            self._params_pending = any(not np.array_equal(getattr(self, name), values)
+                                       for name, values in self._next_params.items())
+        self.episode[mask] += 1
+        self.bankroll[mask] = self.initial_bankroll[mask]
+        self.steps[mask] = 0
+        self.last_n[mask] = -1
+        self.ep_return[mask] = 0.0
+
+    # --------- API VecEnv ----------
+    def reset(self) -> np.ndarray:
+        seed = self._seeds[0]
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+            if self.spin_source is not None:
+                self._base_seed = int(seed)
+        self._reset_seeds()
+        self._reset_options()
+        self._reset_envs(slice(None))
+        self.episode[:] = 0
+        self._env_ids = np.arange(self.num_envs)
+        self.stream_seed = self._default_stream_seeds()
+        return self._obs()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self._actions = actions
+
+    def step_wait(self):
+        self.steps += 1
+
+        logits = np.asarray(self._actions, dtype=np.float64).reshape(self.num_envs, -1).clip(-10, 10)
+        exps = np.exp(logits - logits.max(axis=1, keepdims=True))
+        weights = exps / exps.sum(axis=1, keepdims=True)
+
+        stake = self.bet_fraction * self.bankroll
+        n = self._spin()
+        self.last_n = n
+
+        win = stake * settle_batch(n, weights, self.payouts)
+        reward = win - stake
+        self.bankroll = self.bankroll + reward
+        self.ep_return += reward
+
+        dones = (
+            (self.bankroll <= self.bankrupt_threshold)
+            | (self.bankroll >= self.target_bankroll)
+            | (self.steps >= self.max_steps)
+        )
+
+        if self.recorder is not None:
+            m = self.record_mask
+            self.recorder.record_batch(self._env_ids[m], self.episode[m], self.steps[m], n[m],
+                                       stake[m], win[m], self.bankroll[m], weights[m])
+
+        obs = self._obs()
+        infos: list[dict] = [{} for _ in range(self.num_envs)]
+        done_idx = np.flatnonzero(dones)
+        if done_idx.size:
+            t = round(time.time() - self.t_start, 6)
+            for i in done_idx:
+                ep_r = float(self.ep_return[i])
+                ep_l = int(self.steps[i])
+                self.episode_returns.append(ep_r)
+                self.episode_lengths.append(ep_l)
+                infos[i] = {
+                    "terminal_observation": obs[i].copy(),
+                    "bankroll": float(self.bankroll[i]),
+                    "TimeLimit.truncated": False,
+                    "episode": {"r": round(ep_r, 6), "l": ep_l, "t": t},
+                }
+            self._reset_envs(done_idx)
+            obs[done_idx] = self._obs()[done_idx]
+
+        return obs, reward.astype(np.float32), dones, infos
+
+    def close(self) -> None:
+        pass
+
+    def get_episode_rewards(self) -> list[float]:
+        return self.episode_returns
+
+    def get_episode_lengths(self) -> list[int]:
+        return self.episode_lengths
+
+    def get_attr(self, attr_name: str, indices=None) -> list:
+        value = getattr(self, attr_name)
+        idx = list(self._get_indices(indices))
+        if isinstance(value, np.ndarray) and value.shape[:1] == (self.num_envs,):
+            return [value[i] for i in idx]
+        return [value for _ in idx]
+
+    def set_attr(self, attr_name: str, value, indices=None) -> None:
+        current = getattr(self, attr_name)
+        if isinstance(current, np.ndarray) and current.shape[:1] == (self.num_envs,):
+            current[list(self._get_indices(indices))] = value
+        else:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs) -> list:
+        # Los métodos por mesa (con `indices`, como set_params) se llaman una vez con todos los
+        # índices (admiten arrays por mesa); el resto actúa sobre el lote y su resultado se repite
+        method = getattr(self, method_name)
+        idx = list(self._get_indices(indices))
+        if "indices" in inspect.signature(method).parameters:
+            result = method(*method_args, indices=idx, **method_kwargs)
+        else:
+            result = method(*method_args, **method_kwargs)
+        return [result] * len(idx)
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> list[bool]:
+        # Las estadísticas de episodio se emiten con el mismo formato que Monitor
+        return [wrapper_class is Monitor for _ in self._get_indices(indices)]
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# Simulador Monte Carlo vectorizado de estrategias clásicas (flat, Martingala, Fibonacci, Kelly
+# de fracción fija) con la rueda, los pagos y las reglas de terminación de RouletteEnv.
+from __future__ import annotations
+import argparse
+import csv
+import time
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+
+from payouts import payout_matrix
+from roulette_config import RouletteConfig
+from wheel_physics import WHEEL_ORDER
+
+WHEEL = np.array(WHEEL_ORDER, dtype=np.int64)
+STRATEGIES = ("flat", "martingale", "fibonacci", "kelly")
+QUANTILES = (0.05, 0.25, 0.50, 0.75, 0.95)
+
+_MAX_LEVEL = 64  # progresiones acotadas (la apuesta ya queda limitada por el bankroll)
+_FIB = np.array([1.0, 1.0] + [0.0] * (_MAX_LEVEL - 1))
+for _i in range(2, _MAX_LEVEL + 1):
+    _FIB[_i] = _FIB[_i - 1] + _FIB[_i - 2]
+_POW2 = 2.0 ** np.arange(_MAX_LEVEL + 1)
+
+@dataclass
+class SimulationResult:
+    strategy: str
+    final_bankroll: np.ndarray   # (paths,)
+    steps: np.ndarray            # (paths,) pasos hasta terminar
+    reached_target: np.ndarray   # (paths,) bool
+    ruined: np.ndarray           # (paths,) bool
+    elapsed: float
+
+    @property
+    def ruin_probability(self) -> float:
+        return float(self.ruined.mean())
+
+    @property
+    def target_probability(self) -> float:
+        return float(self.reached_target.mean())
+
+    @property
+    def time_to_target(self) -> np.ndarray:
+        return self.steps[self.reached_target]
+
+    def final_quantiles(self, qs=QUANTILES) -> dict[float, float]:
+        return dict(zip(qs, np.quantile(self.final_bankroll, qs).tolist()))
+
+    def time_to_target_quantiles(self, qs=QUANTILES) -> dict[float, float]:
+        ttt = self.time_to_target
+        if ttt.size == 0:
+            return {q: float("nan") for q in qs}
+        return dict(zip(qs, np.quantile(ttt, qs).tolist()))
+
+    def summary_row(self) -> dict:
+        row = {
+            "strategy": self.strategy,
+            "paths": int(self.final_bankroll.size),
+            "ruin_prob": self.ruin_probability,
+            "target_prob": self.target_probability,
+            "mean_final": float(self.final_bankroll.mean()),
+            "mean_steps": float(self.steps.mean()),
+        }
+        row.update({f"final_p{int(q*100):02d}": v for q, v in self.final_quantiles().items()})
+        row.update({f"ttt_p{int(q*100):02d}": v for q, v in self.time_to_target_quantiles().items()})
+        return row
+
+def _stake(strategy: str, bank: np.ndarray, level: np.ndarray, unit: float, fraction: float) -> np.ndarray:
+    if strategy == "flat":
+        stake = np.full_like(bank, unit)
+    elif strategy == "martingale":
+        stake = unit * _POW2[level]
+    elif strategy == "fibonacci":
+        stake = unit * _FIB[level]
+    elif strategy == "kelly":
+        stake = fraction * bank
+    else:
+        raise ValueError(f"Estrategia desconocida: {strategy!r} (opciones: {', '.join(STRATEGIES)})")
+    return np.minimum(stake, bank)  # no se puede apostar más de lo que hay
+
+def _next_level(strategy: str, level: np.ndarray, won: np.ndarray) -> np.ndarray:
+    if strategy == "martingale":   # dobla tras perder, vuelve a 1 tras ganar
+        return np.where(won, 0, np.minimum(level + 1, _MAX_LEVEL))
+    if strategy == "fibonacci":    # avanza uno tras perder, retrocede dos tras ganar
+        return np.where(won, np.maximum(level - 2, 0), np.minimum(level + 1, _MAX_LEVEL))
+    return level
+
+def simulate(strategy: str, cfg: RouletteConfig, paths: int, bet=("RED", None),
+             unit: float | None = None, chunk: int = 65_536, seed: int | None = None,
+             ruin_fraction: float = 0.01) -> SimulationResult:
+    # `unit` = apuesta base de flat/Martingala/Fibonacci (por defecto bet_fraction·bankroll inicial);
+    # Kelly apuesta bet_fraction del bankroll actual en cada tirada. Ruina = bankroll <=
+    # ruin_fraction · bankroll inicial (como evaluate_policy/report.py): Kelly tiende a 0 sin
+    # llegar nunca a bankrupt_threshold.
+    gross = payout_matrix([bet])[WHEEL, 0]  # retorno bruto por casilla de la rueda
+    rng = np.random.default_rng(cfg.random_seed if seed is None else seed)
+    unit = float(cfg.bet_fraction * cfg.initial_bankroll if unit is None else unit)
+    fraction = float(cfg.bet_fraction)
+    thr = max(float(cfg.bankrupt_threshold), ruin_fraction * float(cfg.initial_bankroll))
+    target = float(cfg.target_bankroll)
+    horizon = max(int(cfg.max_steps), 1)  # como el env: al menos una tirada por episodio
+
+    final = np.empty(paths, dtype=np.float64)
+    steps = np.empty(paths, dtype=np.int64)
+    t0 = time.perf_counter()
+    for start in range(0, paths, chunk):
+        m = min(chunk, paths - start)
+        # Estado compactado: sólo las trayectorias vivas (idx = posición en el chunk)
+        b = np.full(m, float(cfg.initial_bankroll))
+        lv = np.zeros(m, dtype=np.int64)
+        idx = np.arange(m)
+        out_final = final[start:start + m]
+        out_steps = steps[start:start + m]
+        for t in range(1, horizon + 1):
+            stake = _stake(strategy, b, lv, unit, fraction)
+            g = gross[rng.integers(0, 37, size=b.size, dtype=np.uint8)]
+            b += stake * (g - 1.0)
+            lv = _next_level(strategy, lv, g > 0)
+            if t == horizon:
+                out_final[idx] = b
+                out_steps[idx] = t
+                break
+            done = (b <= thr) | (b >= target)
+            if done.any():
+                out_final[idx[done]] = b[done]
+                out_steps[idx[done]] = t
+                keep = ~done
+                b, lv, idx = b[keep], lv[keep], idx[keep]
+                if b.size == 0:
+                    break
+    elapsed = time.perf_counter() - t0
+    return SimulationResult(
+        strategy=strategy,
+        final_bankroll=final,
+        steps=steps,
+        reached_target=final >= target,
+        ruined=final <= thr,
+        elapsed=elapsed,
+    )
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser()
+    p.add_argument("--strategy", choices=STRATEGIES + ("all",), default="all")
+    p.add_argument("--paths", type=int, default=1_000_000)
+    p.add_argument("--bankroll", type=float, default=100.0)
+    p.add_argument("--bet_fraction", type=float, default=0.10)
+    p.add_argument("--unit", type=float, default=None, help="apuesta base (flat/martingale/fibonacci)")
+    p.add_argument("--bet", type=str, default="RED", help="apuesta even-money o STRAIGHT:<n>")
+    p.add_argument("--max_steps", type=int, default=2_000)
+    p.add_argument("--target_bankroll", type=float, default=200.0)
+    p.add_argument("--bankrupt_threshold", type=float, default=0.0)
+    p.add_argument("--ruin_fraction", type=float, default=0.01,
+                   help="ruina = bankroll <= ruin_fraction · bankroll inicial")
+    p.add_argument("--seed", type=int, default=123)
+    p.add_argument("--chunk", type=int, default=65_536,
+                   help="trayectorias por bloque (bloques pequeños caben en caché)")
+    p.add_argument("--out_csv", type=str, default=None)
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    kind, _, arg = args.bet.upper().partition(":")
+    bet = (kind, int(arg) if arg else None)
+    cfg = RouletteConfig(
+        initial_bankroll=args.bankroll,
+        bet_fraction=args.bet_fraction,
+        max_steps=args.max_steps,
+        bankrupt_threshold=args.bankrupt_threshold,
+        target_bankroll=args.target_bankroll,
+        random_seed=args.seed,
+    )
+
+    rows = []
+    for strategy in (STRATEGIES if args.strategy == "all" else (args.strategy,)):
+        res = simulate(strategy, cfg, args.paths, bet=bet, unit=args.unit, chunk=args.chunk,
+                       ruin_fraction=args.ruin_fraction)
+        row = res.summary_row()
+        rows.append(row)
+        print(f"{strategy:>10}: ruina={row['ruin_prob']:.4f}  objetivo={row['target_prob']:.4f}  "
+              f"bankroll final p05/p50/p95={row['final_p05']:.2f}/{row['final_p50']:.2f}/{row['final_p95']:.2f}  "
+              f"t_objetivo p50={row['ttt_p50']:.0f}  ({res.elapsed:.1f}s)")
+
+    if args.out_csv:
+        with Path(args.out_csv).open("w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=list(rows[0]))
+            w.writeheader()
+            w.writerows(rows)
+        print(f"[OK] Resumen -> {args.out_csv}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Fuentes de tiradas reproducibles: generador basado en contador (Philox4x32-10) y cintas grabadas.
+#
+# Cada tirada queda determinada por (seed, env, episode, step): no depende del orden en que se
+# consumen los números ni de cuántos workers haya, así que dos políticas (o dos configuraciones
+# de vec env) ven exactamente la misma secuencia de resultados.
+#   CounterSpinSource -> Philox4x32-10 vectorizado en NumPy; clave = seed, contador = (step, episode, env)
+#   TapeSpinSource    -> cinta .npy (envs, episodes, steps) o (episodes, steps) abierta con mmap
+# Las dos exponen spins(env, episode, step) sobre arrays, así que el entorno puede pedir un bloque
+# entero de pasos de golpe (prefetch) y el VecEnv una tirada para todas sus mesas.
+from __future__ import annotations
+import argparse
+from pathlib import Path
+import numpy as np
+
+from wheel_physics import WHEEL, launch_from_uniforms, resolve
+
+_M0, _M1 = np.uint64(0xD2511F53), np.uint64(0xCD9E8D57)
+_W0, _W1 = np.uint64(0x9E3779B9), np.uint64(0xBB67AE85)
+_MASK32 = np.uint64(0xFFFFFFFF)
+_SHIFT32 = np.uint64(32)
+
+def philox4x32(c0, c1, c2, c3, k0, k1, rounds: int = 10):
+    # Philox4x32 (Salmon et al., Random123) sobre arrays; devuelve las 4 palabras de 32 bits
+    c0, c1, c2, c3 = (np.asarray(c, dtype=np.uint64) & _MASK32 for c in (c0, c1, c2, c3))
+    k0 = np.asarray(k0, dtype=np.uint64) & _MASK32
+    k1 = np.asarray(k1, dtype=np.uint64) & _MASK32
+    for r in range(rounds):
+        p0 = _M0 * c0
+        p1 = _M1 * c2
+        c0, c1, c2, c3 = ((p1 >> _SHIFT32) ^ c1 ^ k0, p1 & _MASK32,
+                          (p0 >> _SHIFT32) ^ c3 ^ k1, p0 & _MASK32)
+        if r + 1 < rounds:
+            k0 = (k0 + _W0) & _MASK32
+            k1 = (k1 + _W1) & _MASK32
+    return c0, c1, c2, c3
+
+class CounterSpinSource:
+    def __init__(self, seed: int | None = None, physics: bool = False, use_wheel_layout: bool = True):
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy) & 0xFFFFFFFFFFFFFFFF
+        self.seed = int(seed)
+        self.physics = physics
+        self.use_wheel_layout = use_wheel_layout
+
+    def spins(self, env, episode, step, seed=None) -> np.ndarray:
+        # Número ganador de cada (env, episode, step); admite broadcasting y una semilla por fila
+        seed = np.asarray(self.seed if seed is None else seed, dtype=np.uint64)
+        env, episode, step = np.broadcast_arrays(np.asarray(env), np.asarray(episode), np.asarray(step))
+        words = philox4x32(step, episode, env, 0, seed & _MASK32, seed >> _SHIFT32)
+        if self.physics:
+            # las 4 palabras = 4 uniformes de lanzamiento (ángulos y velocidades)
+            u = np.stack([w.astype(np.float64) for w in words], axis=-1).reshape(-1, 4) / 2.0**32
+            return resolve(launch_from_uniforms(u)).reshape(step.shape)
+        # multiplicación-desplazamiento a [0, 37): sesgo < 37/2^32
+        idx = ((words[0] * np.uint64(37)) >> _SHIFT32).astype(np.int64)
+        return WHEEL[idx] if self.use_wheel_layout else idx
+
+class TapeSpinSource:
+    def __init__(self, path: str | Path):
+        tape = np.load(path, mmap_mode="r")
+        if tape.ndim == 2:
+            tape = tape[None]
+        if tape.ndim != 3:
+            raise ValueError(f"Cinta con forma no válida {tape.shape}: se espera (envs, episodes, steps)")
+        self.path = Path(path)
+        self.tape = tape
+
+    def spins(self, env, episode, step, seed=None) -> np.ndarray:
+        # seed se ignora: la cinta ya fija los resultados
+        n_env, n_ep, n_steps = self.tape.shape
+        step = np.asarray(step)
+        if step.size and int(step.max()) >= n_steps:
+            raise IndexError(f"La cinta {self.path} sólo tiene {n_steps} pasos por episodio")
+        env, episode, step = np.broadcast_arrays(np.asarray(env) % n_env, np.asarray(episode) % n_ep, step)
+        return self.tape[env, episode, step].astype(np.int64)
+
+def make_spin_source(cfg):
+    # Fuente según RouletteConfig (None = RNG clásico del entorno)
+    if cfg.spin_tape:
+        return TapeSpinSource(cfg.spin_tape)
+    if cfg.counter_spins:
+        return CounterSpinSource(cfg.random_seed, physics=cfg.physics_spins,
+                                 use_wheel_layout=cfg.use_wheel_layout)
+    return None
+
+def record_tape(path: str | Path, source, envs: int, episodes: int, steps: int,
+                block_episodes: int = 256) -> Path:
+    # Graba una cinta (envs, episodes, steps) uint8 por bloques, sin cargarla entera en memoria
+    path = Path(path)
+    tape = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=(envs, episodes, steps))
+    step_idx = np.arange(steps)
+    for e in range(envs):
+        for start in range(0, episodes, block_episodes):
+            eps = np.arange(start, min(start + block_episodes, episodes))
+            tape[e, eps] = source.spins(e, eps[:, None], step_idx[None, :])
+    tape.flush()
+    del tape
+    return path
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Graba una cinta de tiradas reproducible (.npy)")
+    p.add_argument("--out", type=str, required=True)
+    p.add_argument("--envs", type=int, default=1)
+    p.add_argument("--episodes", type=int, default=1_000)
+    p.add_argument("--steps", type=int, default=2_000)
+    p.add_argument("--seed", type=int, default=123)
+    p.add_argument("--physics", action="store_true", help="resultados de wheel_physics")
+    args = p.parse_args()
+
+    src = CounterSpinSource(args.seed, physics=args.physics)
+    out = record_tape(args.out, src, args.envs, args.episodes, args.steps)
+    print(f"[OK] Cinta {args.envs}×{args.episodes}×{args.steps} -> {out}")
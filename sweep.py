@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# Barrido de hiperparámetros y semillas sobre train_sac.train en un pool de procesos.
+#
+# Especificación (JSON o flags):
+#   {"base":   {"timesteps": 200000, "n_envs": 8},
+#    "grid":   {"seed": [1, 2, 3], "gamma": [0.99, 0.999]},
+#    "random": {"trials": 4, "params": {"learning_rate": {"loguniform": [1e-4, 1e-3]},
+#                                       "tau": {"uniform": [0.005, 0.05]},
+#                                       "gradient_steps": {"choice": [16, 32, 64]}}}}
+# Cada punto de la rejilla se combina con `random.trials` muestras aleatorias. Cada trial usa
+# --threads hilos de torch/BLAS y corre en su propio proceso; cada --eval_every pasos se evalúa
+# con tiradas fijas (contador Philox) y se detiene si queda por debajo del cuantil --stop_quantile
+# de los demás trials en la misma evaluación (regla de la mediana).
+# Salida en --out_dir: trial_XXX/ (modelo, CSV, log), results.csv, all_episodes.csv, sweep.json.
+#   python sweep.py --grid seed=1,2,3 --set timesteps=100000 --workers 3   (o: python cli.py sweep ...)
+from __future__ import annotations
+import argparse
+import contextlib
+import csv
+import itertools
+import json
+import multiprocessing as mp
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import numpy as np
+
+from roulette_config import BLAS_THREAD_VARS, RouletteConfig
+
+SWEEP_DEFAULTS = {"verbose": 0}
+EVAL_SEED = 10_007  # mismas tiradas en las evaluaciones intermedias de todos los trials
+
+def _parse_value(text: str):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+def _sample(dist: dict, rng: np.random.Generator):
+    (kind, arg), = dist.items()
+    if kind == "choice":
+        return arg[int(rng.integers(len(arg)))]
+    if kind == "uniform":
+        return float(rng.uniform(*arg))
+    if kind == "loguniform":
+        return float(np.exp(rng.uniform(np.log(arg[0]), np.log(arg[1]))))
+    if kind == "int":
+        return int(rng.integers(arg[0], arg[1] + 1))
+    raise ValueError(f"Distribución desconocida: {kind!r} (choice, uniform, loguniform, int)")
+
+def expand_spec(spec: dict, seed: int = 0) -> list[dict]:
+    # Lista de parámetros por trial: base + punto de la rejilla + muestra aleatoria
+    rng = np.random.default_rng(seed)
+    grid = spec.get("grid", {})
+    points = [dict(zip(grid, values)) for values in itertools.product(*grid.values())] or [{}]
+    rand = spec.get("random", {})
+    n_random = int(rand.get("trials", 1)) if rand.get("params") else 1
+    trials = []
+    for point in points:
+        for _ in range(n_random):
+            sampled = {k: _sample(d, rng) for k, d in rand.get("params", {}).items()}
+            trials.append({**spec.get("base", {}), **point, **sampled})
+    return trials
+
+def median_stopping_callback(trial: int, cfg: RouletteConfig, shared, eval_every: int, episodes: int,
+                             min_trials: int = 3, quantile: float = 0.5, verbose: int = 0):
+    # SB3 (y torch) sólo se importan en el proceso del trial, no al cargar el módulo (--help)
+    from stable_baselines3.common.callbacks import BaseCallback
+
+    class MedianStoppingCallback(BaseCallback):
+        # Evalúa cada `eval_every` pasos y para el trial si va claramente por detrás de los demás
+        def __init__(self):
+            super().__init__(verbose)
+            self.trial = trial
+            self.cfg = cfg
+            self.shared = shared      # lista compartida (Manager) de (trial, evaluación, score)
+            self.eval_every = int(eval_every)
+            self.episodes = int(episodes)
+            self.min_trials = int(min_trials)
+            self.quantile = float(quantile)
+            self.history: list[tuple[int, float]] = []
+            self.pruned = False
+            self._next = self.eval_every
+
+        def _on_step(self) -> bool:
+            if self.eval_every <= 0 or self.num_timesteps < self._next:
+                return True
+            self._next += self.eval_every
+            from evaluate_policy import run_episodes_batched
+            _, _, finals = run_episodes_batched(self.model, self.cfg, self.episodes)
+            score = float(np.mean(finals))
+            k = len(self.history)
+            self.history.append((self.num_timesteps, score))
+            self.shared.append((self.trial, k, score))
+            others = [s for t, kk, s in list(self.shared) if kk == k and t != self.trial]
+            if len(others) >= self.min_trials and score < float(np.quantile(others, self.quantile)):
+                self.pruned = True
+                print(f"[sweep] trial {self.trial} detenido en {self.num_timesteps} pasos "
+                      f"(score {score:.2f} < q{self.quantile:.2f} de {len(others)} trials)")
+                return False
+            return True
+
+    return MedianStoppingCallback()
+
+def run_trial(trial: dict, shared) -> dict:
+    from train_sac import build_parser as train_parser, set_num_threads, train
+    set_num_threads(trial["threads"])
+    out_dir = Path(trial["out_dir"])
+    out_dir.mkdir(parents=True, exist_ok=True)
+    args = train_parser().parse_args([])
+    for key, value in {**SWEEP_DEFAULTS, **trial["params"]}.items():
+        if not hasattr(args, key):
+            raise ValueError(f"Parámetro desconocido para train_sac: {key!r}")
+        setattr(args, key, value)
+    args.out_dir = str(out_dir)
+    args.torch_threads = trial["threads"]
+
+    cfg = RouletteConfig(
+        initial_bankroll=100.0,
+        bet_fraction=args.bet_fraction,
+        max_steps=args.max_steps,
+        target_bankroll=args.target_bankroll,
+        random_seed=EVAL_SEED,
+        counter_spins=True,
+        lean=True,
+    )
+    stopper = median_stopping_callback(trial["id"], cfg, shared, trial["eval_every"], trial["eval_episodes"],
+                                       trial["min_trials"], trial["stop_quantile"])
+    t0 = time.perf_counter()
+    with (out_dir / "train.log").open("w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        result = train(args, callbacks=[stopper])
+    result.update({
+        "trial": trial["id"],
+        "status": "pruned" if stopper.pruned else "done",
+        "wall_s": round(time.perf_counter() - t0, 3),
+        "last_eval": stopper.history[-1][1] if stopper.history else None,
+    })
+    return result
+
+def write_results(out_dir: Path, trials: list[dict], results: dict[int, dict]) -> Path:
+    param_keys = sorted({k for t in trials for k in t["params"]})
+    metric_keys = ["status", "mean_return", "std_return", "mean_final_bankroll", "last_eval",
+                   "trained_steps", "elapsed_s", "wall_s", "error"]
+    rows = []
+    for t in trials:
+        res = results.get(t["id"], {"status": "missing"})
+        res = {**res, "trained_steps": res.get("timesteps")}
+        rows.append({"trial": t["id"], **{k: t["params"].get(k) for k in param_keys},
+                     **{k: res.get(k) for k in metric_keys}})
+    rows.sort(key=lambda r: -np.inf if r["mean_final_bankroll"] is None else -r["mean_final_bankroll"])
+
+    table = out_dir / "results.csv"
+    with table.open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=["trial", *param_keys, *metric_keys])
+        w.writeheader()
+        w.writerows(rows)
+
+    # CSV de evaluación de cada trial en una sola tabla (columna trial + parámetros)
+    with (out_dir / "all_episodes.csv").open("w", newline="", encoding="utf-8") as f:
+        w = None
+        for t in trials:
+            eval_csv = results.get(t["id"], {}).get("eval_csv")
+            if not eval_csv or not Path(eval_csv).exists():
+                continue
+            with Path(eval_csv).open(newline="", encoding="utf-8") as src:
+                for row in csv.DictReader(src):
+                    row = {"trial": t["id"], **{k: t["params"].get(k) for k in param_keys}, **row}
+                    if w is None:
+                        w = csv.DictWriter(f, fieldnames=list(row))
+                        w.writeheader()
+                    w.writerow(row)
+    return table
+
+def run_sweep(spec: dict, out_dir: Path, workers: int, threads: int, eval_every: int, eval_episodes: int,
+              min_trials: int, stop_quantile: float, seed: int = 0) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    trials = [
+        {"id": i, "params": params, "out_dir": str(out_dir / f"trial_{i:03d}"), "threads": threads,
+         "eval_every": eval_every, "eval_episodes": eval_episodes, "min_trials": min_trials,
+         "stop_quantile": stop_quantile}
+        for i, params in enumerate(expand_spec(spec, seed))
+    ]
+    print(f"[sweep] {len(trials)} trials, {workers} procesos × {threads} hilos -> {out_dir}")
+
+    # Los hijos heredan el límite de hilos de BLAS/OpenMP antes de importar torch
+    for var in BLAS_THREAD_VARS:
+        os.environ[var] = str(threads)
+
+    results: dict[int, dict] = {}
+    t0 = time.perf_counter()
+    with mp.Manager() as manager:
+        shared = manager.list()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            futures = {pool.submit(run_trial, t, shared): t for t in trials}
+            for fut in as_completed(futures):
+                t = futures[fut]
+                try:
+                    res = fut.result()
+                except Exception as exc:
+                    res = {"trial": t["id"], "status": "failed", "error": f"{type(exc).__name__}: {exc}"}
+                    traceback.print_exception(exc)
+                results[t["id"]] = res
+                score = res.get("mean_final_bankroll")
+                score_txt = "-" if score is None else f"{score:.2f}"
+                print(f"[sweep] {len(results)}/{len(trials)} trial {t['id']} {res['status']}  "
+                      f"bankroll final medio={score_txt}  {t['params']}")
+
+    table = write_results(out_dir, trials, results)
+    (out_dir / "sweep.json").write_text(json.dumps({
+        "spec": spec, "workers": workers, "threads": threads, "elapsed_s": round(time.perf_counter() - t0, 3),
+        "trials": [{**t, "result": results.get(t["id"])} for t in trials],
+    }, indent=2, default=str), encoding="utf-8")
+    return table
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser()
+    p.add_argument("--spec", type=str, default=None, help="JSON con base/grid/random")
+    p.add_argument("--grid", action="append", default=[], metavar="CLAVE=v1,v2",
+                   help="eje de la rejilla (repetible), p. ej. --grid seed=1,2,3")
+    p.add_argument("--set", action="append", default=[], metavar="CLAVE=valor",
+                   help="parámetro fijo de train_sac para todos los trials")
+    p.add_argument("--random_trials", type=int, default=None, help="muestras aleatorias por punto de la rejilla")
+    p.add_argument("--out_dir", type=str, default="sweeps/sweep")
+    p.add_argument("--workers", type=int, default=None, help="procesos en paralelo (por defecto núcleos / threads)")
+    p.add_argument("--threads", type=int, default=1, help="hilos de torch/BLAS por trial")
+    p.add_argument("--eval_every", type=int, default=50_000, help="pasos entre evaluaciones intermedias (0 = sin parada)")
+    p.add_argument("--eval_episodes", type=int, default=32)
+    p.add_argument("--min_trials", type=int, default=3, help="trials necesarios para comparar en una evaluación")
+    p.add_argument("--stop_quantile", type=float, default=0.5, help="se para por debajo de este cuantil")
+    p.add_argument("--seed", type=int, default=0, help="semilla del muestreo aleatorio")
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    spec = json.loads(Path(args.spec).read_text(encoding="utf-8")) if args.spec else {}
+    spec.setdefault("base", {})
+    spec.setdefault("grid", {})
+    for item in args.set:
+        key, _, value = item.partition("=")
+        spec["base"][key] = _parse_value(value)
+    for item in args.grid:
+        key, _, values = item.partition("=")
+        spec["grid"][key] = [_parse_value(v) for v in values.split(",")]
+    if args.random_trials is not None:
+        spec.setdefault("random", {})["trials"] = args.random_trials
+
+    workers = args.workers or max((os.cpu_count() or 1) // max(args.threads, 1), 1)
+    table = run_sweep(spec, Path(args.out_dir), workers, args.threads, args.eval_every, args.eval_episodes,
+                      args.min_trials, args.stop_quantile, seed=args.seed)
+    print(f"[OK] Resultados -> {table}")
+    return table
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+# Reglas de una mesa de ruleta europea, sin pygame ni variables globales.
+#
+#   Seat       -> un jugador sentado: bankroll entero, bet_slip {clave: importe} y curva de bankroll
+#   Table      -> rueda y bola (wheel_physics), asientos, "no va más", lanzamiento, liquidación con
+#                 PAYOUT_MATRIX y estadísticas de la mesa. main.py juega en una mesa de un asiento.
+#   TableGroup -> muchas mesas cuya física comparte un SpinState (una fila por mesa): un único
+#                 physics.step() por tick avanza todas las que giran (table_server.py).
+# Tirada: place_bets() -> request_spin() de los jugadores -> launch_spin() cobra los slips ->
+# step() hasta que la bola se asienta -> settle(n) paga y devuelve {jugador: retorno bruto}.
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+import wheel_physics as physics
+from payouts import BET_INDEX, PAYOUT_MATRIX, settle_slip
+
+BANKROLL_START = 1000
+HISTORY_MAX = 1024  # puntos de la curva de bankroll por asiento (se diezma al crecer)
+
+BetKey = Tuple[str, object]
+
+class Seat:
+    def __init__(self, player, bankroll: int = BANKROLL_START):
+        self.player = player
+        self.bankroll = int(bankroll)
+        self.bet_slip: Dict[BetKey, int] = {}
+        self.last_slip: Dict[BetKey, int] = {}
+        self.in_play: Dict[BetKey, int] = {}  # apuestas ya cobradas de la tirada en curso
+        self.spins = 0
+        self.history: List[int] = [self.bankroll]
+        self.history_stride = 1
+
+    def total_bet_amount(self) -> int:
+        return sum(self.bet_slip.values())
+
+    def can_cover(self) -> bool:
+        total = self.total_bet_amount()
+        return total > 0 and self.bankroll >= total
+
+    def record(self, bankrolls) -> None:
+        # Curva de bankroll diezmada: un punto cada history_stride tiradas
+        for b in bankrolls:
+            self.spins += 1
+            if self.spins % self.history_stride == 0:
+                self.history.append(int(b))
+                if len(self.history) > HISTORY_MAX:
+                    self.history = self.history[::2]
+                    self.history_stride *= 2
+
+class Table:
+    # Con state=None la mesa tiene su propio SpinState de una fila y step() la avanza; dentro de
+    # un TableGroup comparte el del grupo (fila `slot`) y la avanza TableGroup.step().
+    supports_turbo = True
+
+    def __init__(self, table_id: int = 0, rng: Optional[np.random.Generator] = None,
+                 state: Optional[physics.SpinState] = None, slot: int = 0, max_seats: int = 0):
+        self.id = table_id
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.state = state if state is not None else physics.idle(1)
+        self.slot = slot
+        self.max_seats = max_seats  # 0 = sin límite
+        self.seats: Dict[object, Seat] = {}
+        self.spinning = False
+        self.result_number: Optional[int] = None
+        self.spin_count = 0
+        self.pocket_hits = np.zeros(physics.POCKETS, dtype=np.int64)
+        self.ready: set = set()  # jugadores que han pedido la tirada
+        self.spin_deadline: Optional[float] = None
+
+    # Ángulos de esta mesa en el estado (compartido o propio)
+    @property
+    def wheel_angle(self) -> float:
+        return float(self.state.wheel_angle[self.slot])
+
+    @property
+    def ball_angle(self) -> float:
+        return float(self.state.ball_angle[self.slot])
+
+    @property
+    def result_timer(self) -> float:
+        return float(self.state.timer[self.slot])
+
+    @property
+    def full(self) -> bool:
+        return self.max_seats > 0 and len(self.seats) >= self.max_seats
+
+    def sit(self, player, bankroll: int = BANKROLL_START) -> Seat:
+        if player in self.seats:
+            return self.seats[player]
+        if self.full:
+            raise ValueError(f"Mesa {self.id} completa ({self.max_seats} asientos)")
+        seat = self.seats[player] = Seat(player, bankroll)
+        return seat
+
+    def leave(self, player) -> Optional[Seat]:
+        # Lo apostado en una tirada en curso se pierde
+        self.ready.discard(player)
+        if not self.ready:
+            self.spin_deadline = None  # ventana de apuestas abierta por quien se ha ido
+        return self.seats.pop(player, None)
+
+    def place_bets(self, player, bets: Iterable[Tuple[BetKey, int]]) -> Seat:
+        # Todas o ninguna: claves válidas, importes > 0, bola parada y saldo que cubra el slip
+        seat = self.seats[player]
+        if self.spinning:
+            raise ValueError("No va más: la bola está en juego")
+        slip = dict(seat.bet_slip)
+        for key, amount in bets:
+            if key not in BET_INDEX:
+                raise ValueError(f"Apuesta no válida: {key}")
+            amount = int(amount)
+            if amount <= 0:
+                raise ValueError(f"Importe no válido: {amount}")
+            slip[key] = slip.get(key, 0) + amount
+        if sum(slip.values()) > seat.bankroll:
+            raise ValueError(f"Saldo insuficiente: {sum(slip.values())} > {seat.bankroll}")
+        seat.bet_slip = slip
+        return seat
+
+    def place_bet(self, player, key: BetKey, amount: int) -> Seat:
+        return self.place_bets(player, [(key, amount)])
+
+    def clear_bets(self, player) -> None:
+        self.seats[player].bet_slip.clear()
+
+    def can_spin(self) -> bool:
+        return not self.spinning and any(s.can_cover() for s in self.seats.values())
+
+    def request_spin(self, player, now: float = 0.0, window: float = 0.0) -> bool:
+        # "No va más" de un jugador. La tirada sale cuando todos los sentados la han pedido o al
+        # vencer la ventana abierta por la primera petición. True = lanzar ya.
+        if self.spinning or player not in self.seats:
+            return False
+        self.ready.add(player)
+        if self.spin_deadline is None:
+            self.spin_deadline = now + window
+        return self.due(now)
+
+    def due(self, now: float) -> bool:
+        if self.spinning or not self.ready:
+            return False
+        if now >= self.spin_deadline:
+            return True
+        return len(self.ready) >= len(self.seats)
+
+    def launch_spin(self) -> bool:
+        # Cobra el slip de cada asiento que puede cubrirlo y lanza la bola
+        self.ready.clear()
+        self.spin_deadline = None
+        if self.spinning:
+            return False
+        players = [s for s in self.seats.values() if s.can_cover()]
+        if not players:
+            return False
+        for seat in players:
+            seat.in_play = dict(seat.bet_slip)
+            seat.last_slip = dict(seat.bet_slip)
+            seat.bankroll -= seat.total_bet_amount()
+        physics.relaunch(self.state, self.slot, self.rng)
+        self.spinning = True
+        self.result_number = None
+        return True
+
+    def step(self, dt: float) -> Optional[Dict[object, int]]:
+        # Un frame de física de una mesa suelta; devuelve los pagos si la bola se asienta
+        if not self.spinning:
+            return None
+        settled = physics.step(self.state, dt)
+        if settled[self.slot]:
+            return self.settle(int(self.state.result[self.slot]))
+        return None
+
+    def settle(self, n: int) -> Dict[object, int]:
+        # Retorno bruto (incluye cada apuesta ganadora) de los slips en juego
+        payouts = {}
+        for player, seat in self.seats.items():
+            if not seat.in_play:
+                continue
+            gross = int(round(settle_slip(n, seat.in_play)))
+            seat.bankroll += gross
+            seat.record([seat.bankroll])
+            seat.in_play = {}
+            seat.bet_slip.clear()
+            payouts[player] = gross
+        self.pocket_hits[n] += 1
+        self.spin_count += 1
+        self.result_number = n
+        self.spinning = False
+        return payouts
+
+    def run_turbo_batch(self, player, slip: Dict[BetKey, int], k: int) -> int:
+        # k tiradas del slip de un jugador resueltas de golpe (física analítica, liquidación
+        # vectorizada); para en cuanto el bankroll no cubre el slip. Devuelve las jugadas.
+        seat = self.seats[player]
+        stake = sum(slip.values())
+        if self.spinning or seat.bankroll < stake:
+            return 0
+        state = physics.launch(k, self.rng)
+        numbers = physics.resolve(state)
+        idx = [BET_INDEX[key] for key in slip]
+        amounts = np.array(list(slip.values()), dtype=np.float64)
+        path = seat.bankroll + np.cumsum(PAYOUT_MATRIX[numbers][:, idx] @ amounts - stake)
+        before = np.concatenate(([seat.bankroll], path[:-1]))
+        played = k if (before >= stake).all() else int((before >= stake).argmin())
+        if played == 0:
+            return 0
+        numbers, path = numbers[:played], np.rint(path[:played]).astype(np.int64)
+        seat.bankroll = int(path[-1])
+        self.result_number = int(numbers[-1])
+        self.state.wheel_angle[self.slot] = state.wheel_angle[played-1]
+        self.state.ball_angle[self.slot] = state.ball_angle[played-1]
+        np.add.at(self.pocket_hits, numbers, 1)
+        self.spin_count += played
+        seat.record(path)
+        return played
+
+class TableGroup:
+    def __init__(self, capacity: int = 64, seed=None, max_seats: int = 0):
+        self.state = physics.idle(max(int(capacity), 1))
+        self.tables: List[Table] = []
+        self.rng = np.random.default_rng(seed)
+        self.max_seats = max_seats
+
+    def add_table(self) -> Table:
+        slot = len(self.tables)
+        if slot == len(self.state):
+            # Sin sitio: el estado se duplica y las mesas pasan a apuntar al nuevo
+            self.state = physics.resize(self.state, 2 * slot)
+            for t in self.tables:
+                t.state = self.state
+        table = Table(slot, rng=self.rng, state=self.state, slot=slot, max_seats=self.max_seats)
+        self.tables.append(table)
+        return table
+
+    def spinning(self) -> int:
+        return int(self.state.spinning.sum())
+
+    def step(self, dt: float) -> List[Tuple[Table, Dict[object, int]]]:
+        # Un frame de todas las mesas que giran; liquida las que se asientan
+        settled = physics.step(self.state, dt)
+        return [(self.tables[i], self.tables[i].settle(int(self.state.result[i])))
+                for i in np.flatnonzero(settled).tolist()]
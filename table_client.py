@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# Mesa remota para el cliente pygame: misma interfaz de table.Table que usa main.py (asiento,
+# place_bets, clear_bets, request_spin, step, ángulos y estadísticas), pero las reglas, la física
+# y los pagos los ejecuta table_server.py. Socket TCP no bloqueante leído en cada frame: el bucle
+# de pygame nunca espera a la red.
+#   python main.py --connect 127.0.0.1:8765 [--table 3 | --table new]
+from __future__ import annotations
+import json
+import math
+import socket
+from typing import Dict, Optional
+import numpy as np
+
+from table import BANKROLL_START, Seat
+from table_server import format_bets, parse_bets
+from wheel_physics import POCKETS
+
+class RemoteTable:
+    supports_turbo = False  # el turbo resuelve tiradas en local; con servidor no aplica
+
+    def __init__(self, address: str, table=None, timeout: float = 5.0):
+        host, _, port = address.rpartition(":")
+        self.sock = socket.create_connection((host or "127.0.0.1", int(port)), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._rx = b""
+        self._send({"op": "join", "table": table, "watch": True})
+        joined = self._wait("joined")
+        self.sock.setblocking(False)
+        self.id = joined["table"]
+        self.player = joined["player"]
+        self.seats: Dict[object, Seat] = {self.player: Seat(self.player, joined.get("bankroll", BANKROLL_START))}
+        self.wheel_angle = 0.0
+        self.ball_angle = math.pi
+        self.spinning = False
+        self.ready: set = set()  # como Table.ready: nosotros, si hemos pedido la tirada
+        self.result_number: Optional[int] = None
+        self.spin_count = 0
+        self.pocket_hits = np.zeros(POCKETS, dtype=np.int64)
+        self.error: Optional[str] = None
+
+    @property
+    def seat(self) -> Seat:
+        return self.seats[self.player]
+
+    def _send(self, obj) -> None:
+        self.sock.sendall((json.dumps(obj, separators=(",", ":")) + "\n").encode())
+
+    def _wait(self, event: str) -> dict:
+        # Sólo en la conexión (socket bloqueante con timeout)
+        while True:
+            while b"\n" not in self._rx:
+                chunk = self.sock.recv(65536)
+                if not chunk:
+                    raise ConnectionError("el servidor cerró la conexión")
+                self._rx += chunk
+            line, self._rx = self._rx.split(b"\n", 1)
+            msg = json.loads(line)
+            if msg.get("ev") == "error":
+                raise ValueError(msg.get("msg"))
+            if msg.get("ev") == event:
+                return msg
+
+    # ---------------- interfaz de Table ----------------
+    def place_bets(self, player, bets) -> Seat:
+        # Validación local inmediata (la del servidor manda); el slip local es un espejo
+        if self.spinning or self.ready:
+            raise ValueError("No va más: la bola está en juego")
+        seat = self.seat
+        bets = list(bets)
+        slip = dict(seat.bet_slip)
+        for key, amount in bets:
+            slip[key] = slip.get(key, 0) + int(amount)
+        if sum(slip.values()) > seat.bankroll:
+            raise ValueError(f"Saldo insuficiente: {sum(slip.values())} > {seat.bankroll}")
+        self._send({"op": "bet", "bets": format_bets(bets)})
+        seat.bet_slip = slip
+        return seat
+
+    def place_bet(self, player, key, amount: int) -> Seat:
+        return self.place_bets(player, [(key, amount)])
+
+    def clear_bets(self, player) -> None:
+        if not self.spinning and not self.ready:
+            self._send({"op": "clear"})
+        self.seat.bet_slip.clear()
+
+    def can_spin(self) -> bool:
+        return not self.spinning and not self.ready and self.seat.can_cover()
+
+    def request_spin(self, player, now: float = 0.0, window: float = 0.0) -> bool:
+        # El servidor lanza cuando toda la mesa está lista: aquí nunca se lanza en local
+        if self.can_spin():
+            self._send({"op": "spin"})
+            self.ready.add(self.player)
+        return False
+
+    def launch_spin(self) -> bool:
+        return False
+
+    def step(self, dt: float) -> Optional[dict]:
+        # Lee lo que haya llegado (frames, inicio y resultado de tiradas) sin bloquear
+        try:
+            while True:
+                chunk = self.sock.recv(65536)
+                if not chunk:
+                    self.error = "conexión cerrada"
+                    break
+                self._rx += chunk
+        except (BlockingIOError, InterruptedError):
+            pass
+        payouts = None
+        while b"\n" in self._rx:
+            line, self._rx = self._rx.split(b"\n", 1)
+            msg = json.loads(line)
+            ev = msg.get("ev")
+            if ev == "frame":
+                self.wheel_angle, self.ball_angle = msg["wheel"], msg["ball"]
+            elif ev == "spinning":
+                self.spinning = True
+                self.ready.clear()
+                self.result_number = None
+                self.seat.bankroll = msg["bankroll"]
+            elif ev == "result":
+                payouts = {self.player: msg["payout"]}
+                self._settle(msg)
+            elif ev == "slip":
+                self.seat.bankroll = msg["bankroll"]
+                self.seat.bet_slip = dict(parse_bets(msg["bets"]))
+            elif ev == "error":
+                self.error = msg.get("msg")
+                self.ready.clear()
+        return payouts
+
+    def _settle(self, msg: dict) -> None:
+        n = int(msg["number"])
+        self.wheel_angle, self.ball_angle = msg["wheel"], msg["ball"]
+        self.result_number = n
+        self.pocket_hits[n] += 1
+        self.spin_count += 1
+        self.spinning = False
+        self.ready.clear()
+        seat = self.seat
+        seat.bankroll = msg["bankroll"]
+        seat.last_slip = dict(seat.bet_slip) or seat.last_slip
+        seat.bet_slip.clear()
+        seat.record([seat.bankroll])
+
+    def close(self) -> None:
+        try:
+            self.sock.setblocking(True)
+            self._send({"op": "leave"})
+        except OSError:
+            pass
+        self.sock.close()
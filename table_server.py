@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+# Servidor asyncio local de ruleta: muchas mesas (table.TableGroup) y muchos jugadores por
+# sockets TCP, con la física de todas las mesas avanzada en un único tick por lotes.
+#
+# Protocolo: una línea JSON por mensaje.
+#   cliente -> servidor                                  servidor -> cliente
+#   {"op": "join", "table": null|id|"new", "watch": false}     {"ev": "joined", "table", "player", "bankroll", "seats"}
+#   {"op": "bet", "bets": [["RED", null, 10], ["SPLIT", [1, 2], 5]]}
+#                                                        {"ev": "slip", "bets", "total", "bankroll"}
+#   {"op": "clear"}                                      {"ev": "slip", ...}
+#   {"op": "spin"}                                       {"ev": "spinning", "table", "bankroll"} (a toda la mesa)
+#                                                        {"ev": "result", "table", "number", "payout", "bankroll",
+#                                                         "t", "wheel", "ball"}
+#   {"op": "stats"}                                      {"ev": "stats", ...}
+#   {"op": "leave"}                                      {"ev": "left"}
+# Errores: {"ev": "error", "msg": ...}. "t" es time.time() del tick en que se asentó la bola.
+# Con "watch": true el cliente recibe además {"ev": "frame", "wheel", "ball"} en cada tick con la
+# bola en juego (el cliente pygame sólo dibuja). join sin mesa llena la primera con sitio;
+# "new" abre una mesa propia.
+# La tirada sale cuando todos los jugadores sentados han pedido "spin" o al vencer
+# --betting_window desde la primera petición; las apuestas llegadas con la bola en juego se
+# rechazan ("No va más") y el jugador espera al siguiente result. --speed N avanza N pasos de física por tick
+# (1 = tiempo real como el juego, ~15 s por tirada; valores altos para pruebas de carga).
+#   python table_server.py --port 8765 --seats 7
+#   python load_test.py --port 8765 --players 2000 --procs 2 --duration 30
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, Optional
+
+from eval_stats import QuantileSketch, RunningStats
+from table import BANKROLL_START, Table, TableGroup
+from wheel_physics import FRAME_DT
+
+MAX_WRITE_BUFFER = 1 << 20  # bytes pendientes por cliente a partir de los que se omiten frames
+
+def _dumps(obj) -> bytes:
+    return (json.dumps(obj, separators=(",", ":")) + "\n").encode()
+
+def parse_bets(raw) -> list:
+    # [[tipo, argumento, importe], ...] -> [((tipo, argumento), importe), ...]; JSON no tiene tuplas
+    bets = []
+    for kind, arg, amount in raw:
+        if isinstance(arg, list):
+            arg = tuple(arg)
+        bets.append(((str(kind), arg), int(amount)))
+    return bets
+
+def format_bets(bets) -> list:
+    # Inversa de parse_bets: pares ((tipo, argumento), importe) -> [[tipo, argumento, importe], ...]
+    return [[kind, list(arg) if isinstance(arg, tuple) else arg, amount] for (kind, arg), amount in bets]
+
+def raise_fd_limit() -> None:
+    # Miles de sockets: sube el límite blando de descriptores al duro (no existe en Windows)
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+class Player:
+    __slots__ = ("pid", "writer", "table", "watch")
+
+    def __init__(self, pid: int, writer: asyncio.StreamWriter):
+        self.pid = pid
+        self.writer = writer
+        self.table: Optional[Table] = None
+        self.watch = False
+
+    def send(self, obj) -> None:
+        if not self.writer.is_closing():
+            self.writer.write(_dumps(obj))
+
+class TableServer:
+    def __init__(self, seats: int = 7, speed: int = 1, tick_hz: float = 60.0, betting_window: float = 2.0,
+                 bankroll: int = BANKROLL_START, seed=None, max_tables: int = 10_000):
+        self.group = TableGroup(seed=seed, max_seats=seats)
+        self.max_tables = int(max_tables)
+        self.speed = int(speed)
+        self.tick_hz = float(tick_hz)
+        self.betting_window = float(betting_window)
+        self.bankroll = int(bankroll)
+        self.players: Dict[int, Player] = {}
+        self._next_pid = 0
+        self._open: Dict[Table, None] = {}     # mesas con sitio (dict = conjunto ordenado)
+        self._empty: Dict[Table, None] = {}    # mesas sin nadie: se reutilizan antes de crear otra
+        self.pending: set = set()              # mesas con "spin" pedido y aún sin lanzar
+        self.watchers: Dict[int, set] = {}     # mesa -> jugadores que reciben frames
+        self.ticks = 0
+        self.overruns = 0
+        self.spins = 0
+        self.tick_stats = RunningStats()
+        self.tick_q = QuantileSketch(0.01)
+        self._tick_batch: list = []
+        self._cpu0 = (time.perf_counter(), time.process_time())
+        self.cpu_share = 0.0
+
+    # ---------------- mesas y jugadores ----------------
+    def _open_table(self) -> Table:
+        while self._open:
+            table = next(reversed(self._open))
+            if not table.full:
+                return table
+            del self._open[table]
+        return self._new_table()
+
+    def _new_table(self) -> Table:
+        # Una mesa vacía si la hay; si no, una nueva hasta --max_tables (las mesas no se destruyen)
+        if self._empty:
+            table = next(iter(self._empty))
+        elif len(self.group.tables) < self.max_tables:
+            table = self.group.add_table()
+        else:
+            raise ValueError(f"Servidor completo ({self.max_tables} mesas ocupadas)")
+        self._open[table] = None
+        return table
+
+    def _leave(self, player: Player) -> None:
+        table = player.table
+        if table is not None:
+            table.leave(player.pid)
+            self.watchers.get(table.id, set()).discard(player)
+            if not table.full:
+                self._open[table] = None
+            if not table.seats:
+                self._empty[table] = None
+            if table.ready and table.due(asyncio.get_running_loop().time()):
+                self._launch(table)
+        player.table = None
+
+    def _launch(self, table: Table) -> None:
+        self.pending.discard(table)
+        if not table.launch_spin():
+            return
+        for pid, seat in table.seats.items():
+            self.players[pid].send({"ev": "spinning", "table": table.id, "bankroll": seat.bankroll})
+
+    def _settled(self, table: Table, payouts: dict) -> None:
+        self.spins += 1
+        ts = time.time()
+        for pid, seat in table.seats.items():
+            self.players[pid].send({"ev": "result", "table": table.id, "number": table.result_number,
+                                    "payout": payouts.get(pid, 0), "bankroll": seat.bankroll, "t": ts,
+                                    "wheel": round(table.wheel_angle, 5), "ball": round(table.ball_angle, 5)})
+
+    def _send_frames(self) -> None:
+        for tid, players in self.watchers.items():
+            table = self.group.tables[tid]
+            if not players or not table.spinning:
+                continue
+            frame = _dumps({"ev": "frame", "table": tid, "wheel": round(table.wheel_angle, 5),
+                            "ball": round(table.ball_angle, 5)})
+            for p in players:
+                if not p.writer.is_closing() and p.writer.transport.get_write_buffer_size() < MAX_WRITE_BUFFER:
+                    p.writer.write(frame)
+
+    # ---------------- peticiones ----------------
+    def dispatch(self, player: Player, msg: dict) -> Optional[dict]:
+        if not isinstance(msg, dict):
+            raise ValueError("Mensaje no válido: se espera un objeto JSON")
+        op = msg.get("op")
+        if op == "stats":
+            return self.stats()
+        if op == "join":
+            if player.table is not None:
+                raise ValueError(f"Ya estás en la mesa {player.table.id}")
+            tid = msg.get("table")
+            if tid is None:
+                table = self._open_table()
+            elif tid == "new":
+                table = self._new_table()
+            elif 0 <= int(tid) < len(self.group.tables):
+                table = self.group.tables[int(tid)]
+            else:
+                raise ValueError(f"Mesa desconocida: {tid}")
+            seat = table.sit(player.pid, self.bankroll)
+            player.table = table
+            self._empty.pop(table, None)
+            if table.full:
+                self._open.pop(table, None)
+            if msg.get("watch"):
+                player.watch = True
+                self.watchers.setdefault(table.id, set()).add(player)
+            return {"ev": "joined", "table": table.id, "player": player.pid, "bankroll": seat.bankroll,
+                    "seats": len(table.seats)}
+        table = player.table
+        if table is None:
+            raise ValueError("Primero 'join'")
+        if op == "bet":
+            seat = table.place_bets(player.pid, parse_bets(msg.get("bets", [])))
+            return {"ev": "slip", "bets": format_bets(seat.bet_slip.items()), "total": seat.total_bet_amount(),
+                    "bankroll": seat.bankroll}
+        if op == "clear":
+            table.clear_bets(player.pid)
+            return {"ev": "slip", "bets": [], "total": 0, "bankroll": table.seats[player.pid].bankroll}
+        if op == "spin":
+            if table.spinning:
+                if table.seats[player.pid].in_play:
+                    return None  # su slip ya está en juego: recibirá el result
+                raise ValueError("No va más: la bola está en juego")
+            if not table.seats[player.pid].can_cover():
+                raise ValueError("Sin apuestas que cubrir")
+            if table.request_spin(player.pid, asyncio.get_running_loop().time(), self.betting_window):
+                self._launch(table)
+            elif not table.spinning:
+                self.pending.add(table)
+            return None
+        if op == "leave":
+            self._leave(player)
+            return {"ev": "left"}
+        raise ValueError(f"Operación desconocida: {op!r}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        player = Player(self._next_pid, writer)
+        self._next_pid += 1
+        self.players[player.pid] = player
+        try:
+            async for line in reader:
+                try:
+                    reply = self.dispatch(player, json.loads(line))
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {"ev": "error", "msg": str(e)}
+                if reply is not None:
+                    player.send(reply)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._leave(player)
+            self.players.pop(player.pid, None)
+            writer.close()
+
+    # ---------------- tick ----------------
+    def tick(self, now: float) -> None:
+        # Mesas cuya ventana de apuestas venció, luego `speed` pasos de física de todas las mesas
+        if self.pending:
+            for table in [t for t in self.pending if t.due(now)]:
+                self._launch(table)
+        for _ in range(self.speed):
+            for table, payouts in self.group.step(FRAME_DT):
+                self._settled(table, payouts)
+        if self.watchers:
+            self._send_frames()
+
+    async def run_ticks(self) -> None:
+        loop = asyncio.get_running_loop()
+        period = 1.0 / self.tick_hz
+        next_t = loop.time()
+        while True:
+            t0 = time.perf_counter()
+            self.tick(loop.time())
+            self._tick_batch.append(time.perf_counter() - t0)
+            if len(self._tick_batch) >= 64:
+                self.tick_stats.update(self._tick_batch)
+                self.tick_q.update(self._tick_batch)
+                self._tick_batch = []
+            self.ticks += 1
+            next_t += period
+            delay = next_t - loop.time()
+            if delay < 0:
+                self.overruns += 1
+                next_t = loop.time()
+                delay = 0.0
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        # CPU del proceso / tiempo real desde la última llamada: fracción del núcleo en uso
+        wall, cpu = time.perf_counter(), time.process_time()
+        if wall - self._cpu0[0] > 0.5:
+            self.cpu_share = (cpu - self._cpu0[1]) / (wall - self._cpu0[0])
+            self._cpu0 = (wall, cpu)
+        # Mesas por núcleo: sólo las que tienen jugadores (las vacías no cuestan física)
+        active = sum(1 for t in self.group.tables if t.seats)
+        tick_ms = self.tick_stats.mean * 1e3
+        return {
+            "ev": "stats",
+            "players": len(self.players),
+            "tables": len(self.group.tables),
+            "active_tables": active,
+            "spinning": self.group.spinning(),
+            "spins": self.spins,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "tick_ms": tick_ms,
+            "tick_p99_ms": self.tick_q.quantile(0.99) * 1e3 if self.tick_q.n else 0.0,
+            "tick_share": tick_ms / 1e3 * self.tick_hz,
+            "cpu_share": self.cpu_share,
+            "tables_per_core": active / self.cpu_share if self.cpu_share > 0 and active else None,
+        }
+
+    async def report(self, every: float) -> None:
+        last = 0
+        while True:
+            await asyncio.sleep(every)
+            s = self.stats()
+            rate = (s["spins"] - last) / every
+            last = s["spins"]
+            per_core = f", ~{s['tables_per_core']:,.0f} mesas/núcleo" if s["tables_per_core"] else ""
+            print(f"[server] {s['players']} jugadores, {s['active_tables']}/{s['tables']} mesas ocupadas ({s['spinning']} girando), "
+                  f"{rate:.0f} tiradas/s, tick {s['tick_ms']:.2f} ms (p99 {s['tick_p99_ms']:.2f} ms, "
+                  f"{s['tick_share']:.1%} del periodo), CPU {s['cpu_share']:.0%}{per_core}, "
+                  f"{s['overruns']} ticks tarde", flush=True)
+
+async def serve(args) -> None:
+    server = TableServer(seats=args.seats, speed=args.speed, tick_hz=args.tick_hz,
+                         betting_window=args.betting_window, bankroll=args.bankroll, seed=args.seed,
+                         max_tables=args.max_tables)
+    listener = await asyncio.start_server(server.handle, args.host, args.port, backlog=4096)
+    print(f"[OK] Servidor de mesas en {args.host}:{args.port} ({args.seats} asientos/mesa, "
+          f"{args.tick_hz:g} ticks/s × {args.speed} pasos de física)", flush=True)
+    tasks = [asyncio.create_task(server.run_ticks())]
+    if args.report_every > 0:
+        tasks.append(asyncio.create_task(server.report(args.report_every)))
+    async with listener:
+        try:
+            if args.duration > 0:
+                await asyncio.sleep(args.duration)
+            else:
+                await listener.serve_forever()
+        finally:
+            for t in tasks:
+                t.cancel()
+    s = server.stats()
+    print(f"[OK] {s['spins']} tiradas en {s['tables']} mesas; tick medio {s['tick_ms']:.2f} ms, "
+          f"{s['overruns']} ticks tarde")
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser()
+    p.add_argument("--host", type=str, default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--seats", type=int, default=7, help="asientos por mesa (0 = sin límite)")
+    p.add_argument("--max_tables", type=int, default=10_000, help="mesas como máximo (las vacías se reutilizan)")
+    p.add_argument("--speed", type=int, default=1, help="pasos de física por tick (1 = tiempo real)")
+    p.add_argument("--tick_hz", type=float, default=60.0)
+    p.add_argument("--betting_window", type=float, default=2.0,
+                   help="segundos desde el primer 'spin' hasta que la bola sale aunque falten jugadores")
+    p.add_argument("--bankroll", type=int, default=BANKROLL_START)
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--report_every", type=float, default=5.0, help="segundos entre líneas de estado (0 = nunca)")
+    p.add_argument("--duration", type=float, default=0.0, help="segundos hasta parar (0 = hasta Ctrl+C)")
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    raise_fd_limit()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,90 +1,242 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import replace
 from pathlib import Path
 import csv
 import numpy as np
 
 from stable_baselines3 import SAC
 from stable_baselines3.common.monitor import Monitor
-from stable_baselines3.common.vec_env import DummyVecEnv
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
 
 from roulette_env_sb3 import RouletteEnv, RouletteConfig
+from roulette_config import BLAS_THREAD_VARS
+from roulette_vec_env import RouletteVecEnv
+from evaluate_policy import run_episodes_batched
+from profiling import Timings, TimedVecEnv, ProfilingCallback
+from numpy_policy import export_actor
+from checkpointing import AsyncCheckpointer, AsyncCheckpointCallback, latest_checkpoint, load_checkpoint
+from checkpoint_watcher import BEST_JSON, LEADERBOARD, clear_done, launch_watcher, mark_done
 
-def make_env(cfg: RouletteConfig):
+VEC_BACKENDS = ("dummy", "subproc", "native")
+REPLAY_BUFFERS = ("default", "compact")
+
+def set_num_threads(n: int | None):
+    # Limita los hilos de torch y de BLAS/OpenMP (las variables afectan a los pools aún no creados)
+    if n is None:
+        return
+    for var in BLAS_THREAD_VARS:
+        os.environ[var] = str(n)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(n)
+
+class TableMonitor(Monitor):
+    # Reenvía set_params (curriculum.py) al RouletteEnv sin el __getattr__ obsoleto de gymnasium
+    def set_params(self, **params) -> None:
+        self.env.unwrapped.set_params(**params)
+
+def make_env(cfg: RouletteConfig, rank: int = 0, n_threads: int | None = None):
+    # Cada worker usa su propia semilla: random_seed + rank
+    seed = None if cfg.random_seed is None else cfg.random_seed + rank
     def _thunk():
-        return Monitor(RouletteEnv(cfg))
+        set_num_threads(n_threads)
+        return TableMonitor(RouletteEnv(replace(cfg, random_seed=seed), env_id=rank))
     return _thunk
 
-def train(args):
-    out_dir = Path(args.out_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
-    model_path = out_dir / "sac_roulette.zip"
-    log_csv = out_dir / "training_episodes.csv"
+def build_vec_env(cfg: RouletteConfig, backend: str, n_envs: int, worker_threads: int | None = None):
+    if backend == "native":
+        # N mesas en un único VecEnv vectorizado con NumPy
+        return RouletteVecEnv(cfg, n_envs=n_envs)
+    thunks = [make_env(cfg, rank, worker_threads) for rank in range(n_envs)]
+    if backend == "dummy":
+        return DummyVecEnv(thunks)
+    if backend == "subproc":
+        # Los procesos hijos heredan el entorno al arrancar: así BLAS se inicializa ya limitado
+        saved = {var: os.environ.get(var) for var in BLAS_THREAD_VARS}
+        if worker_threads is not None:
+            os.environ.update({var: str(worker_threads) for var in BLAS_THREAD_VARS})
+        try:
+            return SubprocVecEnv(thunks)
+        finally:
+            for var, value in saved.items():
+                if value is None:
+                    os.environ.pop(var, None)
+                else:
+                    os.environ[var] = value
+    raise ValueError(f"vec_backend desconocido: {backend!r} (opciones: {', '.join(VEC_BACKENDS)})")
 
-    cfg = RouletteConfig(
+def make_config(args) -> RouletteConfig:
+    return RouletteConfig(
         initial_bankroll=100.0,
         bet_fraction=args.bet_fraction,
         max_steps=args.max_steps,
         target_bankroll=args.target_bankroll,
         random_seed=args.seed,
         use_wheel_layout=True,
+        counter_spins=args.counter_spins,
+        spin_tape=args.spin_tape,
     )
 
-    env = DummyVecEnv([make_env(cfg)])
-
+def build_model(args, env) -> SAC:
+    buffer_kwargs = {}
+    if args.replay_buffer == "compact":
+        # Observación empaquetada (bankroll float32 + one-hots en uint8), ver compact_buffer.py
+        from compact_buffer import CompactReplayBuffer
+        buffer_kwargs = {"replay_buffer_class": CompactReplayBuffer,
+                         "replay_buffer_kwargs": {"action_dtype": args.buffer_action_dtype}}
     model = SAC(
         "MlpPolicy",
         env,
-        verbose=1,
-        gamma=0.999,
-        learning_rate=3e-4,
-        buffer_size=200_000,
-        batch_size=256,
-        tau=0.02,
-        train_freq=64,
-        gradient_steps=64,
+        verbose=args.verbose,
+        gamma=args.gamma,
+        learning_rate=args.learning_rate,
+        buffer_size=args.buffer_size,
+        batch_size=args.batch_size,
+        tau=args.tau,
+        train_freq=args.train_freq,
+        gradient_steps=args.gradient_steps,
         ent_coef="auto",
         seed=args.seed,
         device="auto",
+        **buffer_kwargs,
     )
+    if args.replay_buffer == "compact":
+        rb = model.replay_buffer
+        full = rb.full_nbytes(args.buffer_size, rb.action_dim)
+        print(f"[OK] Replay buffer compacto: {rb.nbytes / 2**20:.1f} MiB "
+              f"(ReplayBuffer de SB3: {full / 2**20:.1f} MiB)")
+    return model
+
+def train(args, callbacks: list | None = None) -> dict:
+    # `callbacks`: callbacks SB3 adicionales (p. ej. la parada temprana de sweep.py)
+    if args.async_actors > 0:
+        if callbacks:
+            raise ValueError("El modo asíncrono (--async_actors) no admite callbacks de SB3")
+        from async_train import train_async
+        return train_async(args)
+    set_num_threads(args.torch_threads)
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    cfg = make_config(args)
+
+    env = build_vec_env(cfg, args.vec_backend, args.n_envs, args.worker_threads)
 
-    model.learn(total_timesteps=args.timesteps, log_interval=10)
+    # Desglose de tiempos opcional (env / inference / gradient / io)
+    timings = None
+    callbacks = list(callbacks or [])
+    if args.profile:
+        timings = Timings()
+        env = TimedVecEnv(env, timings)
+        callbacks.append(ProfilingCallback(timings, report_every=args.profile_every, out_path=args.profile))
+
+    # --resume: modelo, optimizadores y replay buffer del último checkpoint completo
+    ckpt_root = out_dir / "checkpoints"
+    ckpt = latest_checkpoint(ckpt_root) if args.resume else None
+    if args.resume and ckpt is None:
+        print(f"[WARN] No hay checkpoints en {ckpt_root}: se empieza desde cero")
+    if ckpt is not None:
+        model = load_checkpoint(SAC, ckpt, env)
+        print(f"[OK] Reanudando desde {ckpt} ({model.num_timesteps} pasos)")
+    else:
+        model = build_model(args, env)
+
+    # Regímenes de mesa por sub-entorno que cambian durante el entrenamiento (curriculum.py)
+    if args.curriculum:
+        from curriculum import CurriculumCallback, CurriculumScheduler, load_spec
+        curriculum = CurriculumCallback(CurriculumScheduler(load_spec(args.curriculum), args.n_envs, args.timesteps),
+                                        verbose=args.verbose)
+        curriculum.prime(env, model.num_timesteps)
+        callbacks.append(curriculum)
+
+    checkpointer = None
+    watcher = None
+    if args.checkpoint_every > 0:
+        checkpointer = AsyncCheckpointer(ckpt_root, keep=args.keep_checkpoints)
+        callbacks.append(AsyncCheckpointCallback(checkpointer, args.checkpoint_every,
+                                                 extra={"timesteps": args.timesteps, "seed": args.seed}))
+        clear_done(ckpt_root)
+        if args.watch_eval > 0:
+            # Evaluación de cada checkpoint en otro proceso, en tiradas fijas (checkpoint_watcher.py)
+            watcher = launch_watcher(ckpt_root, out_dir, cfg, args.watch_eval, args.watch_seed,
+                                     workers=args.watch_workers)
+
+    t0 = time.perf_counter()
+    start_steps = model.num_timesteps
+    remaining = max(args.timesteps - start_steps, 0)
+    if remaining:
+        model.learn(total_timesteps=remaining, log_interval=10, callback=callbacks,
+                    reset_num_timesteps=ckpt is None)
+    elapsed = time.perf_counter() - t0
+    if checkpointer is not None:
+        checkpointer.close()
+        mark_done(ckpt_root, model.num_timesteps)
+    env.close()
+    result = finish_training(model, cfg, args, elapsed, model.num_timesteps - start_steps,
+                             f"backend={args.vec_backend}, n_envs={args.n_envs}", timings)
+    if watcher is not None:
+        result["leaderboard"] = str(out_dir / LEADERBOARD)
+        if args.watch_wait:
+            # Con --watch_wait se espera a que el vigilante puntúe el último checkpoint
+            print("[watch] Esperando a la evaluación del último checkpoint…")
+            watcher.wait()
+            best = out_dir / BEST_JSON
+            if best.exists():
+                result["best_checkpoint"] = json.loads(best.read_text(encoding="utf-8"))["checkpoint"]
+        else:
+            print(f"[watch] La evaluación de checkpoints sigue en segundo plano (pid {watcher.pid}) -> "
+                  f"{out_dir / LEADERBOARD}")
+    return result
+
+def finish_training(model, cfg: RouletteConfig, args, elapsed: float, trained_steps: int, mode: str,
+                    timings: Timings | None = None) -> dict:
+    # Guarda modelo + actor NumPy, evalúa en lote y escribe el CSV de evaluación
+    out_dir = Path(args.out_dir)
+    model_path = out_dir / "sac_roulette.zip"
+    log_csv = out_dir / "training_episodes.csv"
+    t_io = time.perf_counter()
     model.save(str(model_path))
+    actor_path = export_actor(model_path, out_dir / "sac_roulette_actor.npz")
+    if timings is not None:
+        timings.add("io", time.perf_counter() - t_io)
     print(f"[OK] Modelo guardado en: {model_path}")
+    print(f"[OK] Actor NumPy (sin torch): {actor_path}")
+    print(f"Entrenamiento: {trained_steps} pasos en {elapsed:.1f}s "
+          f"({trained_steps / max(elapsed, 1e-9):.0f} pasos/s, {mode})")
 
-    # Evaluación-resumen
-    n_eval_eps = args.eval_episodes
-    returns, lengths, final_bankrolls = [], [], []
-
-    env_eval = RouletteEnv(cfg)
-    for ep in range(n_eval_eps):
-        obs, _ = env_eval.reset()
-        done = False
-        ep_ret = 0.0
-        steps = 0
-        last_info = {"bankroll": float(cfg.initial_bankroll)}  # fallback
-        while not done:
-            action, _ = model.predict(obs, deterministic=True)
-            obs, r, term, trunc, info = env_eval.step(action)
-            last_info = info
-            ep_ret += float(r)
-            steps += 1
-            done = bool(term or trunc)
-        returns.append(ep_ret)
-        lengths.append(steps)
-        final_bankrolls.append(float(last_info["bankroll"]))
+    # Evaluación-resumen (episodios en lote, un predict por paso)
+    returns, lengths, final_bankrolls = run_episodes_batched(model, cfg, args.eval_episodes)
 
+    t_io = time.perf_counter()
     with log_csv.open("w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         w.writerow(["episode", "return", "length", "final_bankroll"])
         for i, (r, l, b) in enumerate(zip(returns, lengths, final_bankrolls), 1):
             w.writerow([i, f"{r:.4f}", l, f"{b:.2f}"])
     print(f"[OK] CSV de evaluación: {log_csv}")
+    if timings is not None:
+        timings.add("io", time.perf_counter() - t_io)
+        print(f"[OK] Perfil de tiempos -> {timings.export(args.profile)}")
     print(f"Return medio: {np.mean(returns):.2f} ± {np.std(returns):.2f}")
     print(f"Bankroll final medio: {np.mean(final_bankrolls):.2f}")
+    return {
+        "model_path": str(model_path),
+        "actor_path": str(actor_path),
+        "eval_csv": str(log_csv),
+        "timesteps": int(model.num_timesteps),
+        "elapsed_s": round(elapsed, 3),
+        "mean_return": float(np.mean(returns)),
+        "std_return": float(np.std(returns)),
+        "mean_final_bankroll": float(np.mean(final_bankrolls)),
+    }
 
-if __name__ == "__main__":
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
     parser.add_argument("--timesteps", type=int, default=500_000)
     parser.add_argument("--bet_fraction", type=float, default=0.10)
@@ -93,5 +245,79 @@ if __name__ == "__main__":
     parser.add_argument("--seed", type=int, default=42)
     parser.add_argument("--eval_episodes", type=int, default=50)
     parser.add_argument("--out_dir", type=str, default="models")
-    args = parser.parse_args()
-    train(args)
+    parser.add_argument("--gamma", type=float, default=0.999)
+    parser.add_argument("--tau", type=float, default=0.02)
+    parser.add_argument("--learning_rate", type=float, default=3e-4)
+    parser.add_argument("--batch_size", type=int, default=256)
+    parser.add_argument("--buffer_size", type=int, default=200_000)
+    parser.add_argument("--train_freq", type=int, default=64)
+    parser.add_argument("--gradient_steps", type=int, default=64)
+    parser.add_argument("--replay_buffer", "--replay-buffer", choices=REPLAY_BUFFERS, default="default",
+                        help="compact = bankroll + último resultado en uint8 (~2-3x menos memoria)")
+    parser.add_argument("--buffer_action_dtype", "--buffer-action-dtype", choices=("float32", "float16"),
+                        default="float32", help="tipo de las acciones en el buffer compacto")
+    parser.add_argument("--verbose", type=int, default=1)
+    parser.add_argument("--n_envs", "--n-envs", type=int, default=1)
+    parser.add_argument("--vec_backend", "--vec-backend", choices=VEC_BACKENDS, default="native")
+    parser.add_argument("--torch_threads", "--torch-threads", type=int, default=None,
+                        help="hilos de torch/BLAS del learner")
+    parser.add_argument("--worker_threads", "--worker-threads", type=int, default=None,
+                        help="hilos de torch/BLAS en cada worker (dummy/subproc)")
+    parser.add_argument("--counter_spins", "--counter-spins", action="store_true",
+                        help="tiradas Philox por (seed, env, episodio, paso), iguales en todos los backends")
+    parser.add_argument("--spin_tape", "--spin-tape", type=str, default=None,
+                        help="reproduce una cinta .npy grabada con spin_source.py")
+    parser.add_argument("--checkpoint_every", "--checkpoint-every", type=int, default=0,
+                        help="pasos entre checkpoints (modelo + optimizadores + replay buffer), p. ej. 50000; "
+                             "0 = sin checkpoints")
+    parser.add_argument("--keep_checkpoints", "--keep-checkpoints", type=int, default=2)
+    parser.add_argument("--watch_eval", "--watch-eval", type=int, default=0,
+                        help="episodios con los que otro proceso evalúa cada checkpoint (leaderboard.csv "
+                             "y mejor modelo en out_dir); 0 = desactivado")
+    parser.add_argument("--watch_seed", "--watch-seed", type=int, default=20_240,
+                        help="semilla de las tiradas fijas de --watch_eval (distinta de --seed)")
+    parser.add_argument("--watch_workers", "--watch-workers", type=int, default=1)
+    parser.add_argument("--watch_wait", "--watch-wait", action="store_true",
+                        help="al terminar, espera a que --watch_eval puntúe el último checkpoint")
+    parser.add_argument("--resume", action="store_true",
+                        help="continúa desde <out_dir>/checkpoints/latest.json")
+    parser.add_argument("--async_actors", "--async-actors", type=int, default=0,
+                        help="modo asíncrono: N procesos actor + learner con anillo compartido (async_train.py)")
+    parser.add_argument("--envs_per_actor", "--envs-per-actor", type=int, default=16)
+    parser.add_argument("--sync_every", "--sync-every", type=int, default=64,
+                        help="pasos de gradiente entre publicaciones de pesos a los actores")
+    parser.add_argument("--actor_sync_every", "--actor-sync-every", type=int, default=16,
+                        help="pasos de cada actor entre comprobaciones de pesos nuevos")
+    parser.add_argument("--replay_ratio", "--replay-ratio", type=float, default=1.0,
+                        help="máximo de pasos de gradiente por transición recogida")
+    parser.add_argument("--min_replay_ratio", "--min-replay-ratio", type=float, default=0.0,
+                        help="los actores esperan si hay menos pasos de gradiente por transición (0 = libres)")
+    parser.add_argument("--report_every", "--report-every", type=float, default=10.0,
+                        help="segundos entre informes de throughput en modo asíncrono")
+    parser.add_argument("--curriculum", type=str, default=None,
+                        help="JSON (fichero o en línea) con etapas de parámetros por mesa; ver curriculum.py")
+    parser.add_argument("--profile", type=str, default=None,
+                        help="exporta el desglose de tiempos (env/inference/gradient/io) a .csv o "
+                             ".jsonl (JSON por líneas)")
+    parser.add_argument("--profile_every", "--profile-every", type=int, default=10_000,
+                        help="pasos entre informes de tiempos")
+    return parser
+
+# Opciones que el modo asíncrono ignoraría (se rechazan si no tienen su valor por defecto)
+ASYNC_UNSUPPORTED = ("checkpoint_every", "keep_checkpoints", "resume", "watch_eval", "curriculum",
+                     "vec_backend", "n_envs", "replay_buffer", "worker_threads", "profile")
+
+def main(argv=None):
+    p = build_parser()
+    args = p.parse_args(argv)
+    if args.watch_eval > 0 and args.checkpoint_every <= 0:
+        p.error("--watch_eval evalúa checkpoints: requiere --checkpoint_every > 0")
+    if args.async_actors > 0:
+        # train_async no checkpointea ni usa el VecEnv/buffer del learner: mejor fallar que ignorarlos
+        ignored = [f"--{name}" for name in ASYNC_UNSUPPORTED if getattr(args, name) != p.get_default(name)]
+        if ignored:
+            p.error(f"--async_actors no admite {', '.join(ignored)}")
+    return train(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# Grabación columnar de trayectorias paso a paso (sin un dict por paso).
+#
+# Columnas: env, episode, step, number, stake, win, bankroll, weights (K opciones).
+# Las filas se escriben en buffers NumPy preasignados de `chunk_size` filas y se vuelcan a disco
+# por bloques:
+#   fmt="npz"    -> un fichero chunk_00000.npz por bloque (opcionalmente comprimido)
+#   fmt="memmap" -> un fichero binario por columna, sólo append, legible con np.memmap
+# load_trajectory() devuelve las columnas completas en ambos casos; iter_trajectory(), por bloques.
+from __future__ import annotations
+import json
+from pathlib import Path
+import numpy as np
+
+SCALAR_COLUMNS = {
+    "env": np.int32,
+    "episode": np.int32,
+    "step": np.int32,
+    "number": np.int8,
+    "stake": np.float64,
+    "win": np.float64,
+    "bankroll": np.float64,
+}
+
+class TrajectoryRecorder:
+    def __init__(self, out_dir: str | Path, n_options: int = 10, chunk_size: int = 1 << 16,
+                 fmt: str = "npz", compress: bool = False):
+        if fmt not in ("npz", "memmap"):
+            raise ValueError(f"Formato desconocido: {fmt!r} (opciones: npz, memmap)")
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.fmt = fmt
+        self.compress = compress
+        self.chunk_size = int(chunk_size)
+        self.n_options = int(n_options)
+        self.cols = {name: np.empty(self.chunk_size, dtype=dt) for name, dt in SCALAR_COLUMNS.items()}
+        self.cols["weights"] = np.empty((self.chunk_size, self.n_options), dtype=np.float32)
+        self.size = 0          # filas en el buffer
+        self.rows_written = 0  # filas ya volcadas
+        self.chunks_written = 0
+        self._files = {}
+        if fmt == "memmap":
+            self._files = {name: (self.out_dir / f"{name}.bin").open("wb") for name in self.cols}
+            self._write_meta()
+
+    def _write_meta(self) -> None:
+        meta = {
+            "format": self.fmt,
+            "rows": self.rows_written,
+            "columns": {name: [np.dtype(a.dtype).str, list(a.shape[1:])] for name, a in self.cols.items()},
+        }
+        (self.out_dir / "columns.json").write_text(json.dumps(meta), encoding="utf-8")
+
+    def record(self, env: int, episode: int, step: int, number: int, stake: float, win: float,
+               bankroll: float, weights: np.ndarray) -> None:
+        i = self.size
+        c = self.cols
+        c["env"][i] = env
+        c["episode"][i] = episode
+        c["step"][i] = step
+        c["number"][i] = number
+        c["stake"][i] = stake
+        c["win"][i] = win
+        c["bankroll"][i] = bankroll
+        c["weights"][i] = weights
+        self.size = i + 1
+        if self.size == self.chunk_size:
+            self.flush()
+
+    def record_batch(self, env, episode, step, number, stake, win, bankroll, weights) -> None:
+        # Filas de varios entornos a la vez (arrays de igual longitud)
+        batch = {"env": env, "episode": episode, "step": step, "number": number,
+                 "stake": stake, "win": win, "bankroll": bankroll, "weights": weights}
+        n = len(number)
+        start = 0
+        while start < n:
+            take = min(n - start, self.chunk_size - self.size)
+            for name, values in batch.items():
+                self.cols[name][self.size:self.size + take] = values[start:start + take]
+            self.size += take
+            start += take
+            if self.size == self.chunk_size:
+                self.flush()
+
+    def flush(self) -> None:
+        if self.size == 0:
+            return
+        n = self.size
+        if self.fmt == "npz":
+            save = np.savez_compressed if self.compress else np.savez
+            save(self.out_dir / f"chunk_{self.chunks_written:05d}.npz",
+                 **{name: a[:n] for name, a in self.cols.items()})
+        else:
+            for name, a in self.cols.items():
+                a[:n].tofile(self._files[name])
+                self._files[name].flush()
+        self.rows_written += n
+        self.chunks_written += 1
+        self.size = 0
+        if self.fmt == "memmap":
+            self._write_meta()
+
+    def close(self) -> None:
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def load_trajectory(path: str | Path) -> dict[str, np.ndarray]:
+    path = Path(path)
+    meta_path = path / "columns.json"
+    if meta_path.exists():
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        rows = int(meta["rows"])
+        if rows == 0:
+            return {}
+        return {
+            name: np.memmap(path / f"{name}.bin", dtype=np.dtype(dt), mode="r", shape=(rows, *shape))
+            for name, (dt, shape) in meta["columns"].items()
+        }
+    chunks = sorted(path.glob("chunk_*.npz"))
+    if not chunks:
+        return {}
+    parts = [dict(np.load(c)) for c in chunks]
+    return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+def iter_trajectory(path: str | Path, rows: int = 1 << 18):
+    # Como load_trajectory() pero por bloques de <= `rows` filas (memoria constante)
+    path = Path(path)
+    meta_path = path / "columns.json"
+    if meta_path.exists():
+        cols = load_trajectory(path)
+        total = len(next(iter(cols.values()))) if cols else 0
+        for start in range(0, total, rows):
+            yield {name: np.asarray(a[start:start + rows]) for name, a in cols.items()}
+        return
+    for chunk in sorted(path.glob("chunk_*.npz")):
+        with np.load(chunk) as z:
+            part = {name: z[name] for name in z.files}
+        n = len(next(iter(part.values())))
+        for start in range(0, n, rows):
+            yield {name: a[start:start + rows] for name, a in part.items()}
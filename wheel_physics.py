@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+# Motor de física de rueda/bola sin pygame, vectorizado sobre lotes de tiradas.
+#
+# Mismo modelo que el juego: fricción geométrica por frame (rueda ×0.999, bola ×0.9975),
+# velocidades mínimas (0.01 / 0.2 rad por unidad de dt), la bola "cae" cuando |ball_av| < 0.45
+# y el resultado se fija 1.2 unidades de tiempo después. Dos caminos:
+#   step()/run()  -> integración frame a frame (lo que hace el bucle de pygame)
+#   resolve()     -> cierre analítico: número de frames hasta asentarse y suma geométrica
+#                    de las velocidades, sin recorrer los frames.
+# idle()/relaunch()/resize() mantienen un SpinState compartido con una fila por mesa
+# (table.TableGroup): cada mesa se lanza en su fila y un step() avanza todas las que giran.
+from __future__ import annotations
+import math
+from dataclasses import dataclass, fields
+import numpy as np
+
+# Orden de la rueda europea (sentido horario visto desde arriba; ángulo 0 arriba)
+WHEEL_ORDER = [0, 32, 15, 19, 4, 21, 2, 25, 17, 34, 6, 27, 13, 36, 11, 30, 8, 23,
+               10, 5, 24, 16, 33, 1, 20, 14, 31, 9, 22, 18, 29, 7, 28, 12, 35, 3, 26]
+WHEEL = np.array(WHEEL_ORDER, dtype=np.int64)
+POCKETS = len(WHEEL_ORDER)
+TWO_PI = 2*math.pi
+ANGLE_PER = TWO_PI / POCKETS
+
+WHEEL_FRICTION = 0.999
+BALL_FRICTION = 0.9975
+WHEEL_MIN_AV = 0.01
+BALL_MIN_AV = 0.2
+DROP_AV = 0.45        # |ball_av| por debajo de esto: la bola cae al cilindro
+SETTLE_TIME = 1.2     # tiempo tras la caída hasta fijar el resultado
+
+FRAME_DT = (1000.0 / 60) / 60.0   # dt de main.py a 60 FPS (clock.tick(FPS) / 60.0)
+
+@dataclass
+class SpinState:
+    wheel_angle: np.ndarray
+    wheel_av: np.ndarray
+    ball_angle: np.ndarray
+    ball_av: np.ndarray
+    timer: np.ndarray      # tiempo acumulado desde la caída de la bola
+    spinning: np.ndarray   # bool
+    result: np.ndarray     # número ganador, -1 mientras gira
+
+    def __len__(self) -> int:
+        return self.wheel_angle.shape[0]
+
+def launch_from_uniforms(u: np.ndarray) -> SpinState:
+    # Lanzamiento a partir de 4 uniformes [0, 1) por tirada: (ángulo rueda, ángulo bola, v rueda, v bola)
+    u = np.asarray(u, dtype=np.float64)
+    n = u.shape[0]
+    return SpinState(
+        wheel_angle=u[:, 0] * TWO_PI,
+        ball_angle=u[:, 1] * TWO_PI,
+        wheel_av=(0.9 + 0.3*u[:, 2]) * (TWO_PI/8) * (-1),   # lenta, horaria
+        ball_av=(5.0 + 1.5*u[:, 3]) * (TWO_PI/8),           # rápida, antihoraria
+        timer=np.zeros(n),
+        spinning=np.ones(n, dtype=bool),
+        result=np.full(n, -1, dtype=np.int64),
+    )
+
+def launch(n: int, rng: np.random.Generator) -> SpinState:
+    # Ángulos y velocidades iniciales aleatorios (como launch_spin del juego)
+    return launch_from_uniforms(rng.random((4, n)).T)
+
+def idle(n: int) -> SpinState:
+    # n ruedas paradas (rueda en 0, bola enfrente), listas para relaunch()
+    return SpinState(
+        wheel_angle=np.zeros(n),
+        wheel_av=np.zeros(n),
+        ball_angle=np.full(n, math.pi),
+        ball_av=np.zeros(n),
+        timer=np.zeros(n),
+        spinning=np.zeros(n, dtype=bool),
+        result=np.full(n, -1, dtype=np.int64),
+    )
+
+def relaunch(s: SpinState, idx, rng: np.random.Generator) -> None:
+    # Lanza en su sitio las filas idx de un estado compartido (mismas tiradas que launch())
+    idx = np.atleast_1d(idx)
+    fresh = launch(len(idx), rng)
+    for f in fields(SpinState):
+        getattr(s, f.name)[idx] = getattr(fresh, f.name)
+
+def resize(s: SpinState, n: int) -> SpinState:
+    # Copia de s con n filas (las nuevas, paradas)
+    out = idle(n)
+    k = min(n, len(s))
+    for f in fields(SpinState):
+        getattr(out, f.name)[:k] = getattr(s, f.name)[:k]
+    return out
+
+def winning_numbers(wheel_angle, ball_angle) -> np.ndarray:
+    # Bolsillo bajo la bola en el marco de la rueda (bolsillo 0 en [0, ANGLE_PER))
+    rel = np.mod(np.asarray(ball_angle) - np.asarray(wheel_angle), TWO_PI)
+    idx = (rel // ANGLE_PER).astype(np.int64) % POCKETS
+    return WHEEL[idx]
+
+def _clamp_min(av: np.ndarray, vmin: float) -> np.ndarray:
+    return np.where(np.abs(av) < vmin, np.where(av >= 0, vmin, -vmin), av)
+
+def step(s: SpinState, dt: float) -> np.ndarray:
+    # Avanza un frame las tiradas activas; devuelve la máscara de las que se asientan ahora
+    settled = np.zeros(len(s), dtype=bool)
+    i = np.flatnonzero(s.spinning)
+    if i.size == 0:
+        return settled
+
+    wav = _clamp_min(s.wheel_av[i] * WHEEL_FRICTION, WHEEL_MIN_AV)
+    bav = _clamp_min(s.ball_av[i] * BALL_FRICTION, BALL_MIN_AV)
+    s.wheel_av[i] = wav
+    s.ball_av[i] = bav
+    s.wheel_angle[i] = np.mod(s.wheel_angle[i] + wav*dt, TWO_PI)
+    s.ball_angle[i] = np.mod(s.ball_angle[i] + bav*dt, TWO_PI)
+
+    dropped = np.abs(bav) < DROP_AV
+    s.timer[i] += np.where(dropped, dt, 0.0)
+    done = dropped & (s.timer[i] > SETTLE_TIME)
+    if done.any():
+        j = i[done]
+        s.result[j] = winning_numbers(s.wheel_angle[j], s.ball_angle[j])
+        s.spinning[j] = False
+        settled[j] = True
+    return settled
+
+def run(s: SpinState, dt: float = FRAME_DT, max_frames: int = 100_000) -> np.ndarray:
+    # Integración frame a frame hasta que todas las tiradas se asientan
+    for _ in range(max_frames):
+        if not s.spinning.any():
+            break
+        step(s, dt)
+    return s.result
+
+def _frames_to_drop(ball_av: np.ndarray) -> np.ndarray:
+    # Primer frame j >= 1 con |ball_av|·r^j < DROP_AV (la velocidad mínima 0.2 < DROP_AV)
+    b0 = np.abs(ball_av)
+    with np.errstate(divide="ignore"):
+        j = np.ceil(np.log(DROP_AV / b0) / math.log(BALL_FRICTION))
+    j = np.maximum(np.nan_to_num(j, nan=1.0, posinf=1.0, neginf=1.0), 1.0).astype(np.int64)
+    # Corrige el redondeo de log/ceil en la frontera
+    j += (b0 * BALL_FRICTION**j >= DROP_AV)
+    j -= (j > 1) & (b0 * BALL_FRICTION**(j - 1) < DROP_AV)
+    return j
+
+def _travel(av0: np.ndarray, r: float, vmin: float, frames: np.ndarray) -> np.ndarray:
+    # Σ_{j=1..F} sign·max(|av0|·r^j, vmin): suma geométrica hasta la velocidad mínima y luego lineal
+    a0 = np.abs(av0)
+    sign = np.where(av0 >= 0, 1.0, -1.0)
+    with np.errstate(divide="ignore"):
+        geo_frames = np.floor(np.log(vmin / a0) / math.log(r))
+    geo_frames = np.clip(np.nan_to_num(geo_frames, posinf=0.0, neginf=0.0), 0, None).astype(np.int64)
+    k = np.minimum(frames, geo_frames)
+    geo = a0 * r * (1.0 - r**k) / (1.0 - r)
+    return sign * (geo + (frames - k) * vmin)
+
+def settle_frames(dt: float) -> int:
+    # Frames desde la caída (incluido) hasta que el temporizador supera SETTLE_TIME
+    t, m = 0.0, 0
+    while t <= SETTLE_TIME:
+        t += dt
+        m += 1
+    return m
+
+def resolve(s: SpinState, dt: float = FRAME_DT) -> np.ndarray:
+    # Resultado analítico de tiradas recién lanzadas (timer = 0): sin recorrer frames.
+    # Deja en el estado los ángulos finales, como si se hubiera llamado a run().
+    frames = _frames_to_drop(s.ball_av) + settle_frames(dt) - 1
+    wheel = s.wheel_angle + dt * _travel(s.wheel_av, WHEEL_FRICTION, WHEEL_MIN_AV, frames)
+    ball = s.ball_angle + dt * _travel(s.ball_av, BALL_FRICTION, BALL_MIN_AV, frames)
+    s.wheel_angle[:] = np.mod(wheel, TWO_PI)
+    s.ball_angle[:] = np.mod(ball, TWO_PI)
+    s.result[:] = winning_numbers(wheel, ball)
+    s.spinning[:] = False
+    return s.result
+
+def sample_pockets(n: int, rng: np.random.Generator, dt: float = FRAME_DT) -> np.ndarray:
+    # n resultados de la física completa por el camino analítico
+    return resolve(launch(n, rng), dt)